@@ -0,0 +1,73 @@
+"""
+Compare FAISS index types against the exact flat index
+
+Reports recall@k, query latency p50/p99 and serialized (on-disk ~ RAM) size
+for every index type supported by the vector database builder.
+
+Usage:
+    python benchmarks/benchmark_faiss_index.py                  # vectors of the local vector database
+    python benchmarks/benchmark_faiss_index.py --synthetic 200000
+"""
+import os
+import sys
+import time
+import argparse
+import faiss
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit_app.utils.config import Config
+from streamlit_app.helpers.faiss_index import INDEX_TYPES, build_index, flat_vectors, index_params
+
+config = Config().get_config()
+
+def load_vectors(args) -> np.ndarray:
+    """Load vectors from the local index or generate normalized random ones"""
+    if args.synthetic:
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((args.synthetic, args.dim)).astype(np.float32)
+    else:
+        index = faiss.read_index(os.path.join(config["vector_db_path"], "index.faiss"))
+        vectors = flat_vectors(index)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", type=int, default=0, help="Number of random vectors instead of the local index")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of synthetic vectors")
+    parser.add_argument("--queries", type=int, default=500, help="Number of queries")
+    parser.add_argument("--k", type=int, default=config["k_document"], help="Recall@k")
+    args = parser.parse_args()
+
+    vectors = load_vectors(args)
+    rng = np.random.default_rng(1)
+    # Queries: perturbed corpus vectors, close to what real questions look like
+    queries = vectors[rng.choice(len(vectors), args.queries)] + 0.05 * rng.standard_normal((args.queries, vectors.shape[1])).astype(np.float32)
+    faiss.normalize_L2(queries)
+    params = index_params(config)
+
+    _, truth = build_index(vectors, "flat", faiss.METRIC_L2, params).search(queries, args.k)
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {args.queries} queries, k={args.k}")
+    print(f"{'index':<8}{'build s':>10}{'recall@k':>10}{'p50 ms':>10}{'p99 ms':>10}{'size MB':>10}")
+
+    for index_type in INDEX_TYPES:
+        start = time.perf_counter()
+        index = build_index(vectors, index_type, faiss.METRIC_L2, params)
+        build_seconds = time.perf_counter() - start
+
+        latencies = []
+        found = np.empty_like(truth)
+        for i, query in enumerate(queries):
+            start = time.perf_counter()
+            _, ids = index.search(query[None, :], args.k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found[i] = ids[0]
+
+        recall = np.mean([len(set(f) & set(t)) / args.k for f, t in zip(found, truth)])
+        size_mb = faiss.serialize_index(index).nbytes / 2 ** 20
+        print(f"{index_type:<8}{build_seconds:>10.2f}{recall:>10.3f}"
+              f"{np.percentile(latencies, 50):>10.3f}{np.percentile(latencies, 99):>10.3f}{size_mb:>10.1f}")
+
+if __name__ == "__main__":
+    main()
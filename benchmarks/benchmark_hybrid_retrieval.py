@@ -0,0 +1,102 @@
+"""
+Measure hybrid retrieval latency, sequential ensemble vs concurrent branches
+
+Builds a FAISS index and a BM25 KeywordIndex over synthetic job chunks and
+compares EnsembleRetriever (keyword then semantic branch) with
+HybridRetriever (both branches at once). Query embedding uses deterministic
+fake vectors plus a sleep standing in for the embedding model on CPU.
+
+Usage:
+    python benchmarks/benchmark_hybrid_retrieval.py --docs 20000 --embed-ms 20
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import numpy as np
+from typing import List
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.retrievers import EnsembleRetriever
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_community.vectorstores import FAISS
+from streamlit_app.utils.config import Config
+from streamlit_app.helpers.keyword_index import KeywordIndex
+from streamlit_app.handlers.chat_modules.keyword_retriever import KeywordRetriever
+from streamlit_app.handlers.chat_modules.hybrid_retriever import HybridRetriever
+
+config = Config().get_config()
+
+WORDS = ("python java data engineer ai machine learning backend frontend devops cloud aws "
+         "senior junior intern ho chi minh ha noi remote hybrid fintech bank startup llm rag").split()
+
+class SlowEmbedding(DeterministicFakeEmbedding):
+    """Fake embeddings taking as long as a CPU embedding model"""
+    delay: float = 0.0
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.delay)
+        return super().embed_query(text)
+
+def make_texts(n_docs: int, seed: int = 0) -> List[str]:
+    """Synthetic job chunks"""
+    rng = random.Random(seed)
+    return [f"Job {i}: " + " ".join(rng.choice(WORDS) for _ in range(60)) for i in range(n_docs)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=20000, help="Chunks in the indexes")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per mode")
+    parser.add_argument("--embed-ms", type=float, default=20, help="Simulated query embedding time")
+    args = parser.parse_args()
+
+    texts = make_texts(args.docs)
+    embedding = SlowEmbedding(size=384)
+    vector_db = FAISS.from_embeddings(
+        zip(texts, DeterministicFakeEmbedding(size=384).embed_documents(texts)), embedding
+    )
+    embedding.delay = args.embed_ms / 1000
+    keyword_retriever = KeywordRetriever(index=KeywordIndex.build(texts), vector_db=vector_db, k=config["keyword_k"])
+    vector_retriever = vector_db.as_retriever(search_kwargs={"k": config["k_document"]})
+
+    ensemble = EnsembleRetriever(
+        retrievers=[keyword_retriever, vector_retriever],
+        weights=[1 - config["weight_semantic"], config["weight_semantic"]]
+    )
+    executor = ThreadPoolExecutor(max_workers=config["retrieval_workers"])
+    hybrid = HybridRetriever(
+        keyword_retriever=keyword_retriever,
+        vector_db=vector_db,
+        executor=executor,
+        k=config["k_document"],
+        weight_semantic=config["weight_semantic"],
+        c=config["rrf_c"]
+    )
+
+    rng = random.Random(1)
+    queries = [" ".join(rng.choice(WORDS) for _ in range(6)) for _ in range(args.queries)]
+    for query in queries[:5]:
+        ensemble_ids = [document.page_content for document in ensemble.invoke(query)]
+        hybrid_ids = [document.page_content for document in hybrid.invoke(query)]
+        assert ensemble_ids == hybrid_ids, "fusion differs from EnsembleRetriever"
+
+    print(f"{'mode':<22}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for name, retriever in (("ensemble (before)", ensemble), ("hybrid (after)", hybrid)):
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            retriever.invoke(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies = np.array(latencies)
+        print(f"{name:<22}{np.percentile(latencies, 50):>10.2f}{np.percentile(latencies, 99):>10.2f}{latencies.mean():>10.2f}")
+
+    timings = [hybrid.search(query)[1] for query in queries]
+    print("hybrid branches (mean ms): " + ", ".join(
+        f"{key}={np.mean([timing[key] for timing in timings]):.2f}" for key in timings[0]
+    ))
+    executor.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Measure the private memory a process adds when it loads the FAISS index
+
+Loads index.faiss in a fresh subprocess per read mode, runs one query and
+reports the growth of RssAnon (anonymous, per-process memory). Pages of a
+memory-mapped file are shared page cache and do not count, so a mapping
+that works shows almost no growth whatever the index size. Linux only.
+
+Usage:
+    python benchmarks/benchmark_index_load.py                     # local vector database
+    python benchmarks/benchmark_index_load.py --synthetic 100000  # random flat index
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+import faiss
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit_app.utils.config import Config
+
+config = Config().get_config()
+
+MODES = {
+    "read into memory": 0,
+    "IO_FLAG_MMAP": faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY,
+    "IO_FLAG_MMAP_IFC": faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY,
+}
+
+def rss_anon_mb() -> float:
+    """Anonymous resident memory of this process in MB"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("RssAnon is not reported on this platform")
+
+def measure(path: str, flag: int) -> dict:
+    """Load the index with a flag and query it, in this process"""
+    before = rss_anon_mb()
+    try:
+        index = faiss.read_index(path, flag)
+    except RuntimeError as e:
+        return {"error": str(e).splitlines()[0][:60]}
+    index.search(np.ones((1, index.d), dtype=np.float32), 3)
+    return {"rss_anon_mb": rss_anon_mb() - before, "type": type(index).__name__}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", type=int, default=0, help="Number of random vectors in a flat index instead of the local index")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of synthetic vectors")
+    parser.add_argument("--measure", nargs=2, metavar=("PATH", "FLAG"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure[0], int(args.measure[1]))))
+        return
+
+    if args.synthetic:
+        path = os.path.join(tempfile.mkdtemp(), "index.faiss")
+        index = faiss.IndexFlatL2(args.dim)
+        index.add(np.random.default_rng(0).standard_normal((args.synthetic, args.dim)).astype(np.float32))
+        faiss.write_index(index, path)
+        del index
+    else:
+        path = os.path.join(config["vector_db_path"], "index.faiss")
+
+    print(f"index: {path} ({os.path.getsize(path) / 2**20:.1f} MB on disk)")
+    print(f"{'mode':<20}{'type':<24}{'RssAnon MB':>12}")
+    for name, flag in MODES.items():
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--measure", path, str(flag)],
+            capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        if "error" in result:
+            print(f"{name:<20}failed: {result['error']}")
+        else:
+            print(f"{name:<20}{result['type']:<24}{result['rss_anon_mb']:>12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Measure the formatting CPU of a streamed answer
+
+Compares the previous stream loop (process_markdown over the whole
+accumulated text after every word) with the incremental block renderer,
+unthrottled (one frame per token) and throttled to the configured frame
+rate. The placeholder is a stub, so only formatting time is measured.
+
+Usage:
+    python benchmarks/benchmark_markdown_stream.py --tokens 500 1500 3000
+"""
+import os
+import re
+import sys
+import time
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit_app.utils.config import Config
+from streamlit_app.handlers.chat_modules.response_formatter import ResponseFormatter, IncrementalMarkdownRenderer
+
+config = Config().get_config()
+
+class StubPlaceholder:
+    """Count updates instead of sending them to the browser"""
+    def __init__(self):
+        self.updates = 0
+
+    def markdown(self, body: str, unsafe_allow_html: bool = False) -> None:
+        self.updates += 1
+
+def make_answer(n_tokens: int) -> list:
+    """Build an answer shaped like the job listings the LLM returns, split into tokens"""
+    blocks = ["Here are the **best matching** jobs from the Linkedin dataset:"]
+    i = 0
+    while sum(len(block.split()) for block in blocks) < n_tokens:
+        i += 1
+        blocks.append(
+            f"{i}. **Company {i}** - AI Engineer (Ho Chi Minh)\n"
+            f"- Location: Ho Chi Minh City, *hybrid*\n"
+            f"- URL: https://www.linkedin.com/jobs/view/{1000 + i}\n"
+            f"- Role: build `RAG` pipelines with Python and FAISS"
+        )
+    blocks.append("Let me know if you want more details about any of these jobs.")
+    tokens = re.findall(r"\s*\S+", "\n\n".join(blocks))
+    return tokens[:n_tokens]
+
+def legacy_stream(formatter: ResponseFormatter, tokens: list, placeholder: StubPlaceholder) -> None:
+    """Previous loop: whole-text formatting after every word"""
+    full_response = ""
+    for word in "".join(tokens).split():
+        full_response += word + " "
+        placeholder.markdown(formatter.process_markdown(full_response), unsafe_allow_html=True)
+    placeholder.markdown(formatter.process_markdown(full_response), unsafe_allow_html=True)
+
+def incremental_stream(formatter: ResponseFormatter, tokens: list, placeholder: StubPlaceholder, fps: float) -> None:
+    """Incremental renderer fed token by token"""
+    renderer = IncrementalMarkdownRenderer(formatter, placeholder, fps=fps)
+    for token in tokens:
+        renderer.feed(token)
+    renderer.flush()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, nargs="+", default=[500, 1500, 3000], help="Answer lengths in tokens")
+    parser.add_argument("--fps", type=float, default=config["stream_fps"], help="Frame rate of the throttled renderer")
+    args = parser.parse_args()
+
+    formatter = ResponseFormatter()
+    modes = {
+        "legacy per word": lambda tokens, placeholder: legacy_stream(formatter, tokens, placeholder),
+        "incremental per token": lambda tokens, placeholder: incremental_stream(formatter, tokens, placeholder, 0),
+        f"incremental {args.fps:g} fps": lambda tokens, placeholder: incremental_stream(formatter, tokens, placeholder, args.fps),
+    }
+
+    print(f"{'mode':<24}{'tokens':>8}{'cpu ms':>10}{'us/token':>10}{'updates':>9}")
+    for n_tokens in args.tokens:
+        tokens = make_answer(n_tokens)
+        for name, run in modes.items():
+            placeholder = StubPlaceholder()
+            start = time.process_time()
+            run(tokens, placeholder)
+            elapsed = time.process_time() - start
+            print(f"{name:<24}{len(tokens):>8}{elapsed * 1000:>10.1f}{elapsed / len(tokens) * 1e6:>10.1f}{placeholder.updates:>9}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Count MongoDB clients and connections opened per Streamlit rerun
+
+Simulates reruns of the app: each one gets a client, lists a sidebar page
+and loads a chat. "before" creates a MongoClient per rerun like DBHandler
+used to, "after" uses the shared get_mongo_client registry.
+
+With --uri (a local mongod), pymongo pool events count real connections.
+Without it, mongomock stands in for the server and only clients (each one
+a pool with its monitor threads on a real server) are counted.
+
+Usage:
+    python benchmarks/benchmark_mongo_clients.py --reruns 100
+    python benchmarks/benchmark_mongo_clients.py --reruns 100 --uri mongodb://localhost:27017
+"""
+import os
+import sys
+import argparse
+from pymongo import monitoring
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import streamlit_app.db.mongo_client as mongo_client
+
+class PoolCounter(monitoring.ConnectionPoolListener):
+    """Count pools and connections opened by every client"""
+    def __init__(self):
+        self.pools = 0
+        self.connections = 0
+
+    def pool_created(self, event): self.pools += 1
+    def connection_created(self, event): self.connections += 1
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+    def connection_check_out_started(self, event): pass
+    def connection_check_out_failed(self, event): pass
+    def connection_checked_out(self, event): pass
+    def connection_checked_in(self, event): pass
+
+def rerun(client) -> None:
+    """Queries of one rerun: a sidebar page and the latest messages of a chat"""
+    db = client["chatbot"]
+    list(db["chat_history"].find({}, {"_id": 1, "title": 1}).sort("_id", -1).limit(30))
+    list(db["chat_messages"].find({"chat_id": 1}).sort("seq", -1).limit(50))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=100, help="Number of simulated reruns")
+    parser.add_argument("--uri", default=None, help="MongoDB uri of a local mongod, mongomock when omitted")
+    args = parser.parse_args()
+
+    clients = []
+    if args.uri:
+        from pymongo import MongoClient
+        counter = PoolCounter()
+        monitoring.register(counter)
+        uri = args.uri
+    else:
+        import mongomock
+        MongoClient = mongomock.MongoClient
+        counter = None
+        uri = "mongodb://mongomock"
+
+    def make_client(*client_args, **kwargs):
+        client = MongoClient(*client_args, **kwargs)
+        clients.append(client)
+        return client
+    # The registry creates its client through the same counting factory
+    mongo_client.MongoClient = make_client
+
+    results = {}
+    for mode in ("before", "after"):
+        clients.clear()
+        pools, connections = (counter.pools, counter.connections) if counter else (0, 0)
+        for _ in range(args.reruns):
+            client = make_client(uri) if mode == "before" else mongo_client.get_mongo_client(uri)
+            rerun(client)
+        if counter:
+            results[mode] = (len(clients), counter.pools - pools, counter.connections - connections)
+        else:
+            results[mode] = (len(clients), None, None)
+        if mode == "before":
+            for client in clients:
+                client.close()
+
+    print(f"{'mode':<8}{'reruns':>8}{'clients':>9}{'pools':>7}{'connections':>13}")
+    for mode, (n_clients, n_pools, n_connections) in results.items():
+        pools = "-" if n_pools is None else n_pools
+        connections = "-" if n_connections is None else n_connections
+        print(f"{mode:<8}{args.reruns:>8}{n_clients:>9}{pools:>7}{connections:>13}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Check and time ResponseFormatter.process_markdown
+
+The golden corpus holds answers shaped like what the LLM returns (5-result
+job lists, bullets, headers, code) and edge cases of every pattern. The
+current converter must give exactly the HTML of the previous one, kept
+below as legacy_process_markdown; the script exits with an error otherwise,
+then times both on the corpus.
+
+Usage:
+    python benchmarks/benchmark_process_markdown.py --repeat 200
+"""
+import os
+import re
+import sys
+import time
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit_app.handlers.chat_modules.response_formatter import ResponseFormatter
+
+JOB_LIST = "\n\n".join(
+    [
+        "Here are the best matching jobs:",
+        *[
+            f"{i}. **Company {i}** - AI Engineer\n"
+            f"- Location: Ho Chi Minh City, *hybrid*\n"
+            f"- URL: https://www.linkedin.com/jobs/view/{1000 + i}\n"
+            f"- Role: build `RAG` pipelines with Python"
+            for i in range(1, 6)
+        ],
+        "Let me know if you want more details.",
+    ]
+)
+
+GOLDEN_CORPUS = [
+    "",
+    "I don't know",
+    "markdown: **Bold** and *italic* text",
+    JOB_LIST,
+    JOB_LIST.replace("\n\n", "\n"),
+    " ".join(JOB_LIST.split()),
+    "Top jobs: 1. Data Engineer at FPT 2. AI Engineer at VNG (Hanoi) 3. ML Engineer at Grab",
+    "1. Data Engineer 2. AI Engineer",
+    "Version 2. Python 3. numbers inside a sentence",
+    "# Title\n## Subtitle\n### Section\n#### Too deep\n#No space",
+    "Intro\n1. first\n2. second\nOutro",
+    "Intro\n- a\n- b\n\n- c\nOutro",
+    "1. one\n- bullet right after\n2. two",
+    "- only bullets\n- at the end",
+    "1. only numbers\n2. at the end",
+    "Text\n\n1. after blank\n\n- after blank",
+    "```python\nprint('**not bold**')\n```\nand `inline` code",
+    "```\nno language\n```",
+    "``` unclosed fence",
+    "**a *b* c** and *a **b** c*",
+    "***triple*** and ** spaced **",
+    "line with trailing spaces   \n  1. indented number\n  - indented bullet",
+    "Salary: 1. 000 USD: 2. 000 USD",
+    "Mixed\r\n1. windows\r\n2. line endings",
+]
+
+def legacy_process_markdown(text):
+    """process_markdown before precompiling, the reference output"""
+    colon_list_match = re.search(r'(.*?):\s*((?:\d+\.\s+[^0-9\.\n]+(?:\([^)]+\))?(?:\s+)?)+)', text, re.DOTALL)
+    if colon_list_match:
+        prefix = colon_list_match.group(1)
+        list_text = colon_list_match.group(2)
+
+        # Split the list portion by numbers
+        parts = re.split(r'(\d+\.\s+)', list_text)
+        if len(parts) > 2:  # At least one number detected
+            # Build the list items
+            num_parts = []
+            for i in range(1, len(parts), 2):
+                if i+1 < len(parts):
+                    num_parts.append(parts[i] + parts[i+1].strip())
+
+            # If we have multiple items, format as a proper list
+            if len(num_parts) > 1:
+                # Replace with prefix followed by properly formatted list
+                text = prefix + ":\n\n" + "\n".join(num_parts)
+
+    # Also check for general inline list patterns without a colon
+    elif re.search(r'\d+\.\s+\w+.*\d+\.\s+\w+', text):
+        # This might be an inline list, let's process it
+        parts = re.split(r'(\d+\.\s+)', text)
+        if len(parts) > 2:  # At least one number detected
+            # Determine if this is likely a list by checking if multiple numbered items exist
+            num_parts = []
+            for i in range(1, len(parts), 2):
+                if i+1 < len(parts):
+                    num_parts.append(parts[i] + parts[i+1].strip())
+
+            # If we have multiple numbered items, convert to proper list format
+            if len(num_parts) > 1:
+                # Replace the original text with properly formatted list items
+                text = "\n".join(num_parts)
+
+    # Bold text
+    text = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', text)
+
+    # Italic text 
+    text = re.sub(r'\*(.*?)\*', r'<em>\1</em>', text)
+
+    # Headers
+    text = re.sub(r'^# (.*?)$', r'<h1>\1</h1>', text, flags=re.MULTILINE)
+    text = re.sub(r'^## (.*?)$', r'<h2>\1</h2>', text, flags=re.MULTILINE)
+    text = re.sub(r'^### (.*?)$', r'<h3>\1</h3>', text, flags=re.MULTILINE)
+
+    # Process numbered lists with a more robust approach
+    # First identify consecutive numbered list items
+    lines = text.split('\n')
+    in_numbered_list = False
+    processed_lines = []
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        # Check if this is a numbered list item
+        numbered_match = re.match(r'^(\d+)\. (.*?)$', line)
+
+        if numbered_match:
+            # If we're not already in a numbered list, start one
+            if not in_numbered_list:
+                # Add spacing before the list if it follows a paragraph
+                if processed_lines and not processed_lines[-1].strip() == '':
+                    processed_lines.append('<div style="margin-top: 0.5rem;"></div>')
+                processed_lines.append('<ol>')
+                in_numbered_list = True
+
+            # Extract the number and content
+            number = numbered_match.group(1)
+            content = numbered_match.group(2)
+
+            # Add the list item with bold number
+            processed_lines.append(f'<li><strong>{number}.</strong> {content}</li>')
+        else:
+            # If we were in a numbered list, close it
+            if in_numbered_list:
+                processed_lines.append('</ol>')
+                # Add spacing after the list if it's followed by text
+                if line.strip() != '':
+                    processed_lines.append('<div style="margin-bottom: 0.5rem;"></div>')
+                in_numbered_list = False
+
+            # Add the regular line
+            processed_lines.append(line)
+
+        i += 1
+
+    # Close any open list
+    if in_numbered_list:
+        processed_lines.append('</ol>')
+
+    # Join back to text
+    text = '\n'.join(processed_lines)
+
+    # Bullet lists with improved formatting
+    bullet_pattern = r'^- (.*?)$'
+
+    # Process bullet lists similar to numbered lists
+    lines = text.split('\n')
+    in_bullet_list = False
+    processed_lines = []
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        bullet_match = re.match(bullet_pattern, line)
+
+        if bullet_match:
+            # If we're not already in a bullet list, start one
+            if not in_bullet_list:
+                # Add spacing before the list if it follows a paragraph
+                if processed_lines and not processed_lines[-1].strip() == '':
+                    processed_lines.append('<div style="margin-top: 0.5rem;"></div>')
+                processed_lines.append('<ul>')
+                in_bullet_list = True
+
+            # Add the bullet item
+            content = bullet_match.group(1)
+            processed_lines.append(f'<li>{content}</li>')
+        else:
+            # If we were in a bullet list, close it
+            if in_bullet_list:
+                processed_lines.append('</ul>')
+                # Add spacing after the list if it's followed by text
+                if line.strip() != '':
+                    processed_lines.append('<div style="margin-bottom: 0.5rem;"></div>')
+                in_bullet_list = False
+
+            # Add the regular line
+            processed_lines.append(line)
+
+        i += 1
+
+    # Close any open list
+    if in_bullet_list:
+        processed_lines.append('</ul>')
+
+    # Join back to text
+    text = '\n'.join(processed_lines)
+
+    # Code blocks
+    text = re.sub(r'```(\w+)?\n(.*?)```', r'<pre><code class="language-\1">\2</code></pre>', text, flags=re.DOTALL)
+
+    # Code blocks without language specification
+    text = re.sub(r'```\n(.*?)```', r'<pre><code>\1</code></pre>', text, flags=re.DOTALL)
+
+    # Inline code
+    text = re.sub(r'`(.*?)`', r'<code>\1</code>', text)
+
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="Times the corpus is converted")
+    args = parser.parse_args()
+
+    formatter = ResponseFormatter()
+    mismatches = [text for text in GOLDEN_CORPUS if formatter.process_markdown(text) != legacy_process_markdown(text)]
+    if mismatches:
+        for text in mismatches:
+            print(f"Mismatch for {text!r}:\n  legacy : {legacy_process_markdown(text)!r}\n  current: {formatter.process_markdown(text)!r}")
+        sys.exit(1)
+    print(f"Golden corpus: {len(GOLDEN_CORPUS)} inputs, identical output")
+
+    print(f"{'converter':<12}{'us/call':>10}{'job list us':>13}")
+    for name, convert in (("legacy", legacy_process_markdown), ("current", formatter.process_markdown)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for text in GOLDEN_CORPUS:
+                convert(text)
+        per_call = (time.perf_counter() - start) / (args.repeat * len(GOLDEN_CORPUS))
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            convert(JOB_LIST)
+        per_job_list = (time.perf_counter() - start) / args.repeat
+        print(f"{name:<12}{per_call * 1e6:>10.1f}{per_job_list * 1e6:>13.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Measure the per-query overhead of the QA chain
+
+Compares building the prompt and RetrievalQA chain (verbose) for every query,
+as retrieve_qa used to, with reusing one prebuilt chain. The LLM and the
+retriever are stubs answering instantly, so the timings are pure overhead.
+
+Usage:
+    python benchmarks/benchmark_qa_chain.py --queries 500
+"""
+import os
+import sys
+import time
+import argparse
+import contextlib
+import numpy as np
+from typing import List
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.chains import RetrievalQA
+from langchain.prompts import PromptTemplate
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from streamlit_app.handlers.chat_modules.qa_chain import QA_TEMPLATE, build_qa_chain
+
+class StubRetriever(BaseRetriever):
+    """Return the same job chunks for every query"""
+    documents: List[Document]
+
+    def _get_relevant_documents(self, query: str, *, run_manager) -> List[Document]:
+        return self.documents
+
+def per_query_chain(llm, retriever, query: str) -> str:
+    """Previous behaviour: new prompt and verbose chain for every query"""
+    prompt = PromptTemplate(template=QA_TEMPLATE, input_variables=["context", "question"])
+    qa_chain = RetrievalQA.from_chain_type(
+        llm=llm,
+        chain_type="stuff",
+        retriever=retriever,
+        chain_type_kwargs={"prompt": prompt},
+        verbose=True
+    )
+    return qa_chain.invoke({"query": query})["result"]
+
+def time_queries(run, queries: int) -> np.ndarray:
+    """Run a query function and return per-query latencies in ms"""
+    latencies = []
+    # Verbose chains print the stuffed context, keep it off the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        run("warm up")
+        for i in range(queries):
+            start = time.perf_counter()
+            run(f"AI engineer jobs in Ho Chi Minh {i}")
+            latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=500, help="Number of queries per mode")
+    parser.add_argument("--documents", type=int, default=5, help="Documents returned by the stub retriever")
+    parser.add_argument("--chunk-chars", type=int, default=1000, help="Characters per document")
+    args = parser.parse_args()
+
+    llm = FakeListChatModel(responses=["stub answer"])
+    documents = [Document(page_content="x" * args.chunk_chars, metadata={"job_url": str(i)}) for i in range(args.documents)]
+    retriever = StubRetriever(documents=documents)
+
+    prebuilt = build_qa_chain(llm, retriever)
+    modes = {
+        "per-query chain (before)": lambda query: per_query_chain(llm, retriever, query),
+        "prebuilt chain (after)": lambda query: prebuilt.invoke({"query": query})["result"],
+    }
+
+    print(f"{'mode':<26}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for name, run in modes.items():
+        latencies = time_queries(run, args.queries)
+        print(f"{name:<26}{np.percentile(latencies, 50):>10.3f}{np.percentile(latencies, 99):>10.3f}{latencies.mean():>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compare rerankers on a fixed query set: no rerank, local cross-encoder and Cohere
+
+Synthetic job chunks carry a title and a location; a query asks for one
+title in one location and the relevant chunks are the jobs matching both.
+Candidates come from the BM25 KeywordIndex, every reranker keeps top_n of
+them. Reports per-query latency and quality (precision@top_n, MRR) of each
+mode, plus the latency of the local reranker once its score cache is warm.
+
+Cohere needs COHERE_API_KEY and network access, the local cross-encoder the
+sentence-transformers model; modes that cannot be built are skipped.
+
+Usage:
+    python benchmarks/benchmark_rerank.py --modes none cross_encoder cohere
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import numpy as np
+from typing import List, Tuple
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document
+from streamlit_app.utils.config import Config
+from streamlit_app.helpers.keyword_index import KeywordIndex
+from streamlit_app.handlers.chat_modules.reranker import build_reranker
+
+config = Config().get_config()
+
+TITLES = ["Python Developer", "Data Engineer", "AI Engineer", "Java Backend Developer", "DevOps Engineer",
+          "Frontend Developer", "Data Analyst", "Machine Learning Engineer"]
+LOCATIONS = ["Ho Chi Minh City", "Ha Noi", "Da Nang", "Remote"]
+FILLER = ("team product agile salary benefits english communication experience years degree "
+          "startup bank fintech office hybrid insurance bonus training").split()
+
+def make_corpus(n_jobs: int, seed: int = 0) -> List[Document]:
+    """Synthetic job chunks with their title and location in the metadata"""
+    rng = random.Random(seed)
+    documents = []
+    for i in range(n_jobs):
+        title, location = rng.choice(TITLES), rng.choice(LOCATIONS)
+        # Other roles and places in the description make keyword matches noisy, like real postings
+        mentions = [f"work with our {rng.choice(TITLES)} team in {rng.choice(LOCATIONS)}" for _ in range(rng.randint(0, 4))]
+        noise = " ".join([rng.choice(FILLER) for _ in range(60)] + mentions)
+        documents.append(Document(
+            id=f"job{i}:0",
+            page_content=f"job_title: {title}\njob_location: {location}\ncompany_name: Company {i}\ndescription: {noise}",
+            metadata={"job_url": f"https://www.linkedin.com/jobs/view/{i}", "title": title, "location": location}
+        ))
+    return documents
+
+def make_queries(n_queries: int, seed: int = 1) -> List[Tuple[str, str, str]]:
+    """Fixed queries (text, title, location)"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n_queries):
+        title, location = rng.choice(TITLES), rng.choice(LOCATIONS)
+        queries.append((f"{title} jobs in {location}", title, location))
+    return queries
+
+def quality(ranked: List[Document], title: str, location: str, top_n: int) -> Tuple[float, float]:
+    """Precision@top_n and reciprocal rank of the first relevant chunk"""
+    relevant = [document.metadata["title"] == title and document.metadata["location"] == location for document in ranked[:top_n]]
+    first = next((rank for rank, hit in enumerate(relevant, start=1) if hit), None)
+    return sum(relevant) / top_n, 1 / first if first else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["none", "cross_encoder", "cohere"], help="Rerankers to compare")
+    parser.add_argument("--jobs", type=int, default=2000, help="Job chunks in the corpus")
+    parser.add_argument("--queries", type=int, default=50, help="Fixed queries")
+    parser.add_argument("--candidates", type=int, default=20, help="BM25 candidates given to the reranker")
+    parser.add_argument("--top-n", type=int, default=config["rerank_top_n"], help="Documents kept")
+    args = parser.parse_args()
+
+    documents = make_corpus(args.jobs)
+    index = KeywordIndex.build([document.page_content for document in documents])
+    queries = make_queries(args.queries)
+    candidates = []
+    for text, _, _ in queries:
+        positions, _ = index.search(text, args.candidates)
+        candidates.append([documents[int(position)] for position in positions])
+
+    print(f"{'mode':<16}{'p50 ms':>10}{'p95 ms':>10}{'warm p50':>10}{'P@n':>8}{'MRR':>8}")
+    for mode in args.modes:
+        reranker = None if mode == "none" else build_reranker(mode, args.top_n)
+        if mode != "none" and reranker is None:
+            print(f"{mode:<16}skipped, reranker could not be built")
+            continue
+
+        def rerank(i: int) -> List[Document]:
+            if reranker is None:
+                return candidates[i][:args.top_n]
+            return list(reranker.compress_documents(candidates[i], queries[i][0]))
+
+        passes = []
+        # Second pass hits the score cache of the local reranker
+        for _ in range(2 if getattr(reranker, "cache", None) is not None else 1):
+            latencies, scores = [], []
+            for i, (_, title, location) in enumerate(queries):
+                start = time.perf_counter()
+                ranked = rerank(i)
+                latencies.append((time.perf_counter() - start) * 1000)
+                scores.append(quality(ranked, title, location, args.top_n))
+            passes.append((np.array(latencies), np.array(scores)))
+
+        latencies, scores = passes[0]
+        warm = f"{np.percentile(passes[1][0], 50):>10.2f}" if len(passes) > 1 else f"{'-':>10}"
+        print(f"{mode:<16}{np.percentile(latencies, 50):>10.2f}{np.percentile(latencies, 95):>10.2f}{warm}"
+              f"{scores[:, 0].mean():>8.3f}{scores[:, 1].mean():>8.3f}")
+
+if __name__ == "__main__":
+    main()
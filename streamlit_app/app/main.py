@@ -9,16 +9,17 @@ if "mnt" in os.getcwd():
 
 from streamlit_app.utils.config import Config
 from streamlit_app.app.sidebar import SidebarComponent
-from streamlit_app.handlers.db_handler import DBHandler
+from streamlit_app.handlers.db_handler import DBHandler, make_title
 from streamlit_app.handlers.chat_handler import ChatHandler 
 from streamlit_app.handlers.session_handler import SessionHandler
-from streamlit_app.helpers.processing_text import escape_for_js
+from streamlit_app.helpers.message_html import cached_message_html
 from streamlit_app.handlers.style_loader_handler import StyleLoader
 from streamlit_app.helpers.check_initialization_status import check_initialization_status
 
 # Initialize configuration
 config = Config()
 config.initialize_session_states()
+history_window = config.get_config()["history_window"]
 
 # Add a force rerun parameter
 if "force_rerun" not in st.session_state:
@@ -65,6 +66,7 @@ if 'handler_initialized' not in st.session_state:
     st.session_state.handler_initialized = False
 
 # Initialize chat handler (this won't block now)
+# Models and index load once per process in the shared engine, so later sessions start ready
 if 'chat_handler' not in st.session_state:
     print("Creating new ChatHandler instance")
     st.session_state.chat_handler = ChatHandler()
@@ -87,8 +89,14 @@ if not st.session_state.handler_initialized and not ("switching_chat" in st.sess
 # Initialize DB handler
 db_handler = DBHandler()
 
+# Store the titles of chats saved before titles were written with them, once per process
+@st.cache_resource(show_spinner=False)
+def backfill_chat_titles() -> int:
+    return db_handler.backfill_chat_titles()
+backfill_chat_titles()
+
 # Initialize session handler
-session_handler = SessionHandler(db_handler.chat_collection)
+session_handler = SessionHandler(db_handler.chat_collection, db_handler.load_recent_messages)
 
 # Initialize sidebar component
 sidebar = SidebarComponent(
@@ -96,7 +104,9 @@ sidebar = SidebarComponent(
     create_new_chat=session_handler.create_new_chat,
     switch_chat=session_handler.switch_chat,
     get_chat_title=db_handler.get_chat_title,
-    show_rename=session_handler.show_rename
+    show_rename=session_handler.show_rename,
+    get_chat_page=db_handler.get_chat_page,
+    delete_chat=db_handler.delete_chat
 )
 
 # Only show header and refresh buttons if not switching chats
@@ -178,30 +188,25 @@ else:
 
 # Main chat area
 # Update the message display section: sho history chat
-for message in st.session_state.messages:
+# Only the last messages are drawn, older ones on demand
+if "history_window" not in st.session_state:
+    st.session_state.history_window = history_window
+first_shown = max(0, len(st.session_state.messages) - st.session_state.history_window)
+# Non-zero only when older messages exist in the database, their seq is not a count (writes may leave gaps)
+older_in_db = st.session_state.get("first_loaded_seq", 0)
+if first_shown > 0 or older_in_db:
+    label = "⬆️ Load earlier messages" if older_in_db else f"⬆️ Load earlier messages ({first_shown} more)"
+    if st.button(label):
+        # Fetch the previous page from the database once every loaded message is shown
+        if first_shown < history_window:
+            session_handler.load_earlier_messages()
+        st.session_state.history_window += history_window
+        st.rerun()
+
+for index in range(first_shown, len(st.session_state.messages)):
+    message = st.session_state.messages[index]
     with st.chat_message(message["role"]):
-        if message["role"] == "assistant":
-            escaped_content = escape_for_js(message["content"])
-            st.markdown(
-                f"""
-                <div class="message-container">
-                    {message["content"]}
-                    <button class="copy-button" onclick="copyToClipboard('{escaped_content}')">
-                        📋 Copy
-                    </button>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
-        else:
-            st.markdown(
-                f"""
-                <div class="user-message">
-                    {message["content"]}
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
+        st.markdown(cached_message_html(index, message), unsafe_allow_html=True)
 
 # Reset the switching_chat flag after displaying messages
 if "switching_chat" in st.session_state and st.session_state.switching_chat:
@@ -223,11 +228,9 @@ if prompt := st.chat_input(input_placeholder, disabled=not chat_handler.is_ready
         # Create new chat only when first message is sent
         new_chat_id = ObjectId()
         st.session_state.chat_id = str(new_chat_id)
-        db_handler.insert_chat_message(
-            chat_id=new_chat_id,
-            messages=[],
-            title=prompt
-        )
+        # Saved in the background, shown in the sidebar right away
+        db_handler.save_turn(new_chat_id, [], create_title=prompt)
+        SidebarComponent.add_chat(new_chat_id, make_title(prompt))
 
     # Add user message
     st.session_state.messages.append({"role": "user", "content": prompt})
@@ -245,19 +248,26 @@ if len(st.session_state.messages) > 0 and st.session_state.messages[-1]["role"]
             user_message = st.session_state.messages[-1]["content"]
             
             with st.spinner("Thinking..."):
-                # Generate response
-                response_content = chat_handler.retrieve_qa(user_message)
+                # Generate response, tokens are shown as they arrive
+                response_content = chat_handler.retrieve_qa(user_message, message_placeholder)
 
-                # Stream the response
+                # Display the final response
                 chat_handler.stream_response(response_content, message_placeholder)
 
                 # Add assistant response to messages
                 st.session_state.messages.append({"role": "assistant", "content": response_content})
                 
-                # Update MongoDB
+                # Update MongoDB in the background, the turn is written at once
                 current_chat_id = ObjectId(st.session_state.chat_id)
-                db_handler.update_chat_messages(current_chat_id, {"role": "user", "content": user_message})
-                db_handler.update_chat_messages(current_chat_id, {"role": "assistant", "content": response_content})
+                # Chats created with "New Chat" get their title from the first message
+                first_message = user_message if len(st.session_state.messages) == 2 else None
+                db_handler.save_turn(
+                    current_chat_id,
+                    [{"role": "user", "content": user_message}, {"role": "assistant", "content": response_content}],
+                    first_message=first_message
+                )
+                if first_message is not None:
+                    SidebarComponent.title_chat(current_chat_id, make_title(first_message), config.get_config()["default_name"])
 
         except Exception as e:
             st.error(f"Error generating response: {str(e)}")
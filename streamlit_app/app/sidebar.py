@@ -2,28 +2,71 @@ import streamlit as st
 from bson.objectid import ObjectId
 from typing import Callable
 from pymongo.collection import Collection
+from streamlit_app.utils.config import Config
+
+# Variables
+sidebar_page_size = Config().get_config()["sidebar_page_size"]
+
 class SidebarComponent:
     """
     Rendering sidebar component of the program
 
+    The listed chats are cached in st.session_state.sidebar_chats, setting
+    st.session_state.sidebar_updated (create, rename, delete) reloads them.
+
     Args:
-        chat_collection: to show history chat
+        chat_collection: to rename history chat
         create_new_chat: button create new chat
         switch_chat: switch chat to render
         get_chat_title: to show onto sidebar
         show_rename: function to rename chat history
+        get_chat_page: fetch one page of chats (_id and title only)
+        delete_chat: delete a chat and its messages
     """
     def __init__(self, 
                  chat_collection: Collection,
                  create_new_chat: Callable,
                  switch_chat: Callable,
                  get_chat_title: Callable,
-                 show_rename: Callable):
+                 show_rename: Callable,
+                 get_chat_page: Callable,
+                 delete_chat: Callable):
         self.chat_collection = chat_collection
         self.create_new_chat = create_new_chat
         self.switch_chat = switch_chat
         self.get_chat_title = get_chat_title
         self.show_rename = show_rename
+        self.get_chat_page = get_chat_page
+        self.delete_chat = delete_chat
+
+    def _load_chats(self) -> list:
+        """Return the cached chats, fetching the first page when missing or outdated"""
+        if st.session_state.pop("sidebar_updated", False) or "sidebar_chats" not in st.session_state:
+            # Only the session's own chat may still be queued for writing
+            chats = self.get_chat_page(limit=sidebar_page_size, chat_id=st.session_state.get("chat_id"))
+            st.session_state.sidebar_chats = chats
+            st.session_state.sidebar_has_more = len(chats) == sidebar_page_size
+        return st.session_state.sidebar_chats
+
+    def _load_more(self) -> None:
+        """Append the next page of older chats"""
+        chats = st.session_state.sidebar_chats
+        more = self.get_chat_page(limit=sidebar_page_size, before_id=chats[-1]["_id"])
+        st.session_state.sidebar_chats = chats + more
+        st.session_state.sidebar_has_more = len(more) == sidebar_page_size
+
+    @staticmethod
+    def add_chat(chat_id: ObjectId, title: str) -> None:
+        """Show a chat saved in the background at the top of the cached list"""
+        if "sidebar_chats" in st.session_state:
+            st.session_state.sidebar_chats = [{"_id": chat_id, "title": title}] + st.session_state.sidebar_chats
+
+    @staticmethod
+    def title_chat(chat_id: ObjectId, title: str, default_title: str) -> None:
+        """Show the title given in the background to a chat still using the default one"""
+        for chat in st.session_state.get("sidebar_chats", []):
+            if chat["_id"] == chat_id and chat.get("title", default_title) == default_title:
+                chat["title"] = title
 
     def render(self):
         """Render the sidebar component"""
@@ -36,15 +79,15 @@ class SidebarComponent:
             
             st.markdown("---")
 
-            # Check if sidebar needs to be updated after renaming
-            if "sidebar_updated" in st.session_state:
-                del st.session_state.sidebar_updated
-                st.rerun()
-            
-            # Display chat history
-            for idx, chat in enumerate(self.chat_collection.find().sort("_id", -1)):
+            # Display chat history, reloaded after create, rename or delete
+            chats = self._load_chats()
+            for idx, chat in enumerate(chats):
                 self._render_chat_item(idx, chat)
 
+            if st.session_state.sidebar_has_more and st.button("Load more", key="load_more_chats"):
+                self._load_more()
+                st.rerun()
+
     def _render_chat_item(self, idx: int, chat: dict):
         """Render individual chat item in sidebar"""
         chat_id = chat.get("_id")
@@ -76,9 +119,11 @@ class SidebarComponent:
         )
         
         if option == "Delete":
-            if chat_id == st.session_state.chat_id:
+            # Delete first, create_new_chat reruns the script
+            self.delete_chat(chat_id)
+            st.session_state.sidebar_updated = True
+            if str(chat_id) == st.session_state.chat_id:
                 self.create_new_chat()
-            self.chat_collection.delete_one({"_id": chat_id})
             st.rerun()
         
         elif option == "Rename":
@@ -4,6 +4,6 @@ import sys
 if "mnt" in os.getcwd():
     os.chdir("/mount/src/linkedin-chatbot-job-mnt-team/")
     sys.path.append("/mount/src/linkedin-chatbot-job-mnt-team/")
-from streamlit_app.db.db_connection import Database
+from streamlit_app.db.mongo_client import get_mongo_client
 
-__all__ = ["Database"]
+__all__ = ["get_mongo_client"]
@@ -0,0 +1,43 @@
+import os
+import sys
+import streamlit as st
+from pymongo import MongoClient
+# Check if running on Streamlit Cloud
+if "mnt" in os.getcwd():
+    os.chdir("/mount/src/linkedin-chatbot-job-mnt-team/")
+    sys.path.append("/mount/src/linkedin-chatbot-job-mnt-team/")
+
+# import external file
+from streamlit_app.utils.config import Config
+from streamlit_app.utils.logger import logger
+
+# Variables
+config = Config().get_config()
+db_uri = config["db_uri"]
+mongo_max_pool_size = config["mongo_max_pool_size"]
+mongo_min_pool_size = config["mongo_min_pool_size"]
+mongo_server_selection_timeout_ms = config["mongo_server_selection_timeout_ms"]
+
+@st.cache_resource(show_spinner=False)
+def get_mongo_client(uri: str = db_uri) -> MongoClient:
+    """
+    Return the MongoClient shared by every session and rerun of the process
+
+    The client is never replaced: pymongo monitors the servers in the
+    background and reconnects its pool by itself after an outage, and the
+    DBHandlers and the write-behind queue keep using the same client.
+
+    Args:
+        uri (str): MongoDB connection string
+
+    Returns:
+        MongoClient: Client with its connection pool, created once per uri
+    """
+    logger.info("Creating MongoDB client")
+    client = MongoClient(
+        uri,
+        maxPoolSize=mongo_max_pool_size,
+        minPoolSize=mongo_min_pool_size,
+        serverSelectionTimeoutMS=mongo_server_selection_timeout_ms
+    )
+    return client
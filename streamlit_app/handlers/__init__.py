@@ -4,6 +4,7 @@ import sys
 if "mnt" in os.getcwd():
     os.chdir("/mount/src/linkedin-chatbot-job-mnt-team/")
     sys.path.append("/mount/src/linkedin-chatbot-job-mnt-team/")
+from streamlit_app.handlers.chat_engine import ChatEngine, get_chat_engine
 from streamlit_app.handlers.chat_handler import ChatHandler
 from streamlit_app.handlers.db_handler import DBHandler
 from streamlit_app.handlers.session_handler import SessionHandler
@@ -13,6 +14,8 @@ from streamlit_app.handlers.chat_modules.retriever_handler import RetrieverHandl
 from streamlit_app.handlers.chat_modules.response_formatter import ResponseFormatter
 
 __all__ = [
+    "ChatEngine",
+    "get_chat_engine",
     "ChatHandler",
     "DBHandler",
     "SessionHandler",
@@ -0,0 +1,264 @@
+# import necessary library
+import os
+import sys
+import tiktoken
+import threading
+import streamlit as st
+from typing import Any, List, Optional
+from langchain_groq import ChatGroq
+# Check if running on Streamlit Cloud
+if "mnt" in os.getcwd():
+    os.chdir("/mount/src/linkedin-chatbot-job-mnt-team/")
+    sys.path.append("/mount/src/linkedin-chatbot-job-mnt-team/")
+
+# import external file
+from streamlit_app.utils.config import Config
+from streamlit_app.utils.logger import logger
+from streamlit_app.handlers.chat_modules.vector_db_handler import VectorDBHandler
+from streamlit_app.handlers.chat_modules.retriever_handler import RetrieverHandler
+from streamlit_app.handlers.chat_modules.hybrid_retriever import HybridRetriever
+from streamlit_app.handlers.chat_modules.index_watcher import IndexWatcher
+from streamlit_app.handlers.chat_modules.query_cache import QueryCache, QueryEmbeddingCache
+from streamlit_app.handlers.chat_modules.qa_chain import build_qa_chain
+
+# Initialize configuration
+config = Config().get_config()
+api_key = st.secrets["GROQ_API_KEY"]
+
+# Variables
+temperature_var = config["temperature"]
+model_name_var = config["model_name"]
+max_tokens_var = int(config["max_tokens"])
+defaul_model_token = config["defaul_model_token"]
+model_name_vectordb = config["model_name_vectordb"]
+cache_folder = config["cache_folder"]
+index_poll_interval = config["index_poll_interval"]
+query_cache_size = config["query_cache_size"]
+query_cache_ttl = config["query_cache_ttl"]
+query_cache_similarity = config["query_cache_similarity"]
+stream_tokens = config["stream_tokens"]
+os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"
+os.environ["HF_HUB_DISABLE_SYMLINKS_WARNING"] = "1"
+
+class ChatEngine:
+    """
+    Process-level chatbot engine, shared read-only by every session
+
+    Holds the LLM client, tiktoken encoding, embeddings, FAISS index,
+    hybrid retriever, QA chain, query cache and index watcher.
+    It is loaded once in a background thread started with the server's first
+    script run; sessions only keep their conversation state.
+
+    Args:
+        model_name: Groq model answering questions
+        temperature: sampling temperature of the model
+    """
+    def __init__(self, model_name: str = model_name_var, temperature: float = temperature_var):
+        self.llm = ChatGroq(api_key=api_key, model_name=model_name, temperature=temperature, max_tokens=max_tokens_var, streaming=stream_tokens)
+        self.max_tokens = max_tokens_var
+        self.encoding = tiktoken.get_encoding(defaul_model_token)
+        self.vector_db_handler = VectorDBHandler(model_name_vectordb, cache_folder)
+        self.retriever_handler = RetrieverHandler(self.encoding)
+        self.query_cache = QueryCache(query_cache_size, query_cache_ttl, query_cache_similarity) if query_cache_size else None
+
+        self.embeddings = None
+        self.index_watcher = None
+        self.is_ready = False
+        self.initialization_error = None
+        # (vector_db, retriever, version) serving queries, replaced in one assignment
+        self._serving = (None, None, None)
+        self._qa_chain = None
+        self._qa_chain_retriever = None
+        self._lock = threading.Lock()
+        self._init_thread = None
+
+    @property
+    def vector_db(self):
+        """Vector database serving queries"""
+        return self._serving[0]
+
+    @property
+    def retriever(self):
+        """Retriever of the vector database serving queries"""
+        return self._serving[1]
+
+    @property
+    def index_version(self) -> Optional[str]:
+        """Version of the published index serving queries"""
+        return self._serving[2]
+
+    def start(self) -> None:
+        """Start loading in the background, again only if a previous attempt failed"""
+        with self._lock:
+            if self.is_ready or (self._init_thread is not None and self._init_thread.is_alive()):
+                return
+            self.initialization_error = None
+            self._init_thread = threading.Thread(target=self._initialize, name="chat-engine-init", daemon=True)
+            self._init_thread.start()
+
+    def swap_index(self, vector_db, retriever, version: Optional[str]) -> None:
+        """
+        Replace the index and its retriever used for new queries
+
+        Args:
+            vector_db: The new FAISS vector database
+            retriever: Retriever of the new vector database
+            version: Version id of the new index
+        """
+        self._serving = (vector_db, retriever, version)
+
+    def _initialize(self) -> None:
+        """Load embeddings, vector database and retriever, then watch for new indexes"""
+        try:
+            # Load embeddings
+            if self.embeddings is None:
+                logger.info("Loading embeddings model...")
+                # Shared with every loaded index, a query embedded for the query cache is not embedded again by FAISS
+                self.embeddings = QueryEmbeddingCache(self.vector_db_handler.load_embeddings())
+                logger.info("Embeddings loaded successfully!")
+
+            # Download vector database files from S3, checked against the published manifest
+            if self.vector_db is None:
+                logger.info("Downloading vector database from S3...")
+                manifest = self.vector_db_handler.fetch_manifest()
+                vector_db = self.vector_db_handler.download_and_load_vector_db(manifest, embeddings=self.embeddings)
+                if vector_db is None:
+                    logger.warning("WARNING: Vector database is None after downloading!")
+                    logger.warning("Continuing without vector database - chat functionality will be limited")
+                    retriever = None
+                else:
+                    logger.info("Vector database downloaded successfully!")
+                    logger.info("Setting up retriever...")
+                    retriever = self.retriever_handler.set_up_retriever(vector_db)
+                    logger.info("Retriever setup complete!")
+                self.swap_index(vector_db, retriever, self.vector_db_handler.loaded_version)
+
+            # Pick up new nightly indexes without restarting
+            if index_poll_interval and self.index_watcher is None:
+                self.index_watcher = IndexWatcher(
+                    self.vector_db_handler,
+                    self.retriever_handler,
+                    on_swap=self.swap_index,
+                    interval=index_poll_interval,
+                    current_version=self.index_version,
+                    embeddings=self.embeddings
+                )
+                self.index_watcher.start()
+
+            # Ready even without vector database, the LLM answers directly
+            logger.info(f"Chat engine ready. vector_db: {self.vector_db is not None}, retriever: {self.retriever is not None}, version: {self.index_version}")
+            self.is_ready = True
+        except Exception as e:
+            logger.error(f"Error during chat engine initialization: {e}")
+            self.initialization_error = str(e)
+
+    def embed_query(self, query: str):
+        """
+        Embed a query for semantic cache matching, the FAISS search of the query reuses it
+
+        Args:
+            query: The user's query
+
+        Returns:
+            list: The embedding, or None when semantic matching is off or fails
+        """
+        if self.query_cache is None or not query_cache_similarity or self.embeddings is None:
+            return None
+        try:
+            return self.embeddings.embed_query(query)
+        except Exception as e:
+            logger.warning(f"Could not embed query for the query cache: {e}")
+            return None
+
+    def get_qa_chain(self, retriever):
+        """
+        Return the QA chain of a retriever, built again only when the retriever changed
+
+        Args:
+            retriever: Retriever of the index serving queries
+
+        Returns:
+            RetrievalQA: The QA chain
+        """
+        with self._lock:
+            if self._qa_chain is None or self._qa_chain_retriever is not retriever:
+                self._qa_chain = build_qa_chain(self.llm, retriever)
+                self._qa_chain_retriever = retriever
+            return self._qa_chain
+
+    def answer(self, query: str, callbacks: List[Any]) -> str:
+        """
+        Answer a query from the retrieved job documents
+
+        Args:
+            query: The user's query to answer
+            callbacks: Callback handlers of this query (token streaming, trace)
+
+        Returns:
+            str: The response generated by the LLM.
+        """
+        # Use one consistent index for the whole query, even if a new one is swapped in
+        vector_db, retriever, version = self._serving
+        if not vector_db or not retriever:
+            logger.warning("Vector database or retriever not available, using direct LLM response")
+            # If vector database is not available, use the LLM directly
+            response = self.llm.invoke(query, config={"callbacks": callbacks})
+            return response.content
+
+        # Reuse the answer of the same or a near-duplicate query, embedding only when the exact lookup misses
+        query_embedding = None
+        if self.query_cache is not None:
+            cached = self.query_cache.get_exact(query, version)
+            if cached is None:
+                query_embedding = self.embed_query(query)
+                cached = self.query_cache.get_similar(version, query_embedding)
+            if cached is not None:
+                logger.info(f"Answer served from query cache: {self.query_cache.stats()}")
+                return cached
+
+        # Log retriever type for debugging
+        if isinstance(getattr(retriever, "base_retriever", retriever), HybridRetriever):
+            logger.info("Using hybrid retriever (BM25 + Vector)")
+        else:
+            logger.warning("Using standard vector retriever")
+
+        qa_chain = self.get_qa_chain(retriever)
+
+        # Run query with full response
+        logger.info("Running hybrid search query...")
+        result = qa_chain.invoke({"query": query}, config={"callbacks": callbacks})
+        try:
+            answer = result["result"]
+            logger.info(f"Successfully retrieved answer with {len(result.get('source_documents', []))} source documents")
+            # Log the source documents for debugging
+            if "source_documents" in result and result["source_documents"]:
+                for i, doc in enumerate(result["source_documents"][:2]):  # Show first 2 docs
+                    preview = doc.page_content[:100] + "..." if len(doc.page_content) > 100 else doc.page_content
+                    print(f"Source document {i+1}: {preview}")
+        except KeyError:
+            logger.warning("KeyError in qa_chain.invoke result - checking alternative keys")
+            # Some versions of LangChain use different keys
+            if "answer" in result:
+                return result["answer"]
+            elif "output_text" in result:
+                return result["output_text"]
+            logger.warning(f"Available keys in result: {list(result.keys())}")
+            raise ValueError("Could not find result key in QA response")
+
+        logger.info("QNA runs successfully")
+        if self.query_cache is not None and answer:
+            self.query_cache.put(query, answer, version, query_embedding)
+        return answer
+
+@st.cache_resource(show_spinner=False)
+def get_chat_engine() -> ChatEngine:
+    """
+    Return the chat engine of the process, loading starts on first call
+
+    Returns:
+        ChatEngine: The engine shared by every session
+    """
+    logger.info("Creating chat engine")
+    engine = ChatEngine()
+    engine.start()
+    return engine
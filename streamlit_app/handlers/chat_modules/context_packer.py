@@ -0,0 +1,116 @@
+import os
+import re
+import sys
+import threading
+from typing import Any, Dict, List, Sequence, Tuple
+if "mnt" in os.getcwd():
+    os.chdir("/mount/src/linkedin-chatbot-job-mnt-team/")
+    sys.path.append("/mount/src/linkedin-chatbot-job-mnt-team/")
+from streamlit_app.utils.logger import logger
+from streamlit_app.utils.utils_chat import count_tokens
+from streamlit_app.handlers.chat_modules.reranker import content_hash
+from pydantic import ConfigDict, PrivateAttr
+from langchain_core.documents import Document
+from langchain_core.callbacks import Callbacks
+from langchain_core.callbacks.manager import dispatch_custom_event
+from langchain_core.documents.compressor import BaseDocumentCompressor
+
+# End of a sentence or of a line, where a truncated chunk may stop
+SENTENCE_END = re.compile(r"[.!?](?=\s)|\n")
+
+def truncate_at_sentence(encoding: Any, text: str, max_tokens: int) -> str:
+    """
+    Cut text to at most max_tokens tokens, at the last sentence or line end
+
+    Args:
+        encoding: tiktoken encoding
+        text: Text to cut
+        max_tokens: Token limit
+
+    Returns:
+        str: The cut text, empty when no sentence ends within the limit
+    """
+    prefix = encoding.decode(encoding.encode(text)[:max_tokens])
+    ends = [match.end() for match in SENTENCE_END.finditer(prefix)]
+    return prefix[:ends[-1]].rstrip() if ends else ""
+
+class ContextPacker(BaseDocumentCompressor):
+    """
+    Fit the retrieved documents into a token budget before they are stuffed into the prompt
+
+    Documents are added whole in rank order while they fit; the first one
+    that does not is truncated at a sentence boundary to fill the rest of the
+    budget, and the following ones are dropped. Token counts are cached per
+    content hash. The tokens used are logged and sent to the callbacks as a
+    "context_packing" event.
+
+    Args:
+        encoding: tiktoken encoding of the model
+        budget: tokens of context allowed in the prompt
+        min_tail_tokens: smallest truncated chunk worth keeping
+        cache_size: token counts kept, the cache is emptied when full
+    """
+    encoding: Any
+    budget: int = 3000
+    min_tail_tokens: int = 50
+    cache_size: int = 4096
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    _counts: Dict[str, int] = PrivateAttr(default_factory=dict)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def count(self, document: Document) -> int:
+        """Tokens of a document, counted once per content hash"""
+        key = content_hash(document)
+        tokens = self._counts.get(key)
+        if tokens is None:
+            tokens = count_tokens(self.encoding, document.page_content)
+            with self._lock:
+                if len(self._counts) >= self.cache_size:
+                    self._counts.clear()
+                self._counts[key] = tokens
+        return tokens
+
+    def pack(self, documents: Sequence[Document]) -> Tuple[List[Document], int]:
+        """
+        Greedily fill the budget with documents in rank order
+
+        Args:
+            documents: Retrieved documents, best first
+
+        Returns:
+            Tuple[List[Document], int]: The documents that fit, the last one
+                possibly truncated, and the tokens they use
+        """
+        # The stuff chain joins documents with a blank line
+        separator = count_tokens(self.encoding, "\n\n")
+        packed, used = [], 0
+        for document in documents:
+            cost = self.count(document) + (separator if packed else 0)
+            if used + cost <= self.budget:
+                packed.append(document)
+                used += cost
+                continue
+
+            remaining = self.budget - used - (separator if packed else 0)
+            if remaining >= self.min_tail_tokens:
+                text = truncate_at_sentence(self.encoding, document.page_content, remaining)
+                if text:
+                    tokens = count_tokens(self.encoding, text)
+                    packed.append(Document(
+                        page_content=text,
+                        metadata={**document.metadata, "truncated": True},
+                        id=document.id
+                    ))
+                    used += tokens + (separator if len(packed) > 1 else 0)
+            break
+        return packed, used
+
+    def compress_documents(self, documents: Sequence[Document], query: str, callbacks: Callbacks = None) -> Sequence[Document]:
+        """Return the documents fitting the budget and report the tokens used"""
+        packed, used = self.pack(documents)
+        report = {"tokens": used, "budget": self.budget, "documents": len(packed), "dropped": len(documents) - len(packed)}
+        logger.info(f"Context packed: {report}")
+        if callbacks is not None:
+            dispatch_custom_event("context_packing", report, config={"callbacks": callbacks})
+        return packed
@@ -0,0 +1,131 @@
+import os
+import sys
+import time
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional, Tuple
+if "mnt" in os.getcwd():
+    os.chdir("/mount/src/linkedin-chatbot-job-mnt-team/")
+    sys.path.append("/mount/src/linkedin-chatbot-job-mnt-team/")
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.callbacks.manager import dispatch_custom_event
+from langchain_community.vectorstores.utils import DistanceStrategy
+
+def reciprocal_rank_fusion(ranked_lists: List[List[Document]], weights: List[float], c: int = 60) -> List[Document]:
+    """
+    Fuse ranked document lists with weighted reciprocal rank fusion
+
+    Each document scores sum(weight / (c + rank)) over the lists it appears
+    in, documents are identified by their content like EnsembleRetriever.
+
+    Args:
+        ranked_lists: Documents of each branch, best first
+        weights: Weight of each branch
+        c: Rank constant, dampens the lead of the top ranks
+
+    Returns:
+        List[Document]: Unique documents, best fused score first
+    """
+    scores = {}
+    documents = {}
+    for ranked, weight in zip(ranked_lists, weights):
+        for rank, document in enumerate(ranked, start=1):
+            key = document.page_content
+            scores[key] = scores.get(key, 0.0) + weight / (c + rank)
+            documents.setdefault(key, document)
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+class HybridRetriever(BaseRetriever):
+    """
+    Keyword (BM25) and semantic (FAISS) retriever running both branches at once
+
+    The semantic branch (query embedding and FAISS search) runs on the
+    executor while the keyword branch scores in the calling thread, so
+    retrieval takes max(branch) instead of sum(branches). Results are fused
+    with weighted reciprocal rank fusion. With a planner, each branch keeps
+    a candidate pool sized for the query and, with dedupe_jobs, fused chunks
+    are deduplicated by job url.
+
+    Args:
+        keyword_retriever: KeywordRetriever over the same documents
+        vector_db: FAISS vector database
+        executor: Thread pool running the semantic branch
+        k: number of documents of the semantic branch, without planner
+        weight_semantic: weight of the semantic branch, the keyword branch gets the rest
+        c: rank constant of the fusion
+        planner: RetrievalPlanner sizing the candidate pools, None for fixed k
+        dedupe_jobs: keep one chunk per job url, off when a JobAggregator groups chunks later
+    """
+    keyword_retriever: Any
+    vector_db: Any
+    executor: Executor
+    k: int = 3
+    weight_semantic: float = 0.7
+    c: int = 60
+    planner: Optional[Any] = None
+    dedupe_jobs: bool = True
+
+    def _semantic_search(self, query: str, k: int) -> Tuple[List[Document], List[float]]:
+        """Embed the query and search FAISS, scores are higher for closer documents"""
+        pairs = self.vector_db.similarity_search_with_score(query, k=k)
+        # Inner product scores grow with similarity, distances shrink
+        sign = 1.0 if self.vector_db.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT else -1.0
+        return [document for document, _ in pairs], [sign * float(score) for _, score in pairs]
+
+    def search(self, query: str) -> Tuple[List[Document], Dict[str, float]]:
+        """
+        Run both branches concurrently and fuse their results
+
+        Args:
+            query: The user's query
+
+        Returns:
+            Tuple[List[Document], Dict[str, float]]: Fused documents, the
+                duration in ms of each branch, the fusion and the whole search,
+                and the candidate pool sizes
+        """
+        start = time.perf_counter()
+        if self.planner is not None:
+            keyword_k = semantic_k = self.planner.max_k
+        else:
+            keyword_k, semantic_k = self.keyword_retriever.k, self.k
+        semantic = self.executor.submit(self._timed, self._semantic_search, query, semantic_k)
+        (keyword_documents, keyword_scores), keyword_ms = self._timed(self.keyword_retriever.search_with_scores, query, keyword_k)
+        (semantic_documents, semantic_scores), semantic_ms = semantic.result()
+
+        fusion_start = time.perf_counter()
+        if self.planner is not None:
+            keyword_documents = keyword_documents[:self.planner.pool_size(query, keyword_scores)]
+            semantic_documents = semantic_documents[:self.planner.pool_size(query, semantic_scores)]
+        documents = reciprocal_rank_fusion(
+            [keyword_documents, semantic_documents],
+            [1 - self.weight_semantic, self.weight_semantic],
+            self.c
+        )
+        if self.planner is not None and self.dedupe_jobs:
+            documents = self.planner.dedupe_by_job(documents)
+        end = time.perf_counter()
+        timings = {
+            "keyword_ms": keyword_ms,
+            "semantic_ms": semantic_ms,
+            "fusion_ms": round((end - fusion_start) * 1000, 2),
+            "total_ms": round((end - start) * 1000, 2),
+            "keyword_pool": len(keyword_documents),
+            "semantic_pool": len(semantic_documents),
+            "candidates": len(documents),
+        }
+        return documents, timings
+
+    @staticmethod
+    def _timed(function, *args, **kwargs) -> Tuple[Any, float]:
+        """Call a function, return its result and duration in ms"""
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        return result, round((time.perf_counter() - start) * 1000, 2)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        """Return the fused documents, branch timings go to the callbacks as a custom event"""
+        documents, timings = self.search(query)
+        dispatch_custom_event("hybrid_retrieval", timings, config={"callbacks": run_manager.get_child()})
+        return documents
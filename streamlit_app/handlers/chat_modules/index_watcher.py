@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import threading
+from typing import Any, Callable, Optional
+if "mnt" in os.getcwd():
+    os.chdir("/mount/src/linkedin-chatbot-job-mnt-team/")
+    sys.path.append("/mount/src/linkedin-chatbot-job-mnt-team/")
+from streamlit_app.utils.logger import logger
+
+class IndexWatcher:
+    """
+    Poll the manifest published by rag.py and hot-swap the index
+
+    A new version is synced and loaded beside the one serving queries, its
+    retriever is built, then on_swap replaces the old one in a single step.
+
+    Args:
+        vector_db_handler: downloads, verifies and loads index versions
+        retriever_handler: builds the retriever of a loaded index
+        on_swap: called with (vector_db, retriever, version) once a version is ready
+        interval: seconds between two polls
+        current_version: version serving queries at start
+        embeddings: embedding model shared by every loaded version, None to load one per version
+    """
+    def __init__(self, vector_db_handler: Any, retriever_handler: Any, on_swap: Callable, interval: int, current_version: Optional[str] = None, embeddings: Any = None):
+        self.vector_db_handler = vector_db_handler
+        self.retriever_handler = retriever_handler
+        self.on_swap = on_swap
+        self.interval = interval
+        self.current_version = current_version
+        self.embeddings = embeddings
+        self._thread = None
+
+    def start(self) -> None:
+        """Start polling in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="index-watcher", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        """Poll forever, a failed check is retried at the next interval"""
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check_now()
+            except Exception as e:
+                logger.error(f"Error while checking for a new index version: {e}")
+
+    def check_now(self) -> bool:
+        """
+        Load and swap in the published index if it is newer
+
+        Returns:
+            bool: True if a new version was swapped in
+        """
+        manifest = self.vector_db_handler.fetch_manifest()
+        if manifest is None or manifest["version"] == self.current_version:
+            return False
+
+        params = manifest.get("params", {})
+        if params.get("model_name") not in (None, self.vector_db_handler.model_name):
+            logger.error(f"Index version {manifest['version']} uses embedding model {params['model_name']}, restart the app to load it")
+            return False
+
+        logger.info(f"New index version {manifest['version']} found, loading it...")
+        vector_db = self.vector_db_handler.download_and_load_vector_db(manifest, require_verified=True, embeddings=self.embeddings)
+        if vector_db is None:
+            logger.warning(f"Index version {manifest['version']} is not ready yet, retrying later")
+            return False
+
+        retriever = self.retriever_handler.set_up_retriever(vector_db)
+        self.on_swap(vector_db, retriever, manifest["version"])
+        self.current_version = manifest["version"]
+        logger.info(f"Swapped to index version {manifest['version']}")
+        return True
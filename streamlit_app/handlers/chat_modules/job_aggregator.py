@@ -0,0 +1,84 @@
+import os
+import re
+import sys
+from typing import Dict, List, Sequence
+if "mnt" in os.getcwd():
+    os.chdir("/mount/src/linkedin-chatbot-job-mnt-team/")
+    sys.path.append("/mount/src/linkedin-chatbot-job-mnt-team/")
+from langchain_core.documents import Document
+from langchain_core.callbacks import Callbacks
+from langchain_core.documents.compressor import BaseDocumentCompressor
+
+# Header lines written by iter_documents() at the start of every posting
+HEADER_LINE = re.compile(r"^\s*(?:Job Title|Company Name|Job Location|Url to detail job in Linkedin):.*$", re.MULTILINE)
+BLANK_LINES = re.compile(r"\n\s*\n+")
+
+# Metadata fields stated once per job, in this order
+HEADER_FIELDS = (
+    ("job_title", "Job Title"),
+    ("company_name", "Company Name"),
+    ("job_location", "Job Location"),
+    ("job_url", "Url to detail job in Linkedin"),
+)
+
+def job_header(metadata: Dict) -> str:
+    """Header lines of a job from its chunk metadata"""
+    return "\n".join(f"{label}: {metadata[field]}" for field, label in HEADER_FIELDS if metadata.get(field) is not None)
+
+def strip_header(text: str) -> str:
+    """Remove the header lines of a chunk, they are stated once in the job header"""
+    return BLANK_LINES.sub("\n", HEADER_LINE.sub("", text)).strip()
+
+class JobAggregator(BaseDocumentCompressor):
+    """
+    Collapse retrieved chunks into one compact context document per job
+
+    Chunks are grouped by metadata["job_url"]. A job scores the sum of
+    1 / (c + rank) over its chunks, in the order they arrive (reranked or
+    fused), so jobs matching in several chunks move up. Each job becomes its
+    header fields once plus its best ranked chunk, header lines removed.
+    Chunks without job url are kept as they are.
+
+    Args:
+        max_jobs: number of jobs kept, best score first
+        c: rank constant of the job score
+    """
+    max_jobs: int = 5
+    c: int = 60
+
+    def aggregate(self, documents: Sequence[Document]) -> List[Document]:
+        """
+        Group chunks by job and build the context document of the best jobs
+
+        Args:
+            documents: Retrieved chunks, best first
+
+        Returns:
+            List[Document]: One document per job, best job first
+        """
+        jobs = {}
+        for rank, document in enumerate(documents, start=1):
+            key = document.metadata.get("job_url") or f"chunk:{rank}"
+            job = jobs.get(key)
+            if job is None:
+                # First chunk of a job is its best ranked one
+                jobs[key] = job = {"best": document, "score": 0.0, "chunks": 0}
+            job["score"] += 1 / (self.c + rank)
+            job["chunks"] += 1
+
+        ranked = sorted(jobs.values(), key=lambda job: job["score"], reverse=True)[:self.max_jobs]
+        aggregated = []
+        for job in ranked:
+            best = job["best"]
+            header = job_header(best.metadata) if best.metadata.get("job_url") else ""
+            content = f"{header}\n{strip_header(best.page_content)}" if header else best.page_content
+            aggregated.append(Document(
+                page_content=content,
+                metadata={**best.metadata, "job_score": job["score"], "job_chunks": job["chunks"]},
+                id=best.id
+            ))
+        return aggregated
+
+    def compress_documents(self, documents: Sequence[Document], query: str, callbacks: Callbacks = None) -> Sequence[Document]:
+        """Return one compact document per job"""
+        return self.aggregate(documents)
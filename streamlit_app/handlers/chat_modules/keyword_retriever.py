@@ -0,0 +1,35 @@
+import os
+import sys
+from typing import Any, List, Tuple
+if "mnt" in os.getcwd():
+    os.chdir("/mount/src/linkedin-chatbot-job-mnt-team/")
+    sys.path.append("/mount/src/linkedin-chatbot-job-mnt-team/")
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+
+class KeywordRetriever(BaseRetriever):
+    """
+    Keyword (BM25) retriever backed by a KeywordIndex
+
+    Args:
+        index: KeywordIndex whose document ids are positions in the FAISS index
+        vector_db: FAISS vector database holding the documents
+        k: number of documents to return
+    """
+    index: Any
+    vector_db: Any
+    k: int = 5
+
+    def search_with_scores(self, query: str, k: int) -> Tuple[List[Document], List[float]]:
+        """Return the k best keyword matches of the query and their BM25 scores"""
+        positions, scores = self.index.search(query, k)
+        documents = [
+            self.vector_db.docstore.search(self.vector_db.index_to_docstore_id[int(position)])
+            for position in positions
+        ]
+        return documents, [float(score) for score in scores]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        """Return the k best keyword matches of the query"""
+        return self.search_with_scores(query, self.k)[0]
@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+import json
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+if "mnt" in os.getcwd():
+    os.chdir("/mount/src/linkedin-chatbot-job-mnt-team/")
+    sys.path.append("/mount/src/linkedin-chatbot-job-mnt-team/")
+from streamlit_app.utils.logger import logger
+from langchain.chains import RetrievalQA
+from langchain.prompts import PromptTemplate
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Prompt that emphasizes using the retrieved context
+QA_TEMPLATE = """You're assistant about job dataset from Linkedin, if user ask question not in job data, just answer "I don't know
+
+            Instruction:
+            - pick one of the most meaningful information from details in this job
+            - show 5 results, each with: company_name, url, job_title, job_location, job_role
+            - show best match first, then rest
+            - if possible, let make it better format
+
+            {context}
+
+            Question: {question}
+            Answer:"""
+
+QA_PROMPT = PromptTemplate(
+    template=QA_TEMPLATE,
+    input_variables=["context", "question"]
+)
+
+def build_qa_chain(llm: Any, retriever: Any) -> RetrievalQA:
+    """
+    Build the question answering chain over a retriever
+
+    Args:
+        llm: The chat model answering questions
+        retriever: Retriever providing the job context
+
+    Returns:
+        RetrievalQA: The chain, reusable for every query
+    """
+    return RetrievalQA.from_chain_type(
+        llm=llm,
+        chain_type="stuff",
+        retriever=retriever,
+        chain_type_kwargs={"prompt": QA_PROMPT},
+        verbose=False
+    )
+
+class QATraceHandler(BaseCallbackHandler):
+    """
+    Structured trace of a QA chain run, replaces verbose console output
+
+    Logs one JSON line per retriever, LLM and chain step with its duration
+    and size (documents, prompt and answer characters), never the full context,
+    plus the branch timings of the hybrid retriever and the context tokens used.
+    """
+    def __init__(self):
+        self._started = {}
+
+    def _start(self, run_id: UUID) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def _end(self, run_id: UUID, step: str, **fields) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            fields["ms"] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"qa_trace {json.dumps({'step': step, **fields}, default=str)}")
+
+    def on_chain_start(self, serialized: Optional[Dict[str, Any]], inputs: Dict[str, Any], *, run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs) -> None:
+        if parent_run_id is None:
+            self._start(run_id)
+
+    def on_chain_end(self, outputs: Dict[str, Any], *, run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs) -> None:
+        if parent_run_id is None:
+            self._end(run_id, "chain", answer_chars=len(str(outputs.get("result", ""))))
+
+    def on_retriever_start(self, serialized: Optional[Dict[str, Any]], query: str, *, run_id: UUID, **kwargs) -> None:
+        self._start(run_id)
+
+    def on_retriever_end(self, documents: List[Any], *, run_id: UUID, **kwargs) -> None:
+        self._end(run_id, "retriever", documents=len(documents))
+
+    def on_custom_event(self, name: str, data: Any, *, run_id: UUID, **kwargs) -> None:
+        if name in ("hybrid_retrieval", "context_packing"):
+            logger.info(f"qa_trace {json.dumps({'step': name, **data}, default=str)}")
+
+    def on_llm_start(self, serialized: Optional[Dict[str, Any]], prompts: List[str], *, run_id: UUID, **kwargs) -> None:
+        self._start(run_id)
+        self._prompt_chars = sum(len(prompt) for prompt in prompts)
+
+    def on_chat_model_start(self, serialized: Optional[Dict[str, Any]], messages: List[List[Any]], *, run_id: UUID, **kwargs) -> None:
+        self._start(run_id)
+        self._prompt_chars = sum(len(str(message.content)) for batch in messages for message in batch)
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs) -> None:
+        usage = (response.llm_output or {}).get("token_usage", {})
+        self._end(run_id, "llm", prompt_chars=getattr(self, "_prompt_chars", None), **usage)
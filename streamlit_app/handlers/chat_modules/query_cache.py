@@ -0,0 +1,196 @@
+import os
+import re
+import sys
+import time
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import List, Optional
+from langchain_core.embeddings import Embeddings
+if "mnt" in os.getcwd():
+    os.chdir("/mount/src/linkedin-chatbot-job-mnt-team/")
+    sys.path.append("/mount/src/linkedin-chatbot-job-mnt-team/")
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for exact matching: lower case, single spaces, no trailing punctuation
+
+    Args:
+        query (str): The user's query
+
+    Returns:
+        str: The normalized query
+    """
+    return re.sub(r"\s+", " ", query.lower()).strip().rstrip("?!.").strip()
+
+class QueryEmbeddingCache(Embeddings):
+    """
+    Embeddings wrapper remembering the last query embeddings
+
+    The query cache embeds a query before the FAISS branch of the retriever
+    embeds it again; with both using this wrapper the model runs once per query.
+
+    Args:
+        embeddings: the underlying embedding model
+        max_entries: number of query embeddings kept
+    """
+    def __init__(self, embeddings: Embeddings, max_entries: int = 64):
+        self.embeddings = embeddings
+        self.max_entries = max_entries
+        self._vectors = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents with the underlying model"""
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, once per text among the last max_entries queries"""
+        with self._lock:
+            vector = self._vectors.get(text)
+            if vector is not None:
+                self._vectors.move_to_end(text)
+                return vector
+        vector = self.embeddings.embed_query(text)
+        with self._lock:
+            self._vectors[text] = vector
+            while len(self._vectors) > self.max_entries:
+                self._vectors.popitem(last=False)
+        return vector
+
+class QueryCache:
+    """
+    Answers of previous queries, shared by every session
+
+    A query hits when its normalized text was already answered, or when its
+    embedding is within similarity_threshold (cosine) of an answered query.
+    Entries are only valid for the index version they were answered with and
+    for ttl seconds, the least recently used entry is evicted when full.
+
+    Args:
+        max_entries: number of answers kept
+        ttl: seconds an answer stays valid, 0 for no limit
+        similarity_threshold: cosine similarity for a semantic hit, 0 to disable
+    """
+    def __init__(self, max_entries: int = 256, ttl: int = 3600, similarity_threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.version = None
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+        # normalized query -> {"answer", "embedding", "created_at"}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(embedding: Optional[List[float]]) -> Optional[np.ndarray]:
+        """Normalize an embedding so cosine similarity is a dot product"""
+        if embedding is None:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def _check_version(self, version: Optional[str]) -> None:
+        """Drop every answer when the index version changed"""
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    def _is_expired(self, entry: dict) -> bool:
+        """Check the ttl of an entry"""
+        return bool(self.ttl) and time.time() - entry["created_at"] > self.ttl
+
+    def get_exact(self, query: str, version: Optional[str]) -> Optional[str]:
+        """
+        Look up the answer of the same normalized query, no embedding needed
+
+        Args:
+            query (str): The user's query
+            version (str): Version of the index serving queries
+
+        Returns:
+            Optional[str]: The cached answer, or None when not answered yet
+        """
+        key = normalize_query(query)
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits["exact"] += 1
+            return entry["answer"]
+
+    def get_similar(self, version: Optional[str], embedding: Optional[List[float]]) -> Optional[str]:
+        """
+        Look up the answer of a near-duplicate query, after an exact miss
+
+        Args:
+            version (str): Version of the index serving queries
+            embedding (list): Embedding of the query, None counts as a miss
+
+        Returns:
+            Optional[str]: The cached answer, or None on a miss
+        """
+        vector = self._unit(embedding)
+        with self._lock:
+            self._check_version(version)
+            if vector is not None and self.similarity_threshold > 0:
+                for expired in [k for k, e in self._entries.items() if self._is_expired(e)]:
+                    del self._entries[expired]
+                keys = [k for k, e in self._entries.items() if e["embedding"] is not None and len(e["embedding"]) == len(vector)]
+                if keys:
+                    similarities = np.stack([self._entries[k]["embedding"] for k in keys]) @ vector
+                    best = int(np.argmax(similarities))
+                    if similarities[best] >= self.similarity_threshold:
+                        self._entries.move_to_end(keys[best])
+                        self.hits["semantic"] += 1
+                        return self._entries[keys[best]]["answer"]
+
+            self.misses += 1
+            return None
+
+    def get(self, query: str, version: Optional[str], embedding: Optional[List[float]] = None) -> Optional[str]:
+        """
+        Look up the answer of a query, exact match first then semantic
+
+        Args:
+            query (str): The user's query
+            version (str): Version of the index serving queries
+            embedding (list): Embedding of the query, enables semantic matching
+
+        Returns:
+            Optional[str]: The cached answer, or None on a miss
+        """
+        answer = self.get_exact(query, version)
+        if answer is None:
+            answer = self.get_similar(version, embedding)
+        return answer
+
+    def put(self, query: str, answer: str, version: Optional[str], embedding: Optional[List[float]] = None) -> None:
+        """
+        Store the answer of a query
+
+        Args:
+            query (str): The user's query
+            answer (str): The answer to reuse
+            version (str): Version of the index the answer was retrieved from
+            embedding (list): Embedding of the query
+        """
+        key = normalize_query(query)
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = {"answer": answer, "embedding": self._unit(embedding), "created_at": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Number of entries, hits and misses"""
+        with self._lock:
+            return {"entries": len(self._entries), "hits": dict(self.hits), "misses": self.misses}
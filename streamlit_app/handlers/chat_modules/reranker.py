@@ -0,0 +1,189 @@
+import os
+import sys
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+if "mnt" in os.getcwd():
+    os.chdir("/mount/src/linkedin-chatbot-job-mnt-team/")
+    sys.path.append("/mount/src/linkedin-chatbot-job-mnt-team/")
+from streamlit_app.utils.config import Config
+from streamlit_app.utils.logger import logger
+from streamlit_app.handlers.chat_modules.query_cache import normalize_query
+from pydantic import ConfigDict
+from langchain_core.documents import Document
+from langchain_core.callbacks import Callbacks
+from langchain_core.documents.compressor import BaseDocumentCompressor
+
+# Variables
+config = Config().get_config()
+reranker_name = config["reranker"]
+rerank_top_n = config["rerank_top_n"]
+cross_encoder_model = config["cross_encoder_model"]
+cross_encoder_backend = config["cross_encoder_backend"]
+cross_encoder_onnx_file = config["cross_encoder_onnx_file"]
+rerank_batch_size = config["rerank_batch_size"]
+rerank_cache_size = config["rerank_cache_size"]
+cache_folder = config["cache_folder"]
+# ONNX export of the cross-encoder that runs on any CPU
+PORTABLE_ONNX_FILE = "onnx/model.onnx"
+
+class ScoreCache:
+    """
+    Least recently used cache of reranker scores, keyed by (query hash, content hash)
+
+    Keys depend only on the texts, so scores stay valid across index swaps and
+    retrievers of an old and a new index can share the cache.
+
+    Args:
+        max_entries: number of scores kept
+    """
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[Hashable]) -> Dict[Hashable, float]:
+        """Return the cached scores of the keys found"""
+        found = {}
+        with self._lock:
+            for key in keys:
+                score = self._scores.get(key)
+                if score is not None:
+                    self._scores.move_to_end(key)
+                    found[key] = score
+        return found
+
+    def put_many(self, scores: Dict[Hashable, float]) -> None:
+        """Store scores, evicting the least recently used ones when full"""
+        with self._lock:
+            for key, score in scores.items():
+                self._scores[key] = score
+                self._scores.move_to_end(key)
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget every score"""
+        with self._lock:
+            self._scores.clear()
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+def content_hash(document: Document) -> str:
+    """Hash of the text of a chunk, unlike docstore ids it cannot be reused for other content"""
+    return hashlib.sha1(document.page_content.encode("utf-8")).hexdigest()
+
+class CrossEncoderReranker(BaseDocumentCompressor):
+    """
+    Local CPU cross-encoder reranker, an offline alternative to CohereRerank
+
+    Only (query, chunk) pairs missing from the score cache are scored, in
+    batches of batch_size. Returned documents carry their score in
+    metadata["relevance_score"] like CohereRerank.
+
+    Args:
+        model: sentence_transformers CrossEncoder, or any object with its predict()
+        top_n: number of documents to return, None for all of them
+        batch_size: pairs scored per model call
+        cache: scores of previous pairs, None to disable
+    """
+    model: Any
+    top_n: Optional[int] = 5
+    batch_size: int = 16
+    cache: Optional[ScoreCache] = None
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def score(self, query: str, documents: Sequence[Document]) -> List[float]:
+        """
+        Relevance score of every document for the query
+
+        Args:
+            query: The user's query
+            documents: Candidate chunks
+
+        Returns:
+            List[float]: One score per document, higher is more relevant
+        """
+        query_hash = hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()
+        keys = [(query_hash, content_hash(document)) for document in documents]
+        scores = self.cache.get_many(keys) if self.cache is not None else {}
+
+        missing = [i for i, key in enumerate(keys) if key not in scores]
+        if missing:
+            pairs = [(query, documents[i].page_content) for i in missing]
+            predicted = self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+            new_scores = {keys[i]: float(value) for i, value in zip(missing, predicted)}
+            if self.cache is not None:
+                self.cache.put_many(new_scores)
+            scores.update(new_scores)
+        return [scores[key] for key in keys]
+
+    def compress_documents(self, documents: Sequence[Document], query: str, callbacks: Callbacks = None) -> Sequence[Document]:
+        """Return the top_n documents ordered by cross-encoder score"""
+        if not documents:
+            return []
+        scores = self.score(query, documents)
+        ranked = sorted(zip(documents, scores), key=lambda pair: pair[1], reverse=True)[:self.top_n]
+        return [
+            Document(page_content=document.page_content, metadata={**document.metadata, "relevance_score": score}, id=document.id)
+            for document, score in ranked
+        ]
+
+def load_cross_encoder(model_name: str = cross_encoder_model, backend: str = cross_encoder_backend):
+    """
+    Load a cross-encoder model for CPU inference
+
+    With the onnx backend, a cross_encoder_onnx_file this CPU cannot run (quantized
+    models need the instruction set they were exported for) falls back to the
+    portable onnx/model.onnx, then to torch.
+
+    Args:
+        model_name: Hugging Face model of the cross-encoder
+        backend: "torch", or "onnx" for cross_encoder_onnx_file
+
+    Returns:
+        CrossEncoder: The loaded model
+    """
+    from sentence_transformers import CrossEncoder
+    kwargs = {"device": "cpu", "cache_folder": cache_folder}
+    if backend == "onnx":
+        for file_name in dict.fromkeys([cross_encoder_onnx_file, PORTABLE_ONNX_FILE]):
+            logger.info(f"Loading cross-encoder {model_name} (onnx, {file_name})")
+            try:
+                return CrossEncoder(model_name, backend="onnx", model_kwargs={"file_name": file_name}, **kwargs)
+            except Exception as e:
+                logger.warning(f"Could not load {file_name} of {model_name}: {e}")
+        backend = "torch"
+    logger.info(f"Loading cross-encoder {model_name} ({backend})")
+    return CrossEncoder(model_name, **kwargs)
+
+def build_reranker(name: str = reranker_name, top_n: Optional[int] = rerank_top_n) -> Optional[BaseDocumentCompressor]:
+    """
+    Build the reranker stage selected in the configuration
+
+    Args:
+        name: "cohere", "cross_encoder" or "none"
+        top_n: number of documents kept after reranking, None to keep them all
+
+    Returns:
+        BaseDocumentCompressor: The reranker, None for no reranking or when it cannot be built
+    """
+    try:
+        if name == "cohere":
+            from langchain.retrievers.document_compressors import CohereRerank
+            return CohereRerank(top_n=top_n)
+        if name == "cross_encoder":
+            return CrossEncoderReranker(
+                model=load_cross_encoder(),
+                top_n=top_n,
+                batch_size=rerank_batch_size,
+                cache=ScoreCache(rerank_cache_size) if rerank_cache_size else None
+            )
+        if name != "none":
+            logger.warning(f"Unknown reranker {name}, reranking disabled")
+    except Exception as e:
+        logger.error(f"Error setting up {name} reranker: {e}, reranking disabled")
+    return None
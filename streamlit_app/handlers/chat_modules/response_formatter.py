@@ -1,6 +1,6 @@
 import re
 import time
-from typing import Any
+from typing import Any, Iterator, List
 import os
 import sys
 # Check if running on Streamlit Cloud
@@ -10,11 +10,129 @@ if "mnt" in os.getcwd():
 
 from streamlit_app.utils.logger import logger
 from streamlit_app.utils.config import Config
+from langchain_core.callbacks import BaseCallbackHandler
 # from streamlit_app.helpers.processing_text import escape_for_js
 
 # Variables
 config = Config().get_config()
-time_sleep = config["time_sleep"]
+stream_fps = config["stream_fps"]
+
+# Markdown patterns, compiled once
+_NUMBER_MARK = re.compile(r'\d\.\s')
+_NUMBER_SPLIT = re.compile(r'(\d+\.\s+)')
+_COLON_LIST = re.compile(r'(.*?):\s*((?:\d+\.\s+[^0-9\.\n]+(?:\([^)]+\))?(?:\s+)?)+)', re.DOTALL)
+_INLINE_LIST = re.compile(r'\d+\.\s+\w+.*\d+\.\s+\w+')
+_BOLD = re.compile(r'\*\*(.*?)\*\*')
+_ITALIC = re.compile(r'\*(.*?)\*')
+_HEADER = re.compile(r'^(#{1,3}) (.*?)$', re.MULTILINE)
+_LIST_LINE = re.compile(r'^(?:\d+\. |- )', re.MULTILINE)
+_NUMBERED_LINE = re.compile(r'(\d+)\. (.*?)$')
+_BULLET_LINE = re.compile(r'- (.*?)$')
+_CODE_BLOCK = re.compile(r'```(\w+)?\n(.*?)```', re.DOTALL)
+_INLINE_CODE = re.compile(r'`(.*?)`')
+SPACING_BEFORE = '<div style="margin-top: 0.5rem;"></div>'
+SPACING_AFTER = '<div style="margin-bottom: 0.5rem;"></div>'
+
+class IncrementalMarkdownRenderer:
+    """
+    Render a streamed markdown answer without reprocessing what is complete
+
+    The text is cut into blocks at blank lines (outside code fences). A block
+    is converted to HTML once, when the next one starts; only the trailing,
+    unfinished block is converted again on each frame, and frames are
+    limited to fps per second.
+
+    Args:
+        formatter: ResponseFormatter converting markdown to HTML
+        placeholder: Streamlit placeholder for displaying response
+        fps: maximum placeholder updates per second, 0 for every token
+    """
+    def __init__(self, formatter: "ResponseFormatter", placeholder: Any, fps: float = stream_fps):
+        self.formatter = formatter
+        self.placeholder = placeholder
+        self.min_interval = 1 / fps if fps else 0
+        self.n_blocks = 0
+        self._done_html = ""
+        self._tail: List[str] = []
+        self._last_render = 0.0
+        self._dirty = False
+
+    def _render_block(self, block: str, first: bool) -> str:
+        """Convert one block to HTML"""
+        if first:
+            block = self.formatter.clean_response(block)
+        return self.formatter.process_markdown(block)
+
+    def _close_blocks(self) -> None:
+        """Convert the blocks of the tail that a blank line has closed"""
+        text = "".join(self._tail)
+        block_start = 0
+        cut = text.find("\n\n")
+        while cut != -1:
+            # A blank line inside an open code fence does not end the block
+            if text.count("```", block_start, cut) % 2 == 0:
+                html = self._render_block(text[block_start:cut], self.n_blocks == 0)
+                self._done_html = self._done_html + "\n\n" + html if self.n_blocks else html
+                self.n_blocks += 1
+                block_start = cut + 2
+            cut = text.find("\n\n", cut + 2)
+        self._tail = [text[block_start:]]
+
+    @property
+    def html(self) -> str:
+        """HTML of the text received so far"""
+        tail_html = self._render_block("".join(self._tail), self.n_blocks == 0)
+        return self._done_html + "\n\n" + tail_html if self.n_blocks else tail_html
+
+    def append(self, token: str) -> None:
+        """
+        Append a token without updating the placeholder
+
+        Args:
+            token (str): Next piece of the answer
+        """
+        self._tail.append(token)
+        if "\n" in token:
+            self._close_blocks()
+        self._dirty = True
+
+    def feed(self, token: str) -> None:
+        """
+        Append a token and update the placeholder if a frame is due
+
+        Args:
+            token (str): Next piece of the answer
+        """
+        self.append(token)
+        if time.perf_counter() - self._last_render >= self.min_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Show everything received so far"""
+        if self._dirty:
+            self.placeholder.markdown(self.html, unsafe_allow_html=True)
+            self._last_render = time.perf_counter()
+            self._dirty = False
+
+class TokenStreamHandler(BaseCallbackHandler):
+    """
+    Render LLM tokens into a Streamlit placeholder as they arrive
+
+    Args:
+        formatter: ResponseFormatter converting markdown to HTML
+        placeholder: Streamlit placeholder for displaying response
+    """
+    def __init__(self, formatter: "ResponseFormatter", placeholder: Any):
+        self.renderer = IncrementalMarkdownRenderer(formatter, placeholder)
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        """Append a token and show the partial response"""
+        if token:
+            self.renderer.feed(token)
+
+    def on_llm_end(self, response: Any, **kwargs) -> None:
+        """Show the last frame"""
+        self.renderer.flush()
 
 class ResponseFormatter:
     """
@@ -22,14 +140,44 @@ class ResponseFormatter:
     and styling for better presentation in Streamlit.
     """
     
-    def __init__(self, time_sleep: float = time_sleep):
+    def __init__(self):
         """
         Initialize the ResponseFormatter
-        
+        """
+        pass
+
+    @staticmethod
+    def clean_response(response: str) -> str:
+        """Remove a leading "markdown" prefix the model sometimes adds"""
+        if response.lstrip().lower().startswith("markdown"):
+            return response.lstrip()[len("markdown"):].lstrip(": ")
+        return response
+
+    def render_markdown(self, response: str) -> str:
+        """
+        Convert a complete response to HTML block by block, as it is shown while streaming
+
+        Args:
+            response (str): Response text
+
+        Returns:
+            str: The HTML
+        """
+        renderer = IncrementalMarkdownRenderer(self, placeholder=None, fps=0)
+        renderer.append(response)
+        return renderer.html
+
+    def token_stream(self, placeholder: Any) -> TokenStreamHandler:
+        """
+        Create the callback handler streaming LLM tokens into a placeholder
+
         Args:
-            time_sleep: Time to sleep between words when streaming response
+            placeholder: Streamlit placeholder for displaying response
+
+        Returns:
+            TokenStreamHandler: Callback handler to pass to the chain
         """
-        self.time_sleep = time_sleep
+        return TokenStreamHandler(self, placeholder)
     
     def escape_for_js(self, text):
         """Escape text for safe use in JavaScript strings"""
@@ -49,10 +197,13 @@ class ResponseFormatter:
     
     def stream_response(self, response: str, placeholder: Any):
         """
-        Stream the response with typing effect and proper Markdown formatting
+        Display the complete response with proper Markdown formatting
+
+        Tokens are already shown while the LLM generates them (see token_stream),
+        this renders the final text once.
         
         Args:
-            response (str): Response text to stream
+            response (str): Response text to display
             placeholder: Streamlit placeholder for displaying response
         """
         try:
@@ -60,23 +211,7 @@ class ResponseFormatter:
                 placeholder.markdown("No response generated.")
                 return
             
-            # Clean up any "markdown" prefix if present
-            if response.lstrip().lower().startswith("markdown"):
-                response = response.lstrip()[len("markdown"):].lstrip(": ")
-            
-            full_response = ""
-            # Stream by words for smoother effect
-            words = response.split()
-            for i, word in enumerate(words):
-                full_response += word + " "
-                # Apply markdown processing and update display
-                formatted_html = self.process_markdown(full_response)
-                placeholder.markdown(formatted_html, unsafe_allow_html=True)
-                time.sleep(self.time_sleep)
-            
-            # Final display with complete response
-            formatted_html = self.process_markdown(full_response)
-            placeholder.markdown(formatted_html, unsafe_allow_html=True)
+            placeholder.markdown(self.render_markdown(response), unsafe_allow_html=True)
             
             logger.info("Response formatted and displayed successfully")
         except Exception as e:
@@ -89,155 +224,111 @@ class ResponseFormatter:
             except:
                 pass
     
-    def process_markdown(self, text):
-        """Process markdown syntax to HTML for better rendering"""
-        colon_list_match = re.search(r'(.*?):\s*((?:\d+\.\s+[^0-9\.\n]+(?:\([^)]+\))?(?:\s+)?)+)', text, re.DOTALL)
-        if colon_list_match:
-            prefix = colon_list_match.group(1)
-            list_text = colon_list_match.group(2)
-            
-            # Split the list portion by numbers
-            parts = re.split(r'(\d+\.\s+)', list_text)
-            if len(parts) > 2:  # At least one number detected
-                # Build the list items
-                num_parts = []
-                for i in range(1, len(parts), 2):
-                    if i+1 < len(parts):
-                        num_parts.append(parts[i] + parts[i+1].strip())
-                
-                # If we have multiple items, format as a proper list
-                if len(num_parts) > 1:
-                    # Replace with prefix followed by properly formatted list
-                    text = prefix + ":\n\n" + "\n".join(num_parts)
-        
-        # Also check for general inline list patterns without a colon
-        elif re.search(r'\d+\.\s+\w+.*\d+\.\s+\w+', text):
-            # This might be an inline list, let's process it
-            parts = re.split(r'(\d+\.\s+)', text)
-            if len(parts) > 2:  # At least one number detected
-                # Determine if this is likely a list by checking if multiple numbered items exist
-                num_parts = []
-                for i in range(1, len(parts), 2):
-                    if i+1 < len(parts):
-                        num_parts.append(parts[i] + parts[i+1].strip())
-                
-                # If we have multiple numbered items, convert to proper list format
-                if len(num_parts) > 1:
-                    # Replace the original text with properly formatted list items
-                    text = "\n".join(num_parts)
-        
-        # Bold text
-        text = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', text)
-        
-        # Italic text 
-        text = re.sub(r'\*(.*?)\*', r'<em>\1</em>', text)
-        
-        # Headers
-        text = re.sub(r'^# (.*?)$', r'<h1>\1</h1>', text, flags=re.MULTILINE)
-        text = re.sub(r'^## (.*?)$', r'<h2>\1</h2>', text, flags=re.MULTILINE)
-        text = re.sub(r'^### (.*?)$', r'<h3>\1</h3>', text, flags=re.MULTILINE)
-        
-        # Process numbered lists with a more robust approach
-        # First identify consecutive numbered list items
-        lines = text.split('\n')
+    @staticmethod
+    def _split_numbered(text: str) -> List[str]:
+        """Split text at "1. " style numbers into "number. content" items"""
+        parts = _NUMBER_SPLIT.split(text)
+        return [parts[i] + parts[i + 1].strip() for i in range(1, len(parts) - 1, 2)]
+
+    @staticmethod
+    def _numbered_lines(lines: List[str]) -> Iterator[str]:
+        """Wrap consecutive "1. " lines in <ol>, yielding output lines"""
         in_numbered_list = False
-        processed_lines = []
-        
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            # Check if this is a numbered list item
-            numbered_match = re.match(r'^(\d+)\. (.*?)$', line)
-            
+        previous = None
+        for line in lines:
+            numbered_match = _NUMBERED_LINE.match(line)
             if numbered_match:
                 # If we're not already in a numbered list, start one
                 if not in_numbered_list:
                     # Add spacing before the list if it follows a paragraph
-                    if processed_lines and not processed_lines[-1].strip() == '':
-                        processed_lines.append('<div style="margin-top: 0.5rem;"></div>')
-                    processed_lines.append('<ol>')
+                    if previous is not None and previous.strip() != "":
+                        yield SPACING_BEFORE
+                    yield "<ol>"
                     in_numbered_list = True
-                
-                # Extract the number and content
-                number = numbered_match.group(1)
-                content = numbered_match.group(2)
-                
-                # Add the list item with bold number
-                processed_lines.append(f'<li><strong>{number}.</strong> {content}</li>')
+                previous = f"<li><strong>{numbered_match.group(1)}.</strong> {numbered_match.group(2)}</li>"
             else:
                 # If we were in a numbered list, close it
                 if in_numbered_list:
-                    processed_lines.append('</ol>')
+                    yield "</ol>"
                     # Add spacing after the list if it's followed by text
-                    if line.strip() != '':
-                        processed_lines.append('<div style="margin-bottom: 0.5rem;"></div>')
+                    if line.strip() != "":
+                        yield SPACING_AFTER
                     in_numbered_list = False
-                
-                # Add the regular line
-                processed_lines.append(line)
-            
-            i += 1
-        
+                previous = line
+            yield previous
+
         # Close any open list
         if in_numbered_list:
-            processed_lines.append('</ol>')
-        
-        # Join back to text
-        text = '\n'.join(processed_lines)
-        
-        # Bullet lists with improved formatting
-        bullet_pattern = r'^- (.*?)$'
-        
-        # Process bullet lists similar to numbered lists
-        lines = text.split('\n')
-        in_bullet_list = False
+            yield "</ol>"
+
+    def _convert_lists(self, text: str) -> str:
+        """
+        Wrap consecutive "1. " lines in <ol> and "- " lines in <ul>, in one scan
+
+        Lines output by the numbered list pass feed the bullet list pass as
+        they are produced.
+        """
         processed_lines = []
-        
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            bullet_match = re.match(bullet_pattern, line)
-            
+        in_bullet_list = False
+        for line in self._numbered_lines(text.split("\n")):
+            bullet_match = _BULLET_LINE.match(line)
             if bullet_match:
                 # If we're not already in a bullet list, start one
                 if not in_bullet_list:
                     # Add spacing before the list if it follows a paragraph
-                    if processed_lines and not processed_lines[-1].strip() == '':
-                        processed_lines.append('<div style="margin-top: 0.5rem;"></div>')
-                    processed_lines.append('<ul>')
+                    if processed_lines and processed_lines[-1].strip() != "":
+                        processed_lines.append(SPACING_BEFORE)
+                    processed_lines.append("<ul>")
                     in_bullet_list = True
-                
-                # Add the bullet item
-                content = bullet_match.group(1)
-                processed_lines.append(f'<li>{content}</li>')
+                processed_lines.append(f"<li>{bullet_match.group(1)}</li>")
             else:
                 # If we were in a bullet list, close it
                 if in_bullet_list:
-                    processed_lines.append('</ul>')
+                    processed_lines.append("</ul>")
                     # Add spacing after the list if it's followed by text
-                    if line.strip() != '':
-                        processed_lines.append('<div style="margin-bottom: 0.5rem;"></div>')
+                    if line.strip() != "":
+                        processed_lines.append(SPACING_AFTER)
                     in_bullet_list = False
-                
-                # Add the regular line
                 processed_lines.append(line)
-            
-            i += 1
-        
+
         # Close any open list
         if in_bullet_list:
-            processed_lines.append('</ul>')
-        
-        # Join back to text
-        text = '\n'.join(processed_lines)
-        
-        # Code blocks
-        text = re.sub(r'```(\w+)?\n(.*?)```', r'<pre><code class="language-\1">\2</code></pre>', text, flags=re.DOTALL)
-        
-        # Code blocks without language specification
-        text = re.sub(r'```\n(.*?)```', r'<pre><code>\1</code></pre>', text, flags=re.DOTALL)
-        
-        # Inline code
-        text = re.sub(r'`(.*?)`', r'<code>\1</code>', text)
-        
-        return text
\ No newline at end of file
+            processed_lines.append("</ul>")
+        return "\n".join(processed_lines)
+
+    def process_markdown(self, text):
+        """Process markdown syntax to HTML for better rendering"""
+        # Both list rewrites need a "1. " style number somewhere
+        if _NUMBER_MARK.search(text):
+            colon_list_match = _COLON_LIST.search(text)
+            if colon_list_match:
+                num_parts = self._split_numbered(colon_list_match.group(2))
+                # If we have multiple items, format as a proper list
+                if len(num_parts) > 1:
+                    text = colon_list_match.group(1) + ":\n\n" + "\n".join(num_parts)
+            # Also check for general inline list patterns without a colon
+            elif _INLINE_LIST.search(text):
+                num_parts = self._split_numbered(text)
+                if len(num_parts) > 1:
+                    text = "\n".join(num_parts)
+
+        # Bold then italic text
+        if "*" in text:
+            text = _BOLD.sub(r"<strong>\1</strong>", text)
+            text = _ITALIC.sub(r"<em>\1</em>", text)
+
+        # Headers
+        if "#" in text:
+            text = _HEADER.sub(lambda m: f"<h{len(m.group(1))}>{m.group(2)}</h{len(m.group(1))}>", text)
+
+        # Numbered and bullet lists
+        if _LIST_LINE.search(text):
+            text = self._convert_lists(text)
+
+        if "`" in text:
+            # Code blocks, with or without language
+            text = _CODE_BLOCK.sub(r'<pre><code class="language-\1">\2</code></pre>', text)
+            # Inline code
+            text = _INLINE_CODE.sub(r"<code>\1</code>", text)
+
+        return text
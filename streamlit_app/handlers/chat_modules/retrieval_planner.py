@@ -0,0 +1,169 @@
+import os
+import sys
+import math
+import time
+import threading
+from typing import List, Sequence
+if "mnt" in os.getcwd():
+    os.chdir("/mount/src/linkedin-chatbot-job-mnt-team/")
+    sys.path.append("/mount/src/linkedin-chatbot-job-mnt-team/")
+from streamlit_app.utils.config import Config
+from streamlit_app.handlers.chat_modules.query_cache import normalize_query
+from pydantic import ConfigDict
+from langchain_core.documents import Document
+from langchain_core.callbacks import Callbacks
+from langchain_core.documents.compressor import BaseDocumentCompressor
+
+# Variables
+config = Config().get_config()
+retrieval_min_k = config["retrieval_min_k"]
+retrieval_max_k = config["retrieval_max_k"]
+broad_query_terms = config["broad_query_terms"]
+score_separation = config["score_separation"]
+rerank_budget_ms = config["rerank_budget_ms"]
+rerank_min_docs = config["rerank_min_docs"]
+
+# Words that do not narrow a job search
+GENERIC_TERMS = {
+    "a", "an", "the", "in", "at", "for", "of", "on", "to", "and", "or", "with", "me", "show", "find",
+    "give", "list", "any", "some", "all", "job", "jobs", "position", "positions", "role", "roles", "work",
+    "opening", "openings", "vacancy", "vacancies", "is", "are", "there", "what", "which", "please"
+}
+
+class RetrievalPlanner:
+    """
+    Choose retrieval candidate pools per query and bound the reranker's work
+
+    Both branches fetch max_k candidates, then each keeps between min_k and
+    max_k of them: broad queries (few specific terms) keep max_k, otherwise
+    the sharper the score drop after the first min_k candidates, the fewer
+    are kept. Fused candidates are deduplicated by job url (unless a
+    JobAggregator groups them after reranking), and the reranker
+    gets as many as fit in the latency budget. Its cost is fitted as a fixed
+    part per call (the API round trip of Cohere) plus a part per document
+    (a local cross-encoder), so only the per-document part is traded for
+    candidates; when the fixed part alone exceeds the budget nothing is cut.
+
+    Args:
+        min_k: candidates kept per branch when the top scores are well separated
+        max_k: candidates fetched per branch, all kept for broad queries
+        broad_terms: queries with at most this many specific terms are broad
+        separation: score drop after min_k, as a share of the score range, that counts as well separated
+        budget_ms: reranker latency budget per query, 0 for no cap
+        min_rerank: documents always given to the reranker
+    """
+    def __init__(self, min_k: int = retrieval_min_k, max_k: int = retrieval_max_k, broad_terms: int = broad_query_terms,
+                 separation: float = score_separation, budget_ms: float = rerank_budget_ms, min_rerank: int = rerank_min_docs):
+        self.min_k = min_k
+        self.max_k = max(min_k, max_k)
+        self.broad_terms = broad_terms
+        self.separation = separation
+        self.budget_ms = budget_ms
+        self.min_rerank = min_rerank
+        # Reranker cost model, ms = fixed + per_doc * documents, unknown until the first rerank
+        self.rerank_fixed_ms = None
+        self.rerank_ms_per_doc = None
+        # Exponentially weighted sums of 1, n, n^2, ms and n * ms over the measured calls
+        self._sums = [0.0] * 5
+        self._lock = threading.Lock()
+
+    def is_broad(self, query: str) -> bool:
+        """Whether the query has few specific terms"""
+        terms = [term for term in normalize_query(query).split() if term not in GENERIC_TERMS]
+        return len(terms) <= self.broad_terms
+
+    def pool_size(self, query: str, scores: Sequence[float]) -> int:
+        """
+        Number of candidates of a branch to keep
+
+        Args:
+            query: The user's query
+            scores: Scores of the branch candidates, best (highest) first
+
+        Returns:
+            int: Candidates to keep, between min_k and max_k
+        """
+        n = len(scores)
+        if n <= self.min_k:
+            return n
+        if self.is_broad(query):
+            return min(n, self.max_k)
+        spread = scores[0] - scores[-1]
+        drop = (scores[self.min_k - 1] - scores[self.min_k]) / spread if spread > 0 else 0.0
+        extra = math.ceil((self.max_k - self.min_k) * max(0.0, 1 - drop / self.separation))
+        return min(n, self.min_k + extra)
+
+    @staticmethod
+    def dedupe_by_job(documents: List[Document]) -> List[Document]:
+        """Keep the best ranked chunk of each job url, chunks without url are kept"""
+        seen = set()
+        unique = []
+        for document in documents:
+            url = document.metadata.get("job_url")
+            if url is not None:
+                if url in seen:
+                    continue
+                seen.add(url)
+            unique.append(document)
+        return unique
+
+    def rerank_limit(self, n_documents: int) -> int:
+        """Number of documents the reranker can score within the latency budget"""
+        if not self.budget_ms or self.rerank_ms_per_doc is None or self.rerank_ms_per_doc <= 0:
+            return n_documents
+        # Fewer documents do not make a call cheaper than its fixed part
+        if self.rerank_fixed_ms >= self.budget_ms:
+            return n_documents
+        fits = int((self.budget_ms - self.rerank_fixed_ms) / self.rerank_ms_per_doc)
+        return min(n_documents, max(self.min_rerank, fits))
+
+    def record_rerank(self, n_documents: int, ms: float) -> None:
+        """
+        Update the reranker cost model with a measured call
+
+        Fits ms = fixed + per_doc * n by least squares over exponentially
+        weighted calls. Until calls of different sizes were seen the two
+        parts cannot be told apart: the first call is charged per document,
+        later ones keep the last fit.
+        """
+        if n_documents <= 0:
+            return
+        with self._lock:
+            observation = (1.0, n_documents, n_documents ** 2, ms, n_documents * ms)
+            self._sums = [0.8 * total + value for total, value in zip(self._sums, observation)]
+            weight, sum_n, sum_nn, sum_ms, sum_nms = self._sums
+            mean_n, mean_ms = sum_n / weight, sum_ms / weight
+            variance = sum_nn / weight - mean_n ** 2
+            if variance >= 0.25:
+                per_doc = max(0.0, (sum_nms / weight - mean_n * mean_ms) / variance)
+                self.rerank_ms_per_doc = per_doc
+                self.rerank_fixed_ms = max(0.0, mean_ms - per_doc * mean_n)
+            elif self.rerank_ms_per_doc is None:
+                self.rerank_ms_per_doc = ms / n_documents
+                self.rerank_fixed_ms = 0.0
+
+class BudgetedReranker(BaseDocumentCompressor):
+    """
+    Reranker capped by the planner's latency budget
+
+    Gives the reranker the best fused candidates that fit in the budget and
+    reports the measured cost back to the planner.
+
+    Args:
+        reranker: The reranker (CohereRerank, CrossEncoderReranker)
+        planner: RetrievalPlanner holding the budget
+    """
+    reranker: BaseDocumentCompressor
+    planner: RetrievalPlanner
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def compress_documents(self, documents: Sequence[Document], query: str, callbacks: Callbacks = None) -> Sequence[Document]:
+        """Rerank the candidates that fit in the budget"""
+        documents = list(documents)[:self.planner.rerank_limit(len(documents))]
+        if not documents:
+            return []
+        start = time.perf_counter()
+        reranked = self.reranker.compress_documents(documents, query, callbacks=callbacks)
+        self.planner.record_rerank(len(documents), (time.perf_counter() - start) * 1000)
+        return reranked
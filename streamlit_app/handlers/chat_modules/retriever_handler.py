@@ -1,15 +1,23 @@
 # Check if running on Streamlit Cloud
 import os
 import sys
-import pickle
+import tiktoken
+from typing import Any
 if "mnt" in os.getcwd():
     os.chdir("/mount/src/linkedin-chatbot-job-mnt-team/")
     sys.path.append("/mount/src/linkedin-chatbot-job-mnt-team/")
 from streamlit_app.utils.config import Config
 from streamlit_app.utils.logger import logger
-from langchain.retrievers import EnsembleRetriever
-from langchain.retrievers.document_compressors import CohereRerank
+from streamlit_app.helpers.keyword_index import KeywordIndex
+from streamlit_app.handlers.chat_modules.keyword_retriever import KeywordRetriever
+from streamlit_app.handlers.chat_modules.hybrid_retriever import HybridRetriever
+from concurrent.futures import ThreadPoolExecutor
+from streamlit_app.handlers.chat_modules.reranker import build_reranker
+from streamlit_app.handlers.chat_modules.retrieval_planner import RetrievalPlanner, BudgetedReranker
+from streamlit_app.handlers.chat_modules.job_aggregator import JobAggregator
+from streamlit_app.handlers.chat_modules.context_packer import ContextPacker
 from langchain.retrievers import ContextualCompressionRetriever
+from langchain.retrievers.document_compressors import DocumentCompressorPipeline
 
 # Variables
 config = Config().get_config()
@@ -17,17 +25,44 @@ k_document = config["k_document"]
 bm25_file = config["bm25_file"]
 weight_semantic = config["weight_semantic"]
 name_algo = config["algorithm_search_keyword"]
+keyword_k = config["keyword_k"]
+rerank_top_n = config["rerank_top_n"]
+rrf_c = config["rrf_c"]
+retrieval_workers = config["retrieval_workers"]
+retrieval_planner = config["retrieval_planner"]
+job_aggregation = config["job_aggregation"]
+context_max_jobs = config["context_max_jobs"]
+context_packing = config["context_packing"]
+context_token_budget = config["context_token_budget"]
+context_min_tail_tokens = config["context_min_tail_tokens"]
+defaul_model_token = config["defaul_model_token"]
 class RetrieverHandler:
     """
     Handles the setup of retriever for the program
     """
-    def __init__(self):
+    def __init__(self, encoding: Any = None):
         """
         initliaze the retriever handler
         Args:
-            None
+            encoding: tiktoken encoding counting context tokens, loaded from config when None
         """
-        pass
+        # Runs the semantic branch of hybrid searches, shared by every retriever built here
+        self.executor = ThreadPoolExecutor(max_workers=retrieval_workers, thread_name_prefix="hybrid-retrieval")
+        # Per-query candidate pools and reranker budget, its cost estimate outlives index swaps
+        self.planner = RetrievalPlanner() if retrieval_planner else None
+        # Collapses chunks of the same posting before they are stuffed into the prompt
+        self.job_aggregator = JobAggregator(max_jobs=context_max_jobs, c=rrf_c) if job_aggregation else None
+        # Reranker stage selected by config["reranker"], its model is loaded once. With the aggregator
+        # it returns every candidate reranked, so the cut to context_max_jobs is made per job, not per chunk
+        self.reranker = build_reranker(top_n=None if self.job_aggregator is not None else rerank_top_n)
+        # Fits the context documents into the prompt's token budget
+        self.context_packer = None
+        if context_packing:
+            self.context_packer = ContextPacker(
+                encoding=encoding if encoding is not None else tiktoken.get_encoding(defaul_model_token),
+                budget=context_token_budget,
+                min_tail_tokens=context_min_tail_tokens
+            )
     
     def set_up_retriever(self, vector_db):
         """
@@ -35,10 +70,12 @@ class RetrieverHandler:
         Args:
             vector_db: Vector database
         Returns:
-            retriever: Retriever object: ensemble retriever: BM25 and FAISS semantic search
+            retriever: Retriever object: hybrid retriever: BM25 and FAISS semantic search run concurrently,
+                then reranking, one context document per job and the token budget
         """
         vector_retriever = vector_db.as_retriever(search_kwargs={"k": k_document}) 
         retriever = vector_retriever
+        rerank_stage = []
         
         # Load hybrid retriever if BM25 file exists
         try:
@@ -47,24 +84,48 @@ class RetrieverHandler:
             
             if os.path.exists(bm25_path):
                 logger.info(f"Loading {name_algo} retriever from {bm25_path}")
-                with open(bm25_path, "rb") as f:
-                    bm25_retriever = pickle.load(f)
-                    
-                # Create ensemble retriever (hybrid search)
-                emsemble_retriever = EnsembleRetriever(
-                    retrievers=[bm25_retriever, vector_retriever],
-                    weights=[1 - weight_semantic, weight_semantic]  # Weight semantic search higher
+                keyword_index = KeywordIndex.load(bm25_path)
+                if keyword_index.n_docs != vector_db.index.ntotal:
+                    raise ValueError(f"{name_algo} index has {keyword_index.n_docs} documents, vector database has {vector_db.index.ntotal}")
+                bm25_retriever = KeywordRetriever(index=keyword_index, vector_db=vector_db, k=keyword_k)
+
+                # Create hybrid retriever, both branches run at once and are fused by rank
+                hybrid_retriever = HybridRetriever(
+                    keyword_retriever=bm25_retriever,
+                    vector_db=vector_db,
+                    executor=self.executor,
+                    k=k_document,
+                    weight_semantic=weight_semantic,  # Weight semantic search higher
+                    c=rrf_c,
+                    planner=self.planner,
+                    # The aggregator scores jobs by all their reranked chunks, so keep them
+                    dedupe_jobs=self.job_aggregator is None
                 )
 
                 # reranking
-                compressor = CohereRerank(top_n=5)
-                retriever = ContextualCompressionRetriever(
-                    base_compressor=compressor, base_retriever=emsemble_retriever
-                )
-                logger.info(f"Hybrid retriever ({name_algo} + Vector + Reranking) setup complete!")
+                if self.reranker is not None:
+                    compressor = self.reranker
+                    if self.planner is not None:
+                        compressor = BudgetedReranker(reranker=self.reranker, planner=self.planner)
+                    rerank_stage = [compressor]
+                    logger.info(f"Hybrid retriever ({name_algo} + Vector + Reranking) setup complete!")
+                else:
+                    logger.info(f"Hybrid retriever ({name_algo} + Vector) setup complete!")
+                retriever = hybrid_retriever
             else:
                 logger.info(f"{name_algo} retriever not found. Using vector retriever only.")
         except Exception as e:
             logger.error(f"Error setting up {name_algo} retriever: {e}, falling back to vector retriever")
+            retriever = vector_retriever
+            rerank_stage = []
+
+        # Post-retrieval stages, in order: reranking, one context document per job, token budget
+        compressors = rerank_stage + [stage for stage in (self.job_aggregator, self.context_packer) if stage is not None]
+        if len(compressors) == 1:
+            retriever = ContextualCompressionRetriever(base_compressor=compressors[0], base_retriever=retriever)
+        elif compressors:
+            retriever = ContextualCompressionRetriever(
+                base_compressor=DocumentCompressorPipeline(transformers=compressors), base_retriever=retriever
+            )
         
         return retriever
@@ -1,8 +1,7 @@
 # Check if running on Streamlit Cloud
 import os
 import sys
-import boto3
-import os
+import faiss
 import traceback
 from typing import Optional
 if "mnt" in os.getcwd():
@@ -10,7 +9,12 @@ if "mnt" in os.getcwd():
     sys.path.append("/mount/src/linkedin-chatbot-job-mnt-team/")
 from streamlit_app.utils.config import Config
 from streamlit_app.utils.logger import logger
+from streamlit_app.helpers.faiss_index import apply_search_params, index_params, index_type_of
+from streamlit_app.helpers.columnar_docstore import ColumnarDocstore, PositionMap
+from streamlit_app.helpers.s3_sync import S3Sync
+from streamlit_app.helpers.index_manifest import CHECKSUM_CACHE_FILE, read_remote_manifest, verify_manifest
 from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
 from langchain_community.vectorstores import FAISS
 
 
@@ -33,6 +37,32 @@ class VectorDBHandler:
         """
         self.model_name = model_name
         self.cache_folder = cache_folder
+        self.loaded_version = None
+        self._s3_sync = None
+
+    def _get_s3_sync(self) -> S3Sync:
+        """Create the S3 sync component once"""
+        if self._s3_sync is None:
+            self._s3_sync = S3Sync(
+                config["bucket_vectordb"],
+                max_workers=config["s3_max_workers"],
+                multipart_threshold_mb=config["s3_multipart_threshold_mb"],
+                multipart_chunksize_mb=config["s3_multipart_chunksize_mb"]
+            )
+        return self._s3_sync
+
+    def fetch_manifest(self) -> Optional[dict]:
+        """
+        Read the manifest of the latest published index
+
+        Returns:
+            Optional[dict]: The manifest, or None if missing or unreadable
+        """
+        try:
+            return read_remote_manifest(self._get_s3_sync().s3_client, config["bucket_vectordb"], config["manifest_key"])
+        except Exception as e:
+            logger.warning(f"Could not read index manifest: {e}")
+            return None
 
     def load_embeddings(self) -> HuggingFaceEmbeddings:
         """
@@ -50,9 +80,14 @@ class VectorDBHandler:
             logger.error("Error loading embeddings")
             raise
     
-    def download_and_load_vector_db(self) -> None:
+    def download_and_load_vector_db(self, manifest: Optional[dict] = None, require_verified: bool = False, embeddings: Optional[Embeddings] = None) -> Optional[FAISS]:
         """
         Download vector database from S3
+
+        Args:
+            manifest (dict): Manifest of the published index, to verify downloaded files
+            require_verified (bool): Return None instead of loading files that do not match the manifest
+            embeddings (Embeddings): Embedding model already loaded, a new one is loaded when None
         """
         try:
             vector_db_path = config["vector_db_path"]
@@ -62,36 +97,22 @@ class VectorDBHandler:
             # Create directory if it doesn't exist
             os.makedirs(vector_db_path, exist_ok=True)
             
-            # Download FAISS files from S3
+            # Download changed FAISS files from S3
             try:
-                s3_client = boto3.client("s3")
-                logger.info(f"Downloading files from {bucket_name}/{s3_prefix} to {vector_db_path}")
-                
-                # List objects in the prefix
-                response = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=s3_prefix)
+                s3_sync = self._get_s3_sync()
+                logger.info(f"Syncing files from {bucket_name}/{s3_prefix} to {vector_db_path}")
+                stats = s3_sync.download_prefix(s3_prefix, vector_db_path)
                 
-                if 'Contents' in response:
-                    for obj in response['Contents']:
-                        s3_key = obj['Key']
-                        # Extract relative path from the s3_key
-                        rel_path = os.path.relpath(s3_key, s3_prefix)
-                        local_path = os.path.join(vector_db_path, rel_path)
-                        
-                        # Create subdirectories if needed
-                        os.makedirs(os.path.dirname(local_path), exist_ok=True)
-                        
-                        logger.info(f"Downloading {s3_key} to {local_path}")
-                        s3_client.download_file(bucket_name, s3_key, local_path)
+                if stats["downloaded"] + stats["skipped"] > 0:
+                    logger.info(f"Vector database synced: {stats['downloaded']} downloaded, {stats['skipped']} unchanged, {stats['deleted']} deleted")
                     
-                    logger.info("Vector database files downloaded successfully!")
-                    
-                    # Also download BM25 retriever
+                    # Also download BM25 keyword index
                     try:
                         bm25_path = os.path.join(os.path.dirname(vector_db_path), config["bm25_file"])
-                        s3_client.download_file(bucket_name, config["dir_bm25"], bm25_path)
-                        logger.info(f"Downloaded BM25 retriever to {bm25_path}")
+                        if s3_sync.download_file(config["dir_bm25"], bm25_path):
+                            logger.info(f"Downloaded BM25 keyword index to {bm25_path}")
                     except Exception as e:
-                        logger.warning(f"Could not download BM25 retriever: {e}")
+                        logger.warning(f"Could not download BM25 keyword index: {e}")
                 else:
                     logger.error(f"No files found in S3 at {bucket_name}/{s3_prefix}")
                     
@@ -99,44 +120,108 @@ class VectorDBHandler:
                 logger.error(f"Error downloading vector database from S3: {e}")
                 # We'll continue and try to load from local path if files exist
             
+            # Check the files against the checksums of the published version
+            version = None
+            if manifest is not None:
+                bm25_path = os.path.join(os.path.dirname(vector_db_path), config["bm25_file"])
+                # Only files written since their last check are hashed, the others keep the memory-mapped cold start lazy
+                cache_path = os.path.join(vector_db_path, CHECKSUM_CACHE_FILE)
+                if verify_manifest(manifest, vector_db_path, bm25_path, cache_path):
+                    version = manifest["version"]
+                else:
+                    logger.warning(f"Local files do not match index version {manifest['version']}")
+                    if require_verified:
+                        return None
+
             # Now load the vector database using the local files
             logger.info("Loading vector database...")
-            return self._load_vector_store()
+            vector_db = self._load_vector_store(embeddings)
+            if vector_db is not None:
+                self.loaded_version = version
+            return vector_db
         except Exception as e:
             logger.error(f"Error in download_and_load_vector_db: {e}")
             return None
     
-    def _load_vector_store(self) -> Optional[FAISS]:
+    def _load_vector_store(self, embeddings: Optional[Embeddings] = None) -> Optional[FAISS]:
         """
         Initialize and load FAISS vector store from local path
+
+        Args:
+            embeddings (Embeddings): Embedding model already loaded, a new one is loaded when None
         
         Returns:
             Optional[FAISS]: The loaded FAISS vector store, or None if loading fails
         """
         try:
             vector_db_path = config["vector_db_path"]
+            # Every index version shares the model already in memory
+            if embeddings is None:
+                embeddings = self.load_embeddings()
             
             # Now check if the required files are present
             index_faiss_path = os.path.join(vector_db_path, "index.faiss")
             index_pkl_path = os.path.join(vector_db_path, "index.pkl")
+            docstore_path = os.path.join(vector_db_path, config["docstore_file"])
 
-            if not os.path.exists(index_faiss_path) or not os.path.exists(index_pkl_path):
-                logger.error(f"Required vector database files not found: {index_faiss_path}, {index_pkl_path}")
-                return None
-            
-            logger.info(f"Loading FAISS index from {vector_db_path}...")
-
-            # Load embeddings if not already loaded
-            embeddings = self.load_embeddings()
-            
-            vector_db = FAISS.load_local(
-                folder_path=vector_db_path,
-                embeddings=embeddings,
-                allow_dangerous_deserialization=True
-            )
+            if config["vector_store_load_mode"] == "mmap" and os.path.exists(index_faiss_path) and os.path.exists(docstore_path):
+                vector_db = self._load_mmap_vector_store(index_faiss_path, docstore_path, embeddings)
+            else:
+                if not os.path.exists(index_faiss_path) or not os.path.exists(index_pkl_path):
+                    logger.error(f"Required vector database files not found: {index_faiss_path}, {index_pkl_path}")
+                    return None
+                
+                logger.info(f"Loading FAISS index from {vector_db_path}...")
+                vector_db = FAISS.load_local(
+                    folder_path=vector_db_path,
+                    embeddings=embeddings,
+                    allow_dangerous_deserialization=True
+                )
+            # Set efSearch / nprobe of compressed indexes
+            apply_search_params(vector_db.index, index_params(config))
+            logger.info(f"Loaded {index_type_of(vector_db.index)} index with {vector_db.index.ntotal} vectors")
             return vector_db
         except Exception as e:
             logger.error(f"Error loading FAISS: {e}")
             traceback.print_exc()
             return None
 
+    def _load_mmap_vector_store(self, index_faiss_path: str, docstore_path: str, embeddings: Embeddings) -> FAISS:
+        """
+        Load the FAISS index and the columnar docstore through memory maps
+
+        Pages are read lazily by the OS and shared between Streamlit workers,
+        documents are only decoded for the positions a query returns.
+
+        Args:
+            index_faiss_path (str): Path to index.faiss
+            docstore_path (str): Path to the columnar docstore
+            embeddings (Embeddings): Embedding model of the queries
+
+        Returns:
+            FAISS: The FAISS vector store
+        """
+        logger.info(f"Memory-mapping FAISS index {index_faiss_path}...")
+        # IO_FLAG_MMAP_IFC maps the codes of flat, SQ and HNSW indexes (IO_FLAG_MMAP alone still
+        # copies them into the heap), IO_FLAG_MMAP covers the inverted lists of the other types
+        index = None
+        for flag in (faiss.IO_FLAG_MMAP_IFC, faiss.IO_FLAG_MMAP):
+            try:
+                index = faiss.read_index(index_faiss_path, flag | faiss.IO_FLAG_READ_ONLY)
+                break
+            except RuntimeError as e:
+                logger.warning(f"Index cannot be memory-mapped with flag {flag} ({e})")
+        if index is None:
+            logger.warning("Index cannot be memory-mapped, reading it into memory")
+            index = faiss.read_index(index_faiss_path)
+
+        docstore = ColumnarDocstore(docstore_path)
+        if len(docstore) != index.ntotal:
+            raise ValueError(f"Docstore has {len(docstore)} documents, index has {index.ntotal} vectors")
+
+        return FAISS(
+            embedding_function=embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=PositionMap(index.ntotal)
+        )
@@ -2,7 +2,15 @@
 import streamlit as st
 import sys
 import os
-from pymongo import MongoClient 
+import time
+import queue
+import atexit
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+from pymongo import UpdateOne, ReturnDocument, ASCENDING
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from bson.objectid import ObjectId
 # Check if running on Streamlit Cloud
 if "mnt" in os.getcwd():
     os.chdir("/mount/src/linkedin-chatbot-job-mnt-team/")
@@ -10,24 +18,180 @@ if "mnt" in os.getcwd():
 
 # import external file
 from streamlit_app.utils.config import Config
+from streamlit_app.utils.logger import logger
+from streamlit_app.db.mongo_client import get_mongo_client
 
 # Intilize configuration
 config = Config()
 config.initialize_session_states()
 # Variables
-db_uri = config.get_config()["db_uri"]
 default_title = config.get_config()["default_name"]
 max_word = config.get_config()["max_word"]
+sidebar_page_size = config.get_config()["sidebar_page_size"]
+message_storage = config.get_config()["message_storage"]
+message_page_size = config.get_config()["message_page_size"]
+write_behind = config.get_config()["write_behind"]
+write_retries = config.get_config()["write_retries"]
+write_retry_delay = config.get_config()["write_retry_delay"]
 
+# Indexes are created once per process
+_indexes_ready = False
+# Write-behind queue shared by every session, created by the first DBHandler
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+def make_title(first_message: str) -> str:
+    """
+    Build a chat title from the first message of the chat
+    
+    Args:
+        first_message (str): Content of the first message
+    
+    Returns:
+        str: The first max_word words, with "..." if the message is longer
+    """
+    words = first_message.split()
+    title = " ".join(words[:max_word])
+    if len(words) > max_word:
+        title += "..."
+    return title or default_title
+
+def retry(operation: Callable, retries: int = write_retries, delay: float = write_retry_delay):
+    """
+    Run a database operation, retrying failures with exponential backoff
+    
+    Args:
+        operation (Callable): The operation, without arguments
+        retries (int): Attempts after the first one
+        delay (float): Seconds before the first retry, doubled after each one
+    
+    Returns:
+        The result of the operation
+    """
+    for attempt in range(retries + 1):
+        try:
+            return operation()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            logger.warning(f"Database write failed ({e}), retry {attempt + 1}/{retries}")
+            time.sleep(delay * 2 ** attempt)
+
+class ChatWriteQueue:
+    """
+    Write-behind persistence of chats, off the request path
+
+    Writes are queued and applied by a background thread. Everything queued
+    while a batch is being written is coalesced per chat: the chat is created,
+    titled, then all its new messages are appended in one write. Failed
+    writes are retried write_retries times, pending writes are flushed when
+    the process exits. Pending writes are counted per chat, so a reader only
+    waits for the chat it reads, not for the writes of every session.
+
+    Args:
+        db_handler: DBHandler performing the writes
+    """
+    def __init__(self, db_handler: "DBHandler"):
+        self.db_handler = db_handler
+        self._queue = queue.Queue()
+        # str(chat_id) -> writes queued and not applied yet
+        self._pending = {}
+        self._idle = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="chat-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def put(self, chat_id, create_title: Optional[str] = None, first_message: Optional[str] = None, messages: Optional[List[dict]] = None) -> None:
+        """
+        Queue writes for a chat
+        
+        Args:
+            chat_id: The chat id
+            create_title (str): Create the chat with a title made from this text
+            first_message (str): Title the chat from its first message, if untitled
+            messages (list): Messages to append
+        """
+        with self._idle:
+            key = str(chat_id)
+            self._pending[key] = self._pending.get(key, 0) + 1
+        self._queue.put((chat_id, create_title, first_message, messages or []))
+
+    def flush(self, chat_id=None, timeout: float = 10) -> bool:
+        """
+        Wait until the queued writes of a chat, or of every chat, are applied
+        
+        Args:
+            chat_id: The chat to wait for, None for every chat
+            timeout (float): Maximum seconds to wait
+        
+        Returns:
+            bool: True if nothing is left pending
+        """
+        key = str(chat_id) if chat_id is not None else None
+        with self._idle:
+            if key is None:
+                return self._idle.wait_for(lambda: not self._pending, timeout)
+            return self._idle.wait_for(lambda: key not in self._pending, timeout)
+
+    def _run(self) -> None:
+        """Apply queued writes in coalesced batches"""
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            chats = OrderedDict()
+            for chat_id, create_title, first_message, messages in batch:
+                chat = chats.setdefault(chat_id, {"create_title": None, "first_message": None, "messages": []})
+                chat["create_title"] = chat["create_title"] or create_title
+                chat["first_message"] = chat["first_message"] or first_message
+                chat["messages"].extend(messages)
+
+            for chat_id, chat in chats.items():
+                try:
+                    self.db_handler.write_chat(chat_id, **chat)
+                except Exception as e:
+                    logger.error(f"Dropping {len(chat['messages'])} messages of chat {chat_id} after {write_retries} retries: {e}")
+
+            with self._idle:
+                for chat_id, *_ in batch:
+                    key = str(chat_id)
+                    self._pending[key] -= 1
+                    if not self._pending[key]:
+                        del self._pending[key]
+                self._idle.notify_all()
 
 class DBHandler:
     """
     Connect to Mongo Atlas to manage history
     """
     def __init__(self):
-        self.mongo_client = MongoClient(db_uri)
+        # Shared by every session and rerun, see get_mongo_client
+        self.mongo_client = get_mongo_client()
         self.db = self.mongo_client['chatbot']
         self.chat_collection = self.db['chat_history']
+        # One document per message: chat_id, seq, role, content
+        self.message_collection = self.db['chat_messages']
+        self._ensure_indexes()
+        self.write_queue = self._get_write_queue() if write_behind else None
+
+    def _get_write_queue(self) -> ChatWriteQueue:
+        """Create the process-wide write-behind queue once"""
+        global _write_queue
+        with _write_queue_lock:
+            if _write_queue is None:
+                _write_queue = ChatWriteQueue(self)
+            return _write_queue
+
+    def _ensure_indexes(self) -> None:
+        """Create the (chat_id, seq) index of the message collection"""
+        global _indexes_ready
+        if message_storage == "collection" and not _indexes_ready:
+            self.message_collection.create_index([("chat_id", ASCENDING), ("seq", ASCENDING)], unique=True)
+            _indexes_ready = True
     
     def create_chat(self, chat_id: str, messages: list = None,  title: str = default_title) -> None:
         """
@@ -58,19 +222,205 @@ class DBHandler:
         """
         return self.chat_collection.find_one({"_id": chat_id})
 
-    def update_chat_messages(self, chat_id: str, messages: list) -> None:
+    def update_chat_messages(self, chat_id: str, messages: dict) -> None:
         """
-        Update the messages in a chat document
+        Append a message to a chat
         
         Args:
             chat_id (str): The chat id
-            messages (list): A list of messages
+            messages (dict): The message dictionary
+        """
+        self.append_messages(chat_id, [messages])
+
+    def append_messages(self, chat_id: str, messages: List[dict]) -> None:
+        """
+        Append messages to a chat, in the message collection or the chat document
+        
+        Args:
+            chat_id (str): The chat id
+            messages (list): Messages with "role" and "content"
+        """
+        if not messages:
+            return
+        if message_storage != "collection":
+            self.chat_collection.update_one(
+                {"_id": chat_id},
+                {"$push": {"messages": {"$each": messages}}}
+            )
+            return
+
+        first_seq = self._reserve_seqs(chat_id, len(messages))
+        self._insert_messages(chat_id, first_seq, messages)
+
+    def _insert_messages(self, chat_id: str, first_seq: int, messages: List[dict]) -> None:
+        """
+        Insert messages with reserved sequence numbers, safe to retry
+        
+        Args:
+            chat_id (str): The chat id
+            first_seq (int): Sequence number of the first message
+            messages (list): Messages with "role" and "content"
+        """
+        try:
+            self.message_collection.insert_many(
+                [
+                    {"chat_id": chat_id, "seq": first_seq + i, "role": message["role"], "content": message["content"]}
+                    for i, message in enumerate(messages)
+                ],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            # Messages inserted by an earlier attempt are already there
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+
+    def write_chat(self, chat_id: str, create_title: Optional[str] = None, first_message: Optional[str] = None, messages: Optional[List[dict]] = None) -> None:
+        """
+        Apply the coalesced writes of a chat, each retried on failure
+        
+        Args:
+            chat_id (str): The chat id
+            create_title (str): Create the chat with a title made from this text
+            first_message (str): Title the chat from its first message, if untitled
+            messages (list): Messages to append
         """
+        if create_title is not None:
+            def create():
+                try:
+                    self.insert_chat_message(chat_id, [], create_title)
+                except DuplicateKeyError:
+                    pass
+            retry(create)
+        if first_message is not None:
+            retry(lambda: self.title_chat(chat_id, first_message))
+        if not messages:
+            return
+        if message_storage != "collection":
+            retry(lambda: self.append_messages(chat_id, messages))
+            return
+        first_seq = retry(lambda: self._reserve_seqs(chat_id, len(messages)))
+        retry(lambda: self._insert_messages(chat_id, first_seq, messages))
+
+    def save_turn(self, chat_id: str, messages: List[dict], create_title: Optional[str] = None, first_message: Optional[str] = None) -> None:
+        """
+        Persist a chat turn, in the background when write_behind is on
+        
+        Args:
+            chat_id (str): The chat id
+            messages (list): Messages of the turn
+            create_title (str): Create the chat with a title made from this text
+            first_message (str): Title the chat from its first message, if untitled
+        """
+        if self.write_queue is not None:
+            self.write_queue.put(chat_id, create_title=create_title, first_message=first_message, messages=messages)
+        else:
+            self.write_chat(chat_id, create_title=create_title, first_message=first_message, messages=messages)
+
+    def flush_writes(self, chat_id=None, timeout: float = 10) -> None:
+        """Wait for the queued writes of a chat (every chat when None), before reading or deleting it"""
+        if self.write_queue is not None and not self.write_queue.flush(chat_id, timeout):
+            logger.warning(f"Pending writes of chat {chat_id} not flushed in time")
+
+    def _reserve_seqs(self, chat_id: str, count: int) -> int:
+        """
+        Reserve consecutive sequence numbers for new messages of a chat
+        
+        Args:
+            chat_id (str): The chat id
+            count (int): Number of messages
+        
+        Returns:
+            int: First reserved sequence number
+        """
+        update = {"$inc": {"message_count": count}}
+        # Chats still holding embedded messages are moved to the collection first
+        chat = self.chat_collection.find_one_and_update(
+            {"_id": chat_id, "messages.0": {"$exists": False}},
+            update,
+            projection={"message_count": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if chat is None:
+            self._migrate_embedded_messages(chat_id)
+            chat = self.chat_collection.find_one_and_update(
+                {"_id": chat_id},
+                update,
+                projection={"message_count": 1},
+                return_document=ReturnDocument.AFTER,
+                upsert=True
+            )
+        return chat["message_count"] - count
+
+    def _migrate_embedded_messages(self, chat_id: str) -> None:
+        """
+        Move the messages embedded in a chat document to the message collection
+        
+        Args:
+            chat_id (str): The chat id
+        """
+        chat = self.chat_collection.find_one({"_id": chat_id, "messages.0": {"$exists": True}}, {"messages": 1})
+        if chat is None:
+            return
+        try:
+            self.message_collection.insert_many(
+                [
+                    {"chat_id": chat_id, "seq": seq, "role": message.get("role"), "content": message.get("content")}
+                    for seq, message in enumerate(chat["messages"])
+                ],
+                ordered=False
+            )
+        except BulkWriteError:
+            # Messages already copied by an interrupted migration
+            pass
         self.chat_collection.update_one(
             {"_id": chat_id},
-            {"$push": {"messages": messages}}
+            {"$set": {"message_count": len(chat["messages"])}, "$unset": {"messages": ""}}
         )
-    
+
+    def load_recent_messages(self, chat_id: str, limit: int = message_page_size, before_seq: int = None) -> Tuple[List[dict], int]:
+        """
+        Load the most recent messages of a chat, one page at a time
+        
+        Args:
+            chat_id (str): The chat id
+            limit (int): Maximum number of messages
+            before_seq (int): Only messages before this sequence number, None for the latest page
+        
+        Returns:
+            tuple: Messages oldest first, and the sequence number of the first one (0 when no older message exists)
+        """
+        self.flush_writes(chat_id)
+        if message_storage == "collection":
+            query = {"chat_id": chat_id}
+            if before_seq is not None:
+                query["seq"] = {"$lt": before_seq}
+            # One extra message tells whether anything is older: failed writes leave gaps in seq
+            docs = list(
+                self.message_collection.find(query, {"_id": 0, "seq": 1, "role": 1, "content": 1})
+                .sort("seq", -1)
+                .limit(limit + 1)
+            )
+            if docs:
+                has_older = len(docs) > limit
+                docs = docs[:limit][::-1]
+                return [{"role": doc["role"], "content": doc["content"]} for doc in docs], docs[0]["seq"] if has_older else 0
+
+        # Messages embedded in the chat document: only the page is sent back
+        total = {"$size": {"$ifNull": ["$messages", []]}}
+        end = total if before_seq is None else {"$min": [before_seq, total]}
+        start = {"$max": [0, {"$subtract": [end, limit]}]}
+        page = list(self.chat_collection.aggregate([
+            {"$match": {"_id": chat_id}},
+            {"$project": {
+                "start": start,
+                "messages": {"$slice": [{"$ifNull": ["$messages", []]}, start, {"$max": [1, {"$subtract": [end, start]}]}]},
+                "empty": {"$lte": [{"$subtract": [end, start]}, 0]}
+            }}
+        ]))
+        if not page or page[0]["empty"]:
+            return [], 0
+        return page[0]["messages"], page[0]["start"]
+
     def insert_chat_message(self, chat_id: str, messages: dict, title: str) -> None:
         """
         Insert a message into a chat document
@@ -83,9 +433,23 @@ class DBHandler:
             {
                 "_id": chat_id,
                 "messages": messages,
-                "title": title[:max_word] + "..." if len(title) > max_word else title  # Use first message as title
+                "title": make_title(title),  # Use first message as title
+                "titled": True
             }
         )
+
+    def title_chat(self, chat_id: str, first_message: str) -> None:
+        """
+        Set the title of a chat from its first message, unless it already has one
+        
+        Args:
+            chat_id (str): The chat id
+            first_message (str): Content of the first message
+        """
+        self.chat_collection.update_one(
+            {"_id": chat_id, "titled": {"$ne": True}},
+            {"$set": {"title": make_title(first_message), "titled": True}}
+        )
     
     def update_chat_title(self, chat_id: str, new_title: str) -> None:
         """
@@ -97,17 +461,19 @@ class DBHandler:
         """
         self.chat_collection.update_one(
             {"_id": chat_id},
-            {"$set": {"title": new_title}}
+            {"$set": {"title": new_title, "titled": True}}
         )
     
     def delete_chat(self, chat_id: str) -> None:
         """
-        Delete a chat document from the database
+        Delete a chat document and its messages from the database
         
         Args:
             chat_id (str): The chat id
         """
+        self.flush_writes(chat_id)
         self.chat_collection.delete_one({"_id": chat_id})
+        self.message_collection.delete_many({"chat_id": chat_id})
     
     def get_all_chats(self, sort_by: str = "_id", order: int = -1) -> list:
         """
@@ -122,6 +488,41 @@ class DBHandler:
         """
         return self.chat_collection.find().sort(sort_by, order)
 
+    def get_chat_page(self, limit: int = sidebar_page_size, before_id: ObjectId = None, chat_id=None) -> list:
+        """
+        Get one page of chats for the sidebar, newest first, without their messages
+        
+        Args:
+            limit (int): Number of chats in the page
+            before_id (ObjectId): Only chats older than this id, None for the first page
+            chat_id: Chat of the session, its queued writes are applied first
+        
+        Returns:
+            list: Chat documents with only "_id" and "title"
+        """
+        if chat_id is not None:
+            self.flush_writes(chat_id)
+        query = {"_id": {"$lt": before_id}} if before_id is not None else {}
+        return list(self.chat_collection.find(query, {"_id": 1, "title": 1}).sort("_id", -1).limit(limit))
+
+    def backfill_chat_titles(self) -> int:
+        """
+        Store the title of chats written before titles were set at write time
+        
+        Returns:
+            int: Number of chats updated
+        """
+        updates = [
+            UpdateOne({"_id": chat["_id"]}, {"$set": {"title": self.get_chat_title(chat), "titled": True}})
+            for chat in self.chat_collection.find(
+                {"titled": {"$ne": True}, "messages.0": {"$exists": True}},
+                {"title": 1, "messages": {"$slice": 1}}
+            )
+        ]
+        if updates:
+            self.chat_collection.bulk_write(updates, ordered=False)
+        return len(updates)
+
     def get_chat_title(self, chat: dict) -> str:
         """
         Get chat title from first message or return default title.
@@ -133,10 +534,5 @@ class DBHandler:
         """
         messages = chat.get("messages", [])
         if messages:
-            first_message = messages[0].get("content", "")
-            words = first_message.split()[:max_word]
-            title = " ".join(words)
-            if len(words) < len(first_message.split()):
-                title += "..."
-            return title
+            return make_title(messages[0].get("content", ""))
         return chat.get("title", default_title)
\ No newline at end of file
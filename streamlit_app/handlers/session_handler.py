@@ -5,7 +5,7 @@ from bson.objectid import ObjectId
 from pymongo.collection import Collection
 import streamlit as st
 from pymongo import MongoClient 
-from typing import Any
+from typing import Any, Callable
 
 # Check if running on Streamlit Cloud
 if "mnt" in os.getcwd():
@@ -14,6 +14,7 @@ if "mnt" in os.getcwd():
 
 # import external file
 from streamlit_app.utils.config import Config
+from streamlit_app.helpers.message_html import reset_message_cache
 
 # intilize configuration
 config = Config().get_config()
@@ -22,14 +23,16 @@ config = Config().get_config()
 default_title = config["default_name"]
 
 class SessionHandler:
-    def __init__(self, chat_collection: Collection) -> None:
+    def __init__(self, chat_collection: Collection, load_recent_messages: Callable) -> None:
         """
         Initialize SessionHandler with MongoDB collection
         
         Args:
             chat_collection (Collection): MongoDB collection for chats
+            load_recent_messages (Callable): Load one page of a chat's messages, newest page first
         """
         self.chat_collection = chat_collection
+        self.load_recent_messages = load_recent_messages
         self.session_state = st.session_state
 
     def create_new_chat(self) -> None:
@@ -38,11 +41,14 @@ class SessionHandler:
         """
         self.session_state.chat_id = str(ObjectId())
         self.session_state.messages = []
+        self.session_state.first_loaded_seq = 0
+        reset_message_cache()
         self.chat_collection.insert_one({
             "_id": ObjectId(self.session_state.chat_id), 
             "messages": [],
             "title": default_title
         })
+        self.session_state.sidebar_updated = True
         if "selected_chat" in self.session_state:
             del self.session_state.selected_chat
         st.rerun()
@@ -54,18 +60,37 @@ class SessionHandler:
         Args:
             chat_id (str): The ID of the chat to switch to.
         """
-        chat = self.chat_collection.find_one({"_id": ObjectId(chat_id)})
-        if chat:
-            self.session_state.messages = chat.get("messages", [])
-            self.session_state.chat_id = str(chat_id)
-            if "selected_chat" not in self.session_state:
-                self.session_state.selected_chat = str(chat_id)
-            
-            # Set a flag to indicate we're switching chats - don't reinitialize everything
-            self.session_state.switching_chat = True
+        # Only the latest page of messages, older ones are loaded on demand
+        messages, first_seq = self.load_recent_messages(ObjectId(chat_id))
+        self.session_state.messages = messages
+        self.session_state.first_loaded_seq = first_seq
+        self.session_state.chat_id = str(chat_id)
+        reset_message_cache()
+        if "selected_chat" not in self.session_state:
+            self.session_state.selected_chat = str(chat_id)
+        
+        # Set a flag to indicate we're switching chats - don't reinitialize everything
+        self.session_state.switching_chat = True
             
         st.rerun()
 
+    def load_earlier_messages(self) -> bool:
+        """
+        Prepend the previous page of messages of the current chat
+
+        Returns:
+            bool: True if older messages were loaded
+        """
+        first_seq = self.session_state.get("first_loaded_seq", 0)
+        if not first_seq or self.session_state.chat_id is None:
+            return False
+        messages, first_seq = self.load_recent_messages(ObjectId(self.session_state.chat_id), before_seq=first_seq)
+        self.session_state.messages = messages + self.session_state.messages
+        self.session_state.first_loaded_seq = first_seq
+        # Message indexes shifted, rendered fragments are rebuilt
+        self.session_state.rendered_messages = {}
+        return bool(messages)
+
     def initialize_session_state(self) -> None:
         """
         Initialize all required session state variables
@@ -76,6 +101,7 @@ class SessionHandler:
         if "messages" not in self.session_state:
             self.session_state.messages = []
     
+    @staticmethod
     def show_rename(chat_id: str, current_title: str, chat_collection: MongoClient) -> None:
         """
         Show a popup to rename a chat in the sidebar.
@@ -95,7 +121,7 @@ class SessionHandler:
                 # save button in rename box
                 with col1:
                     if st.button("Save", key=f"save_rename_{chat_id}"):
-                        chat_collection.update_one({"_id": ObjectId(chat_id)}, {"$set": {"title": new_title}})
+                        chat_collection.update_one({"_id": ObjectId(chat_id)}, {"$set": {"title": new_title, "titled": True}})
                         st.session_state.pop(f"show_rename_{chat_id}", None)
                         st.session_state.sidebar_updated = True
                         st.rerun()
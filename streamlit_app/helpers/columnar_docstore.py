@@ -0,0 +1,132 @@
+import os
+import json
+import struct
+import numpy as np
+from collections.abc import Mapping
+from typing import Iterator, List, Union
+from langchain_core.documents import Document
+from langchain_community.docstore.base import Docstore
+
+# Binary layout:
+#   header  : magic, version, n_docs, n_columns
+#   offsets : per column, int64 offsets (n_docs + 1) into the column blob, 8-byte aligned
+#   blobs   : per column, concatenated utf-8 values
+# Columns are the docstore id, the page content and the JSON encoded metadata,
+# row i is the document stored at position i of the FAISS index.
+MAGIC = b"DOCS"
+VERSION = 1
+HEADER = struct.Struct("<4sIQI")
+COLUMNS = ("id", "page_content", "metadata")
+
+def _align(offset: int) -> int:
+    """Round an offset up to the next multiple of 8"""
+    return (offset + 7) // 8 * 8
+
+class PositionMap(Mapping):
+    """
+    Identity mapping position -> position, used as index_to_docstore_id
+    when the docstore is addressed by FAISS position
+
+    Args:
+        size: number of vectors in the FAISS index
+    """
+    def __init__(self, size: int):
+        self.size = size
+
+    def __getitem__(self, position: int) -> int:
+        if not 0 <= position < self.size:
+            raise KeyError(position)
+        return position
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self.size))
+
+    def __len__(self) -> int:
+        return self.size
+
+class ColumnarDocstore(Docstore):
+    """
+    Read-only docstore over a memory-mapped columnar file
+
+    Only the documents returned by a query are decoded, nothing else of the
+    file is read into memory.
+
+    Args:
+        path: docstore file written by ColumnarDocstore.write
+    """
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            magic, version, n_docs, n_columns = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a columnar docstore file")
+        if version != VERSION or n_columns != len(COLUMNS):
+            raise ValueError(f"Unsupported docstore version {version} in {path}")
+
+        self.n_docs = n_docs
+        self._data = np.memmap(path, dtype=np.uint8, mode="r")
+        self._offsets = []
+        offset = HEADER.size
+        for _ in COLUMNS:
+            offset = _align(offset)
+            self._offsets.append(np.memmap(path, dtype=np.int64, mode="r", offset=offset, shape=(n_docs + 1,)))
+            offset += 8 * (n_docs + 1)
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def _value(self, column: int, position: int) -> str:
+        """Decode one value of a column"""
+        offsets = self._offsets[column]
+        return bytes(self._data[offsets[position]:offsets[position + 1]]).decode("utf-8")
+
+    def search(self, search: Union[int, str]) -> Union[str, Document]:
+        """
+        Materialize the document stored at a FAISS position
+
+        Args:
+            search: position of the document in the FAISS index
+
+        Returns:
+            Document: The document, or an error message if out of range
+        """
+        position = int(search)
+        if not 0 <= position < self.n_docs:
+            return f"ID {search} not found."
+        return Document(
+            id=self._value(0, position),
+            page_content=self._value(1, position),
+            metadata=json.loads(self._value(2, position)),
+        )
+
+    @staticmethod
+    def write(path: str, documents: List[Document], ids: List[str]) -> None:
+        """
+        Write documents in FAISS position order
+
+        Args:
+            path (str): Destination file
+            documents (list): Documents, document i is at position i of the FAISS index
+            ids (list): Docstore id of each document
+        """
+        columns = [
+            [str(_id).encode("utf-8") for _id in ids],
+            [doc.page_content.encode("utf-8") for doc in documents],
+            [json.dumps(doc.metadata, default=str).encode("utf-8") for doc in documents],
+        ]
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(documents), len(COLUMNS)))
+            # Offset tables point into the blobs that follow them
+            blob_start = HEADER.size
+            for _ in COLUMNS:
+                blob_start = _align(blob_start) + 8 * (len(documents) + 1)
+            for values in columns:
+                f.write(b"\0" * (_align(f.tell()) - f.tell()))
+                offsets = np.zeros(len(values) + 1, dtype=np.int64)
+                np.cumsum([len(value) for value in values], out=offsets[1:])
+                f.write((offsets + blob_start).tobytes())
+                blob_start += int(offsets[-1])
+            for values in columns:
+                f.write(b"".join(values))
+        os.replace(tmp_path, path)
@@ -0,0 +1,113 @@
+import faiss
+import numpy as np
+
+# Supported FAISS index types
+INDEX_TYPES = ("flat", "hnsw", "ivfpq", "sq8")
+
+def index_type_of(index: faiss.Index) -> str:
+    """
+    Detect the type of a FAISS index
+
+    Args:
+        index (faiss.Index): The FAISS index
+
+    Returns:
+        str: One of INDEX_TYPES
+    """
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivfpq"
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        return "sq8"
+    return "flat"
+
+def factory_string(index_type: str, dim: int, n_vectors: int, params: dict) -> str:
+    """
+    Build the faiss.index_factory description of an index type
+
+    Args:
+        index_type (str): One of INDEX_TYPES
+        dim (int): Dimension of the vectors
+        n_vectors (int): Number of vectors the index is trained on
+        params (dict): Index parameters from the configuration
+
+    Returns:
+        str: The index factory description
+    """
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "hnsw":
+        return f"HNSW{params['hnsw_m']},Flat"
+    if index_type == "sq8":
+        return "SQ8"
+    if index_type == "ivfpq":
+        if dim % params["pq_m"] != 0:
+            raise ValueError(f"pq_m={params['pq_m']} must divide the embedding dimension {dim}")
+        # Keep enough training points per centroid on small corpora
+        nlist = max(1, min(params["ivf_nlist"], int(4 * np.sqrt(n_vectors))))
+        return f"IVF{nlist},PQ{params['pq_m']}x{params['pq_nbits']}"
+    raise ValueError(f"Unknown FAISS index type: {index_type}, expected one of {INDEX_TYPES}")
+
+def build_index(vectors: np.ndarray, index_type: str, metric: int, params: dict) -> faiss.Index:
+    """
+    Train (where needed) and fill a FAISS index of the given type
+
+    Args:
+        vectors (np.ndarray): float32 matrix, one row per vector
+        index_type (str): One of INDEX_TYPES
+        metric (int): faiss.METRIC_L2 or faiss.METRIC_INNER_PRODUCT
+        params (dict): Index parameters from the configuration
+
+    Returns:
+        faiss.Index: The filled index, flat if there are too few vectors to train
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n_vectors, dim = vectors.shape
+    if index_type == "ivfpq" and n_vectors < 2 ** params["pq_nbits"]:
+        print(f"Only {n_vectors} vectors, not enough to train IVF-PQ, keeping a flat index")
+        index_type = "flat"
+
+    index = faiss.index_factory(dim, factory_string(index_type, dim, n_vectors, params), metric)
+    if index_type == "hnsw":
+        index.hnsw.efConstruction = params["hnsw_ef_construction"]
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    apply_search_params(index, params)
+    return index
+
+def flat_vectors(index: faiss.Index) -> np.ndarray:
+    """
+    Read back every vector of a flat or HNSW index, which store them exactly
+
+    Args:
+        index (faiss.Index): The FAISS index
+
+    Returns:
+        np.ndarray: float32 matrix, one row per vector
+    """
+    if index_type_of(index) not in ("flat", "hnsw"):
+        raise ValueError("Only flat and HNSW indexes can be reconstructed exactly")
+    if index.ntotal == 0:
+        return np.empty((0, index.d), dtype=np.float32)
+    return index.reconstruct_n(0, index.ntotal)
+
+def apply_search_params(index: faiss.Index, params: dict) -> None:
+    """
+    Set query-time parameters (HNSW efSearch, IVF nprobe) of an index
+
+    Args:
+        index (faiss.Index): The FAISS index
+        params (dict): Index parameters from the configuration
+    """
+    index_type = index_type_of(index)
+    if index_type == "hnsw":
+        index.hnsw.efSearch = params["hnsw_ef_search"]
+    elif index_type == "ivfpq":
+        faiss.extract_index_ivf(index).nprobe = params["ivf_nprobe"]
+
+def index_params(config: dict) -> dict:
+    """Collect the FAISS index parameters from the configuration"""
+    keys = ("hnsw_m", "hnsw_ef_construction", "hnsw_ef_search", "ivf_nlist", "ivf_nprobe", "pq_m", "pq_nbits")
+    return {key: config[key] for key in keys}
@@ -0,0 +1,133 @@
+import os
+import json
+import uuid
+import hashlib
+from datetime import datetime, timezone
+from typing import Optional
+
+# Layout version of the manifest itself
+MANIFEST_VERSION = 1
+# Local record of verified checksums, a dot file so it is left out of manifests
+CHECKSUM_CACHE_FILE = ".checksums.json"
+
+def file_sha256(path: str) -> str:
+    """
+    Hash a file in 1 MB blocks
+
+    Args:
+        path (str): Local file
+
+    Returns:
+        str: sha256 hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(2 ** 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def new_version_id() -> str:
+    """Build a sortable, unique index version id"""
+    return f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{uuid.uuid4().hex[:8]}"
+
+def build_manifest(db_path: str, keyword_path: str, params: dict) -> dict:
+    """
+    Describe a built index: version, build parameters and file checksums
+
+    Args:
+        db_path (str): Directory of the FAISS vector database
+        keyword_path (str): Path of the keyword index file
+        params (dict): Embedding model, chunk and index parameters
+
+    Returns:
+        dict: The manifest
+    """
+    files = {}
+    for root, _, names in os.walk(db_path):
+        for name in names:
+            if name.startswith("."):
+                continue
+            path = os.path.join(root, name)
+            rel_path = os.path.relpath(path, db_path).replace("\\", "/")
+            files[rel_path] = {"sha256": file_sha256(path), "size": os.path.getsize(path)}
+
+    return {
+        "manifest_version": MANIFEST_VERSION,
+        "version": new_version_id(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "params": params,
+        "files": files,
+        "keyword_index": {"sha256": file_sha256(keyword_path), "size": os.path.getsize(keyword_path)},
+    }
+
+def verify_manifest(manifest: dict, db_path: str, keyword_path: str, cache_path: Optional[str] = None) -> bool:
+    """
+    Check that local files match the checksums of a manifest
+
+    With a cache_path, the sha256 of every file is recorded with its size and
+    mtime, and only files written since (downloaded or replaced) are hashed
+    again, so a restart or hot swap does not read the whole index back.
+
+    Args:
+        manifest (dict): The manifest
+        db_path (str): Directory of the FAISS vector database
+        keyword_path (str): Path of the keyword index file
+        cache_path (str): JSON file of the checksums already computed, None to hash every file
+
+    Returns:
+        bool: True if every file is present with the expected size and sha256
+    """
+    cache = load_checksum_cache(cache_path) if cache_path else {}
+    expected = [(os.path.join(db_path, rel_path), entry) for rel_path, entry in manifest["files"].items()]
+    expected.append((keyword_path, manifest["keyword_index"]))
+    verified = True
+    for path, entry in expected:
+        if not os.path.exists(path) or os.path.getsize(path) != entry["size"]:
+            verified = False
+            break
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        cached = cache.get(key)
+        if cached is None or cached["size"] != stat.st_size or cached["mtime_ns"] != stat.st_mtime_ns:
+            cached = cache[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_sha256(path)}
+        if cached["sha256"] != entry["sha256"]:
+            verified = False
+            break
+    if cache_path:
+        save_checksum_cache(cache_path, cache)
+    return verified
+
+def load_checksum_cache(path: str) -> dict:
+    """Read the checksums computed by verify_manifest, empty if missing or unreadable"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_checksum_cache(path: str, cache: dict) -> None:
+    """Write the checksums computed by verify_manifest atomically"""
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+def read_remote_manifest(s3_client, bucket: str, key: str) -> Optional[dict]:
+    """
+    Read the manifest published next to the index in S3
+
+    Args:
+        s3_client: boto3 S3 client
+        bucket (str): S3 bucket name
+        key (str): S3 key of the manifest
+
+    Returns:
+        dict: The manifest, or None if it does not exist
+    """
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=key)
+    except s3_client.exceptions.NoSuchKey:
+        return None
+    manifest = json.loads(response["Body"].read().decode("utf-8"))
+    if manifest.get("manifest_version") != MANIFEST_VERSION:
+        return None
+    return manifest
@@ -0,0 +1,195 @@
+import os
+import json
+import struct
+import numpy as np
+from collections import Counter
+from typing import Callable, List, Tuple
+
+# Binary layout:
+#   header   : magic, version, n_docs, n_terms, n_postings, meta length
+#   meta     : JSON with the term dictionary and BM25 parameters
+#   arrays   : term offsets (int64, n_terms + 1), postings doc ids (int32),
+#              postings term frequencies (float32), idf (float32, n_terms),
+#              document length norms (float32, n_docs), each 8-byte aligned
+MAGIC = b"KWIX"
+VERSION = 1
+HEADER = struct.Struct("<4sIIIQQ")
+
+def default_tokenizer(text: str) -> List[str]:
+    """Split text on whitespace, same as the langchain BM25Retriever default"""
+    return text.split()
+
+def _align(offset: int) -> int:
+    """Round an offset up to the next multiple of 8"""
+    return (offset + 7) // 8 * 8
+
+class KeywordIndex:
+    """
+    Inverted-index BM25 (Okapi) keyword search over the chunks of the vector database
+
+    Document ids are positions in the FAISS index, postings are numpy arrays
+    so a saved index can be memory-mapped, and a query only scores the
+    postings of its terms.
+
+    Args:
+        terms: term dictionary, term -> term id
+        term_offsets: start of the postings of each term, plus the end
+        postings_doc: document id of each posting
+        postings_tf: term frequency of each posting
+        idf: inverse document frequency of each term
+        doc_norm: k1 * (1 - b + b * doc length / average doc length) of each document
+        k1: BM25 term frequency saturation
+        tokenizer: function splitting text into terms
+    """
+    def __init__(self, terms: dict, term_offsets: np.ndarray, postings_doc: np.ndarray, postings_tf: np.ndarray,
+                 idf: np.ndarray, doc_norm: np.ndarray, k1: float, tokenizer: Callable = default_tokenizer):
+        self.terms = terms
+        self.term_offsets = term_offsets
+        self.postings_doc = postings_doc
+        self.postings_tf = postings_tf
+        self.idf = idf
+        self.doc_norm = doc_norm
+        self.k1 = k1
+        self.tokenizer = tokenizer
+
+    @property
+    def n_docs(self) -> int:
+        """Number of indexed documents"""
+        return len(self.doc_norm)
+
+    @classmethod
+    def build(cls, texts: List[str], k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25, tokenizer: Callable = default_tokenizer) -> "KeywordIndex":
+        """
+        Build the index, scores match rank_bm25.BM25Okapi
+
+        Args:
+            texts (list): Text of each document, in FAISS index order
+            k1 (float): Term frequency saturation
+            b (float): Document length normalization
+            epsilon (float): Floor of negative idf, as a fraction of the average idf
+            tokenizer: Function splitting text into terms
+
+        Returns:
+            KeywordIndex: The built index
+        """
+        postings = {}
+        doc_len = np.zeros(len(texts), dtype=np.float32)
+        for doc_id, text in enumerate(texts):
+            tokens = tokenizer(text)
+            doc_len[doc_id] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append((doc_id, tf))
+
+        vocabulary = sorted(postings)
+        lengths = np.array([len(postings[term]) for term in vocabulary], dtype=np.int64)
+        term_offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=term_offsets[1:])
+        pairs = [pair for term in vocabulary for pair in postings[term]]
+        postings_doc = np.array([doc_id for doc_id, _ in pairs], dtype=np.int32)
+        postings_tf = np.array([tf for _, tf in pairs], dtype=np.float32)
+
+        # Okapi idf, negative values floored to epsilon * average idf
+        n_docs = len(texts)
+        idf = np.log(n_docs - lengths + 0.5) - np.log(lengths + 0.5)
+        if len(idf):
+            idf[idf < 0] = epsilon * idf.mean()
+        avgdl = doc_len.mean() if n_docs else 0.0
+        doc_norm = k1 * (1 - b + b * doc_len / max(avgdl, 1e-9))
+
+        terms = {term: term_id for term_id, term in enumerate(vocabulary)}
+        return cls(terms, term_offsets, postings_doc, postings_tf, idf.astype(np.float32), doc_norm.astype(np.float32), k1, tokenizer)
+
+    def search(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score documents containing at least one query term
+
+        Args:
+            query (str): The user's query
+            k (int): Number of documents to return
+
+        Returns:
+            tuple: (document ids, BM25 scores), best first
+        """
+        doc_parts, score_parts = [], []
+        for term in self.tokenizer(query):
+            term_id = self.terms.get(term)
+            if term_id is None:
+                continue
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            docs = np.asarray(self.postings_doc[start:end])
+            tf = np.asarray(self.postings_tf[start:end])
+            doc_parts.append(docs)
+            score_parts.append(self.idf[term_id] * tf * (self.k1 + 1) / (tf + self.doc_norm[docs]))
+
+        if not doc_parts:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+        # Sum contributions of every term per touched document
+        docs, inverse = np.unique(np.concatenate(doc_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts))
+        if len(docs) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(docs))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return docs[top], scores[top]
+
+    def save(self, path: str) -> None:
+        """
+        Save the index in the versioned binary format
+
+        Args:
+            path (str): Destination file
+        """
+        terms = sorted(self.terms, key=self.terms.get)
+        meta = json.dumps({"terms": terms, "k1": self.k1}).encode("utf-8")
+        arrays = [
+            self.term_offsets.astype(np.int64),
+            self.postings_doc.astype(np.int32),
+            self.postings_tf.astype(np.float32),
+            self.idf.astype(np.float32),
+            self.doc_norm.astype(np.float32),
+        ]
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.n_docs, len(terms), len(self.postings_doc), len(meta)))
+            f.write(meta)
+            for array in arrays:
+                f.write(b"\0" * (_align(f.tell()) - f.tell()))
+                f.write(np.ascontiguousarray(array).tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True, tokenizer: Callable = default_tokenizer) -> "KeywordIndex":
+        """
+        Load an index saved by save()
+
+        Args:
+            path (str): Index file
+            mmap (bool): Memory-map the arrays instead of reading them
+
+        Returns:
+            KeywordIndex: The loaded index
+        """
+        with open(path, "rb") as f:
+            magic, version, n_docs, n_terms, n_postings, meta_len = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a keyword index file")
+            if version != VERSION:
+                raise ValueError(f"Unsupported keyword index version {version} in {path}")
+            meta = json.loads(f.read(meta_len).decode("utf-8"))
+
+        shapes = [(np.int64, n_terms + 1), (np.int32, n_postings), (np.float32, n_postings), (np.float32, n_terms), (np.float32, n_docs)]
+        arrays = []
+        offset = HEADER.size + meta_len
+        for dtype, count in shapes:
+            offset = _align(offset)
+            if mmap and count:
+                arrays.append(np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,)))
+            else:
+                arrays.append(np.fromfile(path, dtype=dtype, count=count, offset=offset))
+            offset += np.dtype(dtype).itemsize * count
+
+        terms = {term: term_id for term_id, term in enumerate(meta["terms"])}
+        return cls(terms, *arrays, k1=meta["k1"], tokenizer=tokenizer)
@@ -0,0 +1,65 @@
+import os
+import sys
+import streamlit as st
+# Check if running on Streamlit Cloud
+if "mnt" in os.getcwd():
+    os.chdir("/mount/src/linkedin-chatbot-job-mnt-team/")
+    sys.path.append("/mount/src/linkedin-chatbot-job-mnt-team/")
+from streamlit_app.helpers.processing_text import escape_for_js
+
+def message_html(message: dict) -> str:
+    """
+    Build the HTML fragment of a chat message
+
+    Args:
+        message (dict): Message with "role" and "content"
+
+    Returns:
+        str: Assistant messages get a copy button, user messages a plain container
+    """
+    if message["role"] == "assistant":
+        escaped_content = escape_for_js(message["content"])
+        return f"""
+                <div class="message-container">
+                    {message["content"]}
+                    <button class="copy-button" onclick="copyToClipboard('{escaped_content}')">
+                        📋 Copy
+                    </button>
+                </div>
+                """
+    return f"""
+                <div class="user-message">
+                    {message["content"]}
+                </div>
+                """
+
+def cached_message_html(index: int, message: dict) -> str:
+    """
+    Return the HTML fragment of a history message, built once per content
+
+    Fragments are kept in st.session_state.rendered_messages by message
+    index, with the role and content hash they were built from.
+
+    Args:
+        index (int): Position of the message in st.session_state.messages
+        message (dict): Message with "role" and "content"
+
+    Returns:
+        str: The HTML fragment
+    """
+    if "rendered_messages" not in st.session_state:
+        st.session_state.rendered_messages = {}
+    cache = st.session_state.rendered_messages
+
+    # str caches its hash, so this is cheap on every rerun
+    key = (message["role"], hash(message["content"]))
+    entry = cache.get(index)
+    if entry is None or entry[0] != key:
+        entry = (key, message_html(message))
+        cache[index] = entry
+    return entry[1]
+
+def reset_message_cache() -> None:
+    """Forget rendered fragments and the history window, when another chat is shown"""
+    st.session_state.rendered_messages = {}
+    st.session_state.pop("history_window", None)
@@ -0,0 +1,235 @@
+import os
+import json
+import shutil
+import hashlib
+import boto3
+from typing import Dict, Optional
+from boto3.s3.transfer import TransferConfig
+from concurrent.futures import ThreadPoolExecutor
+
+# Local record of the ETag/size of every synced file, one per directory
+MANIFEST_FILE = ".s3_manifest.json"
+STAGING_DIR = ".staging"
+
+def local_etag(path: str, chunksize: int, threshold: int) -> str:
+    """
+    Compute the ETag S3 gives a file uploaded with the same TransferConfig
+
+    Args:
+        path (str): Local file
+        chunksize (int): Multipart chunk size in bytes
+        threshold (int): Multipart threshold in bytes
+
+    Returns:
+        str: md5 for single part uploads, md5 of part md5s + "-parts" otherwise
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        if size < threshold:
+            return hashlib.md5(f.read()).hexdigest()
+        digests = [hashlib.md5(chunk).digest() for chunk in iter(lambda: f.read(chunksize), b"")]
+    return f"{hashlib.md5(b''.join(digests)).hexdigest()}-{len(digests)}"
+
+class S3Sync:
+    """
+    Conditional, parallel transfer of files between S3 and a local directory
+
+    Unchanged files (same ETag and size as recorded in the local manifest) are
+    skipped, changed files are transferred concurrently, downloads are written
+    into a staging directory and moved into place once all succeeded.
+
+    Args:
+        bucket: S3 bucket name
+        max_workers: number of files transferred at once
+        multipart_threshold_mb: size from which transfers use multipart
+        multipart_chunksize_mb: size of each multipart part
+    """
+    def __init__(self, bucket: str, max_workers: int = 8, multipart_threshold_mb: int = 64, multipart_chunksize_mb: int = 16, s3_client=None):
+        self.bucket = bucket
+        self.max_workers = max_workers
+        self.s3_client = s3_client or boto3.client("s3")
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold_mb * 2 ** 20,
+            multipart_chunksize=multipart_chunksize_mb * 2 ** 20,
+            max_concurrency=max_workers
+        )
+
+    @staticmethod
+    def _load_manifest(local_dir: str) -> Dict[str, dict]:
+        """Read the manifest of a local directory"""
+        path = os.path.join(local_dir, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    @staticmethod
+    def _save_manifest(local_dir: str, manifest: Dict[str, dict]) -> None:
+        """Write the manifest of a local directory atomically"""
+        path = os.path.join(local_dir, MANIFEST_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def _is_current(local_dir: str, rel_path: str, entry: Optional[dict], etag: str, size: int) -> bool:
+        """Check a local file against the remote ETag and size"""
+        local_path = os.path.join(local_dir, rel_path)
+        return (
+            entry is not None
+            and entry["etag"] == etag
+            and entry["size"] == size
+            and os.path.exists(local_path)
+            and os.path.getsize(local_path) == size
+        )
+
+    def _download_all(self, local_dir: str, objects: Dict[str, dict]) -> None:
+        """
+        Download objects into the staging directory then move them into place
+
+        Args:
+            local_dir (str): Destination directory
+            objects (dict): relative path -> {"key", "etag", "size"}
+        """
+        staging_dir = os.path.join(local_dir, STAGING_DIR)
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+        def download(rel_path: str) -> None:
+            staged_path = os.path.join(staging_dir, rel_path)
+            os.makedirs(os.path.dirname(staged_path), exist_ok=True)
+            self.s3_client.download_file(self.bucket, objects[rel_path]["key"], staged_path, Config=self.transfer_config)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                # list() re-raises the first failed download
+                list(pool.map(download, objects))
+
+            # Every file is complete, swap them in (rename is atomic per file)
+            for rel_path in objects:
+                local_path = os.path.join(local_dir, rel_path)
+                os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                os.replace(os.path.join(staging_dir, rel_path), local_path)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def download_prefix(self, prefix: str, local_dir: str) -> dict:
+        """
+        Mirror an S3 prefix into a local directory with a single LIST when nothing changed
+
+        Args:
+            prefix (str): S3 key prefix (folder path)
+            local_dir (str): Local directory
+
+        Returns:
+            dict: Number of downloaded, skipped and deleted files
+        """
+        os.makedirs(local_dir, exist_ok=True)
+        manifest = self._load_manifest(local_dir)
+
+        remote = {}
+        for page in self.s3_client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                if obj["Key"].endswith("/"):
+                    continue
+                rel_path = os.path.relpath(obj["Key"], prefix).replace("\\", "/")
+                remote[rel_path] = {"key": obj["Key"], "etag": obj["ETag"].strip('"'), "size": obj["Size"]}
+
+        changed = {
+            rel_path: obj for rel_path, obj in remote.items()
+            if not self._is_current(local_dir, rel_path, manifest.get(rel_path), obj["etag"], obj["size"])
+        }
+        # Raises before anything is deleted if a download fails
+        if changed:
+            self._download_all(local_dir, changed)
+
+        # Drop local files that were removed from the prefix, once the new set is in place.
+        # An empty listing (wrong prefix, publish in progress, missing permission) deletes nothing
+        deleted = []
+        if remote:
+            deleted = [
+                rel_path for rel_path, entry in manifest.items()
+                if entry.get("prefix") == prefix and rel_path not in remote
+            ]
+        for rel_path in deleted:
+            local_path = os.path.join(local_dir, rel_path)
+            if os.path.exists(local_path):
+                os.remove(local_path)
+            manifest.pop(rel_path, None)
+
+        for rel_path, obj in remote.items():
+            manifest[rel_path] = {"etag": obj["etag"], "size": obj["size"], "prefix": prefix}
+        self._save_manifest(local_dir, manifest)
+        return {"downloaded": len(changed), "skipped": len(remote) - len(changed), "deleted": len(deleted)}
+
+    def download_file(self, key: str, local_path: str) -> bool:
+        """
+        Download a single object if its ETag or size changed
+
+        Args:
+            key (str): S3 key
+            local_path (str): Local file
+
+        Returns:
+            bool: True if the file was downloaded, False if it was current
+        """
+        local_dir, name = os.path.split(local_path)
+        os.makedirs(local_dir, exist_ok=True)
+        manifest = self._load_manifest(local_dir)
+
+        head = self.s3_client.head_object(Bucket=self.bucket, Key=key)
+        etag, size = head["ETag"].strip('"'), head["ContentLength"]
+        if self._is_current(local_dir, name, manifest.get(name), etag, size):
+            return False
+
+        self._download_all(local_dir, {name: {"key": key}})
+        manifest[name] = {"etag": etag, "size": size}
+        self._save_manifest(local_dir, manifest)
+        return True
+
+    def upload_directory(self, local_dir: str, prefix: str) -> dict:
+        """
+        Upload the files of a directory whose content differs from S3
+
+        Args:
+            local_dir (str): Local directory
+            prefix (str): S3 key prefix (folder path)
+
+        Returns:
+            dict: Number of uploaded and skipped files
+        """
+        remote = {}
+        for page in self.s3_client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                remote[obj["Key"]] = obj["ETag"].strip('"')
+
+        to_upload = []
+        n_files = 0
+        for root, dirs, files in os.walk(local_dir):
+            dirs[:] = [d for d in dirs if d != STAGING_DIR]
+            for file in files:
+                if file.startswith(MANIFEST_FILE):
+                    continue
+                n_files += 1
+                local_path = os.path.join(root, file)
+                s3_key = os.path.join(prefix, os.path.relpath(local_path, local_dir)).replace("\\", "/")
+                etag = local_etag(local_path, self.transfer_config.multipart_chunksize, self.transfer_config.multipart_threshold)
+                if remote.get(s3_key) != etag:
+                    to_upload.append((local_path, s3_key))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            list(pool.map(lambda item: self.upload_file(*item), to_upload))
+        return {"uploaded": len(to_upload), "skipped": n_files - len(to_upload)}
+
+    def upload_file(self, local_path: str, key: str) -> None:
+        """
+        Upload a single file (multipart above the threshold)
+
+        Args:
+            local_path (str): Local file
+            key (str): S3 key
+        """
+        print(f"Uploading {local_path} to s3://{self.bucket}/{key}")
+        self.s3_client.upload_file(local_path, self.bucket, key, Config=self.transfer_config)
@@ -1,4 +1,3 @@
-from langchain_groq import ChatGroq
 import streamlit as st
 import os
 import sys
@@ -6,13 +5,14 @@ import pymysql
 if "mnt" in os.getcwd():
     os.chdir("/mount/src/linkedin-chatbot-job-mnt-team/")
     sys.path.append("/mount/src/linkedin-chatbot-job-mnt-team/")
-api_key = st.secrets["GROQ_API_KEY"]
 class Config:
     _config = {
         # utilization
         "time_sleep": 0.02,
         "max_word": 15,
         "default_name": "New Chat",
+        "sidebar_page_size": 30, # chats per sidebar page, "Load more" fetches the next one
+        "history_window": 20, # messages drawn on each rerun, "Load earlier messages" adds as many
         "app_folder": "streamlit_app",
         "folder_css": "streamlit_app/static/styles.css",
         "folder_js": "streamlit_app/static/scripts.js",
@@ -26,6 +26,12 @@ class Config:
         "max_tokens": 1500,
         "assistant_message_row": 3,
         "defaul_model_token": "cl100k_base",
+        "stream_tokens": True, # show the answer token by token while the LLM generates it
+        "stream_fps": 15, # maximum updates per second of a streamed answer, 0 for every token
+        "qa_trace": False, # log a structured trace of every QA chain run
+        "query_cache_size": 256, # 0 to disable the answer cache
+        "query_cache_ttl": 3600, # seconds, 0 for no limit
+        "query_cache_similarity": 0.95, # cosine similarity of a semantic hit, 0 for exact matches only
 
         # Database AIven
         # "DB_config": {
@@ -43,25 +49,79 @@ class Config:
         # "table_name": st.secrets["TABLE_AIVEN"],
         "batch_size": 1000,
         "db_uri": st.secrets["MONGO_URI"],
+        "mongo_max_pool_size": 20,
+        "mongo_min_pool_size": 0,
+        "mongo_server_selection_timeout_ms": 5000,
+        "message_storage": "collection", # collection: one document per message in chat_messages, embedded: messages array in the chat
+        "message_page_size": 50, # messages loaded when opening a chat
+        "write_behind": True, # save chat turns on a background thread
+        "write_retries": 3,
+        "write_retry_delay": 0.5, # seconds, doubled after each retry
 
         # Vector database
         "vector_db_path": "streamlit_app/db/vector_db",
         "model_name_vectordb": "sentence-transformers/all-MiniLM-L6-v2",
         "cache_folder": "streamlit_app/db/vector_db/",
         "k_document": 3,
-        "bm25_file": "bm25.pkl",
+        "bm25_file": "keyword_index.bin",
         "weight_semantic": 0.7,
+        "rrf_c": 60, # rank constant of the reciprocal rank fusion
+        "retrieval_workers": 8, # threads running the semantic branch of hybrid searches
+        "reranker": "cohere", # cohere, cross_encoder (local CPU model) or none
+        "rerank_top_n": 5, # chunks kept after reranking, with job_aggregation context_max_jobs jobs are kept instead
+        "cross_encoder_model": "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        "cross_encoder_backend": "torch", # torch, or onnx for the file below
+        "cross_encoder_onnx_file": "onnx/model.onnx", # onnx/model_qint8_avx512_vnni.onnx on CPUs with AVX512-VNNI
+        "rerank_batch_size": 16, # query/chunk pairs scored per cross-encoder call
+        "rerank_cache_size": 4096, # cached (query, chunk) scores, 0 to disable
+        "retrieval_planner": True, # size candidate pools per query, dedupe jobs, cap reranking
+        "retrieval_min_k": 3, # candidates kept per branch when the top scores stand out
+        "retrieval_max_k": 10, # candidates fetched per branch, all kept for broad queries
+        "broad_query_terms": 2, # queries with at most this many specific terms are broad
+        "score_separation": 0.3, # score drop after retrieval_min_k, share of the score range
+        "rerank_budget_ms": 300, # reranker latency per query, 0 for no cap; a fixed per-call cost above it (Cohere round trip) is never cut
+        "rerank_min_docs": 5, # candidates always reranked
+        "job_aggregation": True, # one context document per job: header once + best chunk
+        "context_max_jobs": 5, # jobs stuffed into the prompt
+        "context_packing": True, # fit the stuffed context into context_token_budget
+        "context_token_budget": 3000, # context tokens in the QA prompt (model window 8192, answer max_tokens)
+        "context_min_tail_tokens": 50, # smallest truncated last document worth keeping
         "algorithm_search_keyword": "bm25",
-        "dir_bm25": "vector_database/bm25.pkl",
+        "dir_bm25": "vector_database/keyword_index.bin",
         "chunk_size": 1000,
         "chunk_overlap": 100,
         "batch_size": 32,
         "device": "cpu",
         "distance": "COSINE",
         "normal_embeddings": True,
-        "s3_key": "vector_database/bm25.pkl",
+        "s3_key": "vector_database/keyword_index.bin",
+        "keyword_k": 5,
+        "bm25_k1": 1.5,
+        "bm25_b": 0.75,
+        "docstore_file": "docstore.bin",
+        "manifest_file": "manifest.json",
+        "manifest_key": "vector_database/manifest.json",
+        "index_poll_interval": 300, # seconds, 0 to disable hot-swapping new indexes
+        "vector_store_load_mode": "mmap", # mmap: memory-mapped index and docstore, full: FAISS.load_local
+        "faiss_index_type": "flat", # flat, hnsw, ivfpq, sq8
+        "hnsw_m": 32,
+        "hnsw_ef_construction": 200,
+        "hnsw_ef_search": 64,
+        "ivf_nlist": 1024,
+        "ivf_nprobe": 16,
+        "pq_m": 48,
+        "pq_nbits": 8,
+        "incremental_build": True,
+        "fingerprint_file": "job_fingerprints.json",
+        "csv_chunksize": 500,
+        "embedding_cache_dir": "vector_database/embedding_cache", # empty to disable
+        "embedding_workers": 0, # 0: cpu count / threads_per_worker
+        "threads_per_worker": 2,
 
         # AWS service
+        "s3_max_workers": 8,
+        "s3_multipart_threshold_mb": 64,
+        "s3_multipart_chunksize_mb": 16,
         "bucket_vectordb": st.secrets["S3_BUCKET_VECTORDB"],
         "prefix_vectodb": st.secrets["PREFIX_VECTORDB"],
         "bucket_job": st.secrets["S3_BUCKET_JOB"]
@@ -70,14 +130,7 @@ class Config:
     @classmethod
     def initialize_session_states(cls):
         """Initialize all session state variables"""
-        # Model configurations
-        if "llm" not in st.session_state:
-            st.session_state.llm = ChatGroq(
-                api_key=api_key,
-                temperature=cls.get_config()["temperature"], 
-                model_name=cls.get_config()["model_name"],
-            )
-
+        # Model configurations, the LLM client itself is shared by the chat engine
         if "model" not in st.session_state:
             st.session_state.model = cls.get_config()["model_name"]
 
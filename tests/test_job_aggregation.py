@@ -0,0 +1,45 @@
+from langchain_core.documents import Document
+from langchain.retrievers.document_compressors import DocumentCompressorPipeline
+
+from streamlit_app.handlers.chat_modules import retriever_handler
+from streamlit_app.handlers.chat_modules.reranker import CrossEncoderReranker
+from streamlit_app.handlers.chat_modules.job_aggregator import JobAggregator
+
+class ChunkOrderModel:
+    """Cross-encoder stand-in scoring the chunks of a job next to each other, best job first"""
+    def predict(self, pairs, **kwargs):
+        return [-float(text.split()[1]) - float(text.split()[3]) / 10 for _, text in pairs]
+
+def job_chunks(n_jobs: int = 8, chunks_per_job: int = 3):
+    """Chunks of n_jobs postings, several chunks per job"""
+    return [
+        Document(page_content=f"job {job} chunk {chunk} python developer", metadata={"job_url": f"https://jobs/{job}"})
+        for job in range(n_jobs)
+        for chunk in range(chunks_per_job)
+    ]
+
+def rerank_and_aggregate(top_n):
+    pipeline = DocumentCompressorPipeline(transformers=[
+        CrossEncoderReranker(model=ChunkOrderModel(), top_n=top_n),
+        JobAggregator(max_jobs=5),
+    ])
+    return pipeline.compress_documents(job_chunks(), "python developer")
+
+def test_five_distinct_jobs_reach_the_prompt():
+    documents = rerank_and_aggregate(top_n=None)
+    assert [document.metadata["job_url"] for document in documents] == [f"https://jobs/{job}" for job in range(5)]
+    assert all(document.metadata["job_chunks"] == 3 for document in documents)
+
+def test_chunk_level_top_n_starves_the_aggregator():
+    # Five reranked chunks only cover two jobs, the cut has to be made per job
+    assert len(rerank_and_aggregate(top_n=5)) == 2
+
+def test_handler_keeps_every_reranked_chunk_when_aggregating(monkeypatch):
+    top_ns = []
+    monkeypatch.setattr(retriever_handler, "job_aggregation", True)
+    monkeypatch.setattr(retriever_handler, "context_packing", False)
+    monkeypatch.setattr(retriever_handler, "build_reranker", lambda top_n: top_ns.append(top_n))
+    handler = retriever_handler.RetrieverHandler()
+    handler.executor.shutdown()
+    assert top_ns == [None]
+    assert handler.job_aggregator.max_jobs == retriever_handler.context_max_jobs
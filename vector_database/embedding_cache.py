@@ -0,0 +1,156 @@
+# Utilization
+import os
+import json
+import hashlib
+import numpy as np
+from typing import List, Optional
+from langchain_core.embeddings import Embeddings
+
+class EmbeddingCache:
+    """
+    Content-addressed, on-disk cache of embeddings
+
+    Vectors are appended to a raw float32 matrix that is read back through a
+    memory map, keys (sha256 of model name + normalization flag + text) are
+    appended to a text file whose line number is the row of the vector.
+
+    Args:
+        cache_dir: folder storing the matrix and the key index
+        model_name: embedding model, part of every key
+        normalize: whether embeddings are normalized, part of every key
+    """
+    def __init__(self, cache_dir: str, model_name: str, normalize: bool):
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        self.normalize = normalize
+        self.vectors_path = os.path.join(cache_dir, "vectors.f32")
+        self.keys_path = os.path.join(cache_dir, "keys.txt")
+        self.meta_path = os.path.join(cache_dir, "meta.json")
+        self.dim = None
+        self.rows = {}
+        self._matrix = None
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        """Read the key index and map the vector matrix, dropping what a crash left half written"""
+        n_rows = 0
+        keys = []
+        if os.path.exists(self.keys_path):
+            with open(self.keys_path, "r", encoding="utf-8") as f:
+                keys = f.read().split()
+        # meta.json is written last, without it the cache is empty
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self.dim = json.load(f)["dim"]
+            vectors_size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+            # Only trust rows whose vector and key were both fully written
+            n_rows = min(len(keys), vectors_size // (4 * self.dim))
+
+        # New rows are appended at the end of both files, so they must end at row n_rows
+        self._truncate(n_rows, keys)
+        self.rows = {key: row for row, key in enumerate(keys[:n_rows])}
+        self._map(n_rows)
+
+    def _truncate(self, n_rows: int, keys: List[str]) -> None:
+        """Cut vectors.f32 and keys.txt to their first n_rows rows"""
+        vectors_size = n_rows * 4 * self.dim if n_rows else 0
+        if os.path.exists(self.vectors_path) and os.path.getsize(self.vectors_path) != vectors_size:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(vectors_size)
+        if os.path.exists(self.keys_path) and len(keys) != n_rows:
+            with open(self.keys_path, "w", encoding="utf-8") as f:
+                f.write("".join(f"{key}\n" for key in keys[:n_rows]))
+
+    def _map(self, n_rows: int) -> None:
+        """Memory map the first n_rows vectors of the matrix"""
+        self._matrix = None
+        if n_rows:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(n_rows, self.dim))
+
+    def key(self, text: str) -> str:
+        """Build the cache key of a text"""
+        raw = f"{self.model_name}\0{int(self.normalize)}\0{text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up cached vectors
+
+        Args:
+            keys (list): Cache keys
+
+        Returns:
+            list: The cached vector of each key, or None on a miss
+        """
+        return [
+            self._matrix[self.rows[key]] if key in self.rows else None
+            for key in keys
+        ]
+
+    def add(self, keys: List[str], vectors: List[List[float]]) -> None:
+        """
+        Append new vectors to the cache
+
+        Args:
+            keys (list): Cache keys
+            vectors (list): Embedding of each key
+        """
+        new, seen = [], set()
+        for key, vector in zip(keys, vectors):
+            if key not in self.rows and key not in seen:
+                seen.add(key)
+                new.append((key, vector))
+        if not new:
+            return
+        matrix = np.asarray([vector for _, vector in new], dtype=np.float32)
+
+        first_write = self.dim is None
+        if first_write:
+            self.dim = matrix.shape[1]
+
+        # Vectors first, then keys: a crash in between leaves extra vectors, cut on the next load
+        with open(self.vectors_path, "ab") as f:
+            f.write(matrix.tobytes())
+        with open(self.keys_path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{key}\n" for key, _ in new))
+        # meta.json last: without it the files are an empty cache
+        if first_write:
+            with open(self.meta_path, "w", encoding="utf-8") as f:
+                json.dump({"dim": self.dim}, f)
+
+        start = len(self.rows)
+        for offset, (key, _) in enumerate(new):
+            self.rows[key] = start + offset
+        self._map(len(self.rows))
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that consults an EmbeddingCache before the model
+
+    Args:
+        embeddings: the underlying embedding model
+        cache: the on-disk embedding cache
+    """
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, only running the model on cache misses"""
+        keys = [self.cache.key(text) for text in texts]
+        vectors = self.cache.get(keys)
+        misses = [i for i, vector in enumerate(vectors) if vector is None]
+
+        if misses:
+            computed = self.embeddings.embed_documents([texts[i] for i in misses])
+            self.cache.add([keys[i] for i in misses], computed)
+            for i, vector in zip(misses, computed):
+                vectors[i] = vector
+
+        print(f"Embedding cache: {len(texts) - len(misses)} hits, {len(misses)} misses")
+        return [np.asarray(vector, dtype=np.float32).tolist() for vector in vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query with the underlying model"""
+        return self.embeddings.embed_query(text)
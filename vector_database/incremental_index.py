@@ -0,0 +1,140 @@
+# Utilization
+import os
+import json
+import hashlib
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+# Version of the fingerprint file layout
+FINGERPRINT_VERSION = 1
+
+def job_key(url: str) -> str:
+    """
+    Build a short, stable key for a job from its LinkedIn url
+
+    Args:
+        url (str): Url of the job
+
+    Returns:
+        str: Hex digest used as prefix of the chunk ids of this job
+    """
+    return hashlib.sha1(str(url).encode("utf-8")).hexdigest()[:16]
+
+def content_hash(text: str) -> str:
+    """
+    Hash the content of a job to detect changes between two scrapes
+
+    Args:
+        text (str): Job details
+
+    Returns:
+        str: sha256 hex digest of the text
+    """
+    return hashlib.sha256(str(text).encode("utf-8")).hexdigest()
+
+def fingerprint_jobs(df: pd.DataFrame) -> Dict[str, str]:
+    """
+    Fingerprint every job by its url and a content hash of job_details
+
+    Args:
+        df (pd.DataFrame): Jobs data, one row per posting
+
+    Returns:
+        dict: url -> content hash
+    """
+    return {
+        str(url): content_hash(details)
+        for url, details in zip(df["url"].to_numpy(), df["job_details"].to_numpy())
+    }
+
+def assign_chunk_ids(doc_chunks: list) -> List[str]:
+    """
+    Give every chunk a deterministic id "<job key>:<chunk number>"
+
+    Chunks of a job are contiguous after splitting, so a counter per url
+    is enough to number them.
+
+    Args:
+        doc_chunks (list): Chunked documents with "job_url" metadata
+
+    Returns:
+        list: One id per chunk, in the same order
+    """
+    counters = {}
+    ids = []
+    for chunk in doc_chunks:
+        url = str(chunk.metadata["job_url"])
+        number = counters.get(url, 0)
+        counters[url] = number + 1
+        ids.append(f"{job_key(url)}:{number}")
+    return ids
+
+def group_ids_by_job(doc_chunks: list, ids: List[str]) -> Dict[str, List[str]]:
+    """
+    Group chunk ids by the url of the job they come from
+
+    Args:
+        doc_chunks (list): Chunked documents with "job_url" metadata
+        ids (list): Chunk ids returned by assign_chunk_ids
+
+    Returns:
+        dict: url -> list of chunk ids
+    """
+    grouped = {}
+    for chunk, chunk_id in zip(doc_chunks, ids):
+        grouped.setdefault(str(chunk.metadata["job_url"]), []).append(chunk_id)
+    return grouped
+
+def load_fingerprints(path: str) -> Optional[dict]:
+    """
+    Load the fingerprints saved by the previous build
+
+    Args:
+        path (str): Path to the fingerprint file
+
+    Returns:
+        dict: The saved state, or None if missing or unreadable
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") != FINGERPRINT_VERSION:
+            print(f"Unsupported fingerprint version in {path}")
+            return None
+        return state
+    except Exception as e:
+        print(f"Failed to read fingerprints from {path}: {e}")
+        return None
+
+def save_fingerprints(path: str, jobs: Dict[str, dict], build_params: dict) -> None:
+    """
+    Save the fingerprints of the jobs stored in the index
+
+    Args:
+        path (str): Path to the fingerprint file
+        jobs (dict): url -> {"hash": content hash, "ids": chunk ids}
+        build_params (dict): Model and chunking parameters of the build
+    """
+    state = {"version": FINGERPRINT_VERSION, "params": build_params, "jobs": jobs}
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def plan_index_update(old_jobs: Dict[str, dict], new_hashes: Dict[str, str]) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Compare the indexed jobs with the latest scrape
+
+    Args:
+        old_jobs (dict): url -> {"hash", "ids"} of the previous build
+        new_hashes (dict): url -> content hash of the latest scrape
+
+    Returns:
+        tuple: (added urls, changed urls, removed urls)
+    """
+    added = [url for url in new_hashes if url not in old_jobs]
+    changed = [url for url, h in new_hashes.items() if url in old_jobs and old_jobs[url]["hash"] != h]
+    removed = [url for url in old_jobs if url not in new_hashes]
+    return added, changed, removed
@@ -0,0 +1,153 @@
+# Utilization
+import os
+import time
+import atexit
+import numpy as np
+import multiprocessing
+from typing import List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from langchain_core.embeddings import Embeddings
+
+# Embedding model of the current worker process
+_worker_model = None
+# Thread pools sized from the environment when a library is loaded
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+def _pin_worker_threads(threads: int) -> None:
+    """
+    Set the thread counts spawned workers inherit
+
+    A spawned worker imports numpy (and so OpenBLAS/MKL) while unpickling its
+    initializer, before that initializer runs: the limits have to be in the
+    environment of the parent when the workers start. The parent's own BLAS
+    is already loaded and keeps its thread count.
+
+    Args:
+        threads (int): Torch/BLAS threads of each worker
+    """
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+def _init_worker(model_name: str, batch_size: int, normalize: bool, threads: int) -> None:
+    """
+    Load one embedding model per worker with a pinned number of threads
+
+    Args:
+        model_name (str): Name of the HuggingFace model
+        batch_size (int): Encoding batch size
+        normalize (bool): Normalize embeddings
+        threads (int): Torch/BLAS threads of this worker, also pinned through the inherited environment
+    """
+    import torch
+    from langchain_huggingface import HuggingFaceEmbeddings
+    torch.set_num_threads(threads)
+
+    global _worker_model
+    _worker_model = HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={"device": "cpu"},
+        encode_kwargs={"batch_size": batch_size, "normalize_embeddings": normalize}
+    )
+
+def _embed_shard(texts: List[str]) -> tuple:
+    """
+    Embed one shard of texts in a worker
+
+    Returns:
+        tuple: (worker pid, float32 matrix, seconds spent)
+    """
+    start = time.perf_counter()
+    vectors = np.asarray(_worker_model.embed_documents(texts), dtype=np.float32)
+    return os.getpid(), vectors, time.perf_counter() - start
+
+class ParallelEmbeddings(Embeddings):
+    """
+    Shard documents across a process pool, one embedding model per worker
+
+    Shards are mapped in order, so results stream back in the same order as
+    the input texts and are concatenated into a single matrix.
+
+    Args:
+        model_name: HuggingFace model name
+        workers: number of worker processes
+        threads_per_worker: torch threads of each worker
+        batch_size: encoding batch size inside a worker
+        normalize: normalize embeddings
+        shard_size: number of texts sent to a worker at once
+    """
+    def __init__(self, model_name: str, workers: int, threads_per_worker: int, batch_size: int, normalize: bool, shard_size: Optional[int] = None):
+        self.model_name = model_name
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.batch_size = batch_size
+        self.normalize = normalize
+        self.shard_size = shard_size or batch_size * 4
+        self._pool = None
+        self._query_model = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Start the worker pool once and reuse it for every call"""
+        if self._pool is None:
+            # Workers are spawned lazily by map(), they all inherit this environment
+            _pin_worker_threads(self.threads_per_worker)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.batch_size, self.normalize, self.threads_per_worker)
+            )
+            atexit.register(self.close)
+        return self._pool
+
+    def close(self) -> None:
+        """Shut down the worker pool"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def embed_matrix(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts into a float32 matrix using every worker
+
+        Args:
+            texts (list): Texts to embed
+
+        Returns:
+            np.ndarray: One row per text, in input order
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        shards = [texts[i:i + self.shard_size] for i in range(0, len(texts), self.shard_size)]
+        stats = {}
+        matrices = []
+        start = time.perf_counter()
+        for pid, matrix, seconds in self._get_pool().map(_embed_shard, shards):
+            matrices.append(matrix)
+            chunks, busy = stats.get(pid, (0, 0.0))
+            stats[pid] = (chunks + len(matrix), busy + seconds)
+        self.report(stats, len(texts), time.perf_counter() - start)
+        return np.concatenate(matrices)
+
+    def report(self, stats: dict, total: int, elapsed: float) -> None:
+        """Print the throughput of every worker and of the whole pool"""
+        print(f"Embedded {total} chunks in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.1f} chunks/sec) "
+              f"with {self.workers} workers x {self.threads_per_worker} threads")
+        for pid, (chunks, busy) in sorted(stats.items()):
+            print(f"  worker {pid}: {chunks} chunks, {busy:.1f}s busy, {chunks / max(busy, 1e-9):.1f} chunks/sec")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents across the worker pool"""
+        return self.embed_matrix(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query with a model loaded in the main process"""
+        if self._query_model is None:
+            from langchain_huggingface import HuggingFaceEmbeddings
+            self._query_model = HuggingFaceEmbeddings(
+                model_name=self.model_name,
+                model_kwargs={"device": "cpu"},
+                encode_kwargs={"normalize_embeddings": self.normalize}
+            )
+        return self._query_model.embed_query(text)
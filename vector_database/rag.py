@@ -1,12 +1,15 @@
 # Utilization
 import os
-import pickle
 import pandas as pd
 import streamlit as st
-from io import StringIO 
 import sys
+import json
 import boto3
 import shutil
+import codecs
+import numpy as np
+import argparse
+from typing import Iterable, Iterator
 # Document and Splitter
 from langchain_core.documents import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -14,14 +17,27 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_huggingface import HuggingFaceEmbeddings
 # Vector Store
 from langchain_community.vectorstores import FAISS 
-# Hybrid Search components
-from langchain_community.retrievers import BM25Retriever
 # Check if running on Streamlit Cloud
 if "mnt" in os.getcwd():
     os.chdir("/mount/src/linkedin-chatbot-job-mnt-team/")
     sys.path.append("/mount/src/linkedin-chatbot-job-mnt-team/")
 # QNA
 from streamlit_app.utils.config import Config
+from streamlit_app.helpers.faiss_index import build_index, flat_vectors, index_type_of, index_params
+from streamlit_app.helpers.keyword_index import KeywordIndex
+from streamlit_app.helpers.columnar_docstore import ColumnarDocstore
+from streamlit_app.helpers.s3_sync import S3Sync
+from streamlit_app.helpers.index_manifest import build_manifest
+from vector_database.incremental_index import (
+    fingerprint_jobs,
+    assign_chunk_ids,
+    group_ids_by_job,
+    load_fingerprints,
+    save_fingerprints,
+    plan_index_update,
+)
+from vector_database.embedding_cache import EmbeddingCache, CachedEmbeddings
+from vector_database.parallel_embeddings import ParallelEmbeddings
 
 os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"
 os.environ["HF_HUB_DISABLE_SYMLINKS_WARNING"] = "1"
@@ -38,7 +54,73 @@ distance = config["distance"]
 normal_embeddings = config["normal_embeddings"]
 s3_key_bm25 = config["s3_key"]
 bm25_file = config["bm25_file"]
+docstore_file = config["docstore_file"]
+manifest_file = config["manifest_file"]
+s3_key_manifest = config["manifest_key"]
+bm25_k1 = config["bm25_k1"]
+bm25_b = config["bm25_b"]
 bucket_job = config["bucket_job"]
+incremental_build = config["incremental_build"]
+fingerprint_file = config["fingerprint_file"]
+csv_chunksize = config["csv_chunksize"]
+faiss_index_type = config["faiss_index_type"]
+faiss_params = index_params(config)
+embedding_cache_dir = config["embedding_cache_dir"]
+threads_per_worker = config["threads_per_worker"]
+embedding_workers = config["embedding_workers"] or max(1, (os.cpu_count() or 1) // threads_per_worker)
+
+# Columns used to build a job document
+document_columns = [
+    "job_title", "company_name", "job_location", "url",
+    "job_time_posted", "job_applicants_applied", "job_role", "job_details"
+]
+
+def iter_job_frames(body, chunksize: int = csv_chunksize) -> Iterator[pd.DataFrame]:
+    """
+    Stream the jobs CSV in chunks of rows instead of reading it whole
+
+    Args:
+        body: Binary file-like object, e.g. the S3 StreamingBody
+        chunksize (int): Number of rows per chunk
+
+    Yields:
+        pd.DataFrame: Chunk of jobs, rows whose url was already seen are dropped
+    """
+    seen_urls = set()
+    reader = pd.read_csv(codecs.getreader("utf-8")(body), chunksize=chunksize)
+    for frame in reader:
+        frame = frame.drop_duplicates(subset="url", keep="first")
+        frame = frame[~frame["url"].astype(str).isin(seen_urls)]
+        seen_urls.update(frame["url"].astype(str))
+        yield frame
+
+def iter_documents(df: pd.DataFrame) -> Iterator[Document]:
+    """
+    Convert data into Documents, one row at a time
+
+    Args:
+        Data frame: Data to be converted into documents
+
+    Yields:
+        Document: page content and metadata of a job
+    """
+    for job_title, company_name, job_location, url, job_time_posted, job_applicants_applied, job_role, job_details in df[document_columns].itertuples(index=False, name=None):
+        yield Document(
+            page_content=f'''Job Title: {job_title}
+            \nCompany Name: {company_name}
+            \nJob Location: {job_location}
+            \nUrl to detail job in Linkedin: {url}
+            \nTime of the job that is posted in Linkedin: {job_time_posted}
+            \nApplicants of Job that is applied: {job_applicants_applied}
+            \nRole of the job: {job_role}
+            \nDetails of the job: it include: qualification, requirement, beneficial and something like that: {job_details}''',
+            metadata={
+                "job_title": job_title,
+                "company_name": company_name,
+                "job_location": job_location,
+                "job_url": url
+            },
+        )
 
 def load_documents(df: pd.DataFrame) -> list:
     """
@@ -50,35 +132,14 @@ def load_documents(df: pd.DataFrame) -> list:
     Returns:
         Documents includes page content and metadata
     """
-    # Convert into documents
-    # Convert into documents
-    documents = [
-        Document(
-            page_content=f'''Job Title: {row["job_title"]}
-            \nCompany Name: {row["company_name"]}
-            \nJob Location: {row["job_location"]}
-            \nUrl to detail job in Linkedin: {row["url"]}
-            \nTime of the job that is posted in Linkedin: {row["job_time_posted"]}
-            \nApplicants of Job that is applied: {row["job_applicants_applied"]}
-            \nRole of the job: {row["job_role"]}
-            \nDetails of the job: it include: qualification, requirement, beneficial and something like that: {row["job_details"]}''',
-            metadata={
-                "job_title": row["job_title"],
-                "company_name": row["company_name"],
-                "job_location": row["job_location"],
-                "job_url": row["url"]
-            },
-        )
-        for _, row in df.iterrows()
-    ]
-    return documents
+    return list(iter_documents(df))
 
-def chunk_text(documents: list, chunk_size: int = chunk_size, chunk_overlap: int = chunk_overlap) -> list:
+def chunk_text(documents: Iterable[Document], chunk_size: int = chunk_size, chunk_overlap: int = chunk_overlap) -> list:
     """
     Split large documents into smaller chunks for better processing and embedding.
 
     Args:
-        documents (list): List of langchain Document objects.
+        documents (Iterable[Document]): Langchain Document objects.
         chunk_size (int): The maximum size of each text chunk.
         chunk_overlap (int): The number of characters that overlap between chunks to ensure context.
 
@@ -95,94 +156,352 @@ def chunk_text(documents: list, chunk_size: int = chunk_size, chunk_overlap: int
     return split_docs
 
 # Add this function to upload a directory to S3
+def get_s3_sync(bucket: str) -> S3Sync:
+    """Create the S3 sync component shared by uploads and downloads"""
+    return S3Sync(
+        bucket,
+        max_workers=config["s3_max_workers"],
+        multipart_threshold_mb=config["s3_multipart_threshold_mb"],
+        multipart_chunksize_mb=config["s3_multipart_chunksize_mb"]
+    )
+
 def upload_directory_to_s3(local_directory, bucket, s3_prefix):
     """
-    Upload a directory to S3 bucket
+    Upload the changed files of a directory to S3 bucket, concurrently
     
     Args:
         local_directory (str): Local directory path
         bucket (str): S3 bucket name
         s3_prefix (str): S3 key prefix (folder path)
     """
-    s3_client = boto3.client('s3')
-    
-    for root, dirs, files in os.walk(local_directory):
-        for file in files:
-            local_path = os.path.join(root, file)
-            # Calculate relative path
-            relative_path = os.path.relpath(local_path, local_directory)
-            s3_key = os.path.join(s3_prefix, relative_path).replace("\\", "/")
-            
-            print(f"Uploading {local_path} to s3://{bucket}/{s3_key}")
-            s3_client.upload_file(local_path, bucket, s3_key)
+    stats = get_s3_sync(bucket).upload_directory(local_directory, s3_prefix)
+    print(f"Uploaded {stats['uploaded']} files, {stats['skipped']} unchanged")
 
-
-def embed_and_store(model_name: str, doc_chunks: list, db_path: str, device: str = device, batch_size: int = batch_size, normal_embeddings: bool = normal_embeddings, distance: str = distance):
+def load_embedding_model(model_name: str, device: str = device, batch_size: int = batch_size, normal_embeddings: bool = normal_embeddings):
     """
-    Embed the document chunks and store them in a vector database (FAISS).
+    Load the embedding model used to build the vector database
 
     Args:
-        doc_chunks (list): The chunked documents to be embedded and stored.
-        db_path (str): Path to save the FAISS vector database.
+        model_name (str): Name of the HuggingFace model
 
     Returns:
-        FAISS: The FAISS vector database.
+        Embeddings: The embedding model, wrapped by the on-disk cache if enabled
     """
-    # Embedding model
-    embeddings = HuggingFaceEmbeddings(
-        model_name=model_name,
-        model_kwargs={"device": device}, # use GPU or CPU
-        encode_kwargs={"batch_size": batch_size, "normalize_embeddings": normal_embeddings} # fit with CPU
-    )
+    if device == "cpu" and embedding_workers > 1:
+        # Shard chunks across processes, one model per worker
+        embeddings = ParallelEmbeddings(
+            model_name=model_name,
+            workers=embedding_workers,
+            threads_per_worker=threads_per_worker,
+            batch_size=batch_size,
+            normalize=normal_embeddings
+        )
+    else:
+        embeddings = HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs={"device": device}, # use GPU or CPU
+            encode_kwargs={"batch_size": batch_size, "normalize_embeddings": normal_embeddings} # fit with CPU
+        )
+    if not embedding_cache_dir:
+        return embeddings
 
-    # Store documents in FAISS
-    vector_db = FAISS.from_documents(
-        doc_chunks, 
-        embeddings,
-        distance_strategy=distance # change distance
-    )
+    # Reuse vectors of chunks embedded by previous runs
+    cache = EmbeddingCache(os.path.abspath(embedding_cache_dir), model_name, normal_embeddings)
+    return CachedEmbeddings(embeddings, cache)
+
+def save_and_upload_vector_db(vector_db: FAISS, db_path: str) -> None:
+    """
+    Save the FAISS vector database locally and upload it to S3
+
+    Args:
+        vector_db (FAISS): The FAISS vector database
+        db_path (str): Path to save the FAISS vector database
+    """
     vector_db.save_local(db_path)
-     # Upload to S3
-    bucket_name = bucket_vectordb  # Use the same bucket name here
+    # Columnar copy of the docstore, memory-mapped by the app
+    ids = [vector_db.index_to_docstore_id[position] for position in range(vector_db.index.ntotal)]
+    ColumnarDocstore.write(
+        os.path.join(db_path, docstore_file),
+        [vector_db.docstore.search(_id) for _id in ids],
+        ids
+    )
+    # Upload to S3
     upload_directory_to_s3(db_path, bucket_vectordb, prefix)
     print(f"Uploaded FAISS database to S3 bucket: {bucket_vectordb}/{prefix}")
-    
+
+def discard_fingerprints(db_path: str) -> None:
+    """
+    Remove the fingerprints of the previous build, locally and in S3
+
+    A build that fails before upload_fingerprints() then leaves no
+    fingerprints, and the next incremental run does a full rebuild instead of
+    diffing against an index that does not match them.
+
+    Args:
+        db_path (str): Directory of the FAISS vector database
+    """
+    fingerprint_path = os.path.join(db_path, fingerprint_file)
+    if os.path.exists(fingerprint_path):
+        os.remove(fingerprint_path)
+    get_s3_sync(bucket_vectordb).s3_client.delete_object(Bucket=bucket_vectordb, Key=os.path.join(prefix, fingerprint_file).replace("\\", "/"))
+
+def upload_fingerprints(db_path: str, jobs: dict, model_name: str) -> None:
+    """
+    Save and upload the fingerprints of the index just saved and uploaded
+
+    Args:
+        db_path (str): Directory of the FAISS vector database
+        jobs (dict): url -> {"hash", "ids"} of the jobs in the index
+        model_name (str): Name of the embedding model
+    """
+    fingerprint_path = os.path.join(db_path, fingerprint_file)
+    save_fingerprints(fingerprint_path, jobs, build_params(model_name))
+    get_s3_sync(bucket_vectordb).upload_file(fingerprint_path, os.path.join(prefix, fingerprint_file).replace("\\", "/"))
+
+def to_flat_index(vector_db: FAISS, embeddings) -> None:
+    """
+    Turn a compressed index back into a flat index so it can be edited in place
+
+    HNSW stores its vectors exactly, other types are re-embedded from the
+    docstore texts (served from the embedding cache when it is enabled).
+
+    Args:
+        vector_db (FAISS): The FAISS vector database
+        embeddings: The embedding model
+    """
+    index_type = index_type_of(vector_db.index)
+    if index_type == "flat":
+        return
+    print(f"Converting {index_type} index to flat for the incremental update...")
+    if index_type == "hnsw":
+        vectors = flat_vectors(vector_db.index)
+    else:
+        texts = [vector_db.docstore.search(_id).page_content for _id in vector_db.index_to_docstore_id.values()]
+        vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    vector_db.index = build_index(vectors, "flat", vector_db.index.metric_type, faiss_params)
+
+def compress_index(vector_db: FAISS, index_type: str = faiss_index_type) -> None:
+    """
+    Replace the flat index by the configured index type (HNSW, IVF-PQ, SQ8)
+
+    Args:
+        vector_db (FAISS): The FAISS vector database, with a flat index
+        index_type (str): Target index type
+    """
+    if index_type == "flat":
+        return
+    print(f"Building {index_type} index from {vector_db.index.ntotal} vectors...")
+    vector_db.index = build_index(flat_vectors(vector_db.index), index_type, vector_db.index.metric_type, faiss_params)
+
+def embed_and_store(embeddings, doc_chunks: list, ids: list, vector_db: FAISS = None, distance: str = distance) -> FAISS:
+    """
+    Embed a batch of document chunks and store them in a vector database (FAISS).
+
+    Args:
+        embeddings: The embedding model
+        doc_chunks (list): The chunked documents to be embedded and stored.
+        ids (list): Ids of the chunks in the docstore.
+        vector_db (FAISS): Vector database to add to, created if None.
+
+    Returns:
+        FAISS: The FAISS vector database.
+    """
+    # Embed the batch into one matrix, then add it to the FAISS index
+    texts = [doc.page_content for doc in doc_chunks]
+    vectors = embeddings.embed_documents(texts)
+    metadatas = [doc.metadata for doc in doc_chunks]
+
+    if vector_db is None:
+        # Store documents in FAISS
+        return FAISS.from_embeddings(
+            text_embeddings=list(zip(texts, vectors)),
+            embedding=embeddings,
+            metadatas=metadatas,
+            ids=ids,
+            distance_strategy=distance # change distance
+        )
+    vector_db.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
     return vector_db
 
-def save_bm25_retriever(doc_chunks, db_path):
+def download_directory_from_s3(local_directory, bucket, s3_prefix) -> bool:
+    """
+    Download the changed files of a directory from S3 bucket
+    
+    Args:
+        local_directory (str): Local directory path
+        bucket (str): S3 bucket name
+        s3_prefix (str): S3 key prefix (folder path)
+
+    Returns:
+        bool: True if the prefix is not empty
+    """
+    stats = get_s3_sync(bucket).download_prefix(s3_prefix, local_directory)
+    print(f"Downloaded {stats['downloaded']} files, {stats['skipped']} unchanged")
+    return stats["downloaded"] + stats["skipped"] > 0
+
+def build_params(model_name: str) -> dict:
+    """Parameters that make an existing index incompatible when they change"""
+    return {
+        "model_name": model_name,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "normal_embeddings": normal_embeddings,
+        "distance": distance,
+    }
+
+def load_previous_index(model_name: str, db_path: str, embeddings):
+    """
+    Load the index of the previous build to update it incrementally
+
+    Args:
+        model_name (str): Name of the embedding model
+        db_path (str): Path of the FAISS vector database
+        embeddings: The embedding model
+
+    Returns:
+        tuple: (FAISS, jobs fingerprints), or (None, None) if a full rebuild is needed
+    """
+    fingerprint_path = os.path.join(db_path, fingerprint_file)
+    if not os.path.exists(fingerprint_path):
+        print("No local index found, downloading previous index from S3...")
+        try:
+            download_directory_from_s3(db_path, bucket_vectordb, prefix)
+        except Exception as e:
+            print(f"Could not download previous index: {e}")
+
+    state = load_fingerprints(fingerprint_path)
+    if state is None or state["params"] != build_params(model_name):
+        print("Previous index is missing or was built with other parameters, full rebuild required")
+        return None, None
+
+    try:
+        vector_db = FAISS.load_local(
+            folder_path=db_path,
+            embeddings=embeddings,
+            allow_dangerous_deserialization=True
+        )
+    except Exception as e:
+        print(f"Failed to load previous index: {e}")
+        return None, None
+    to_flat_index(vector_db, embeddings)
+    return vector_db, state["jobs"]
+
+def index_jobs(frames: Iterator[pd.DataFrame], embeddings, vector_db: FAISS = None, jobs: dict = None):
+    """
+    Stream jobs into the FAISS database batch by batch.
+
+    Only new or changed jobs (by url and content hash of job_details) are
+    chunked and embedded, vectors of changed and disappeared jobs are removed.
+    Peak memory of the pipeline is bounded by the size of a batch of rows.
+
+    Args:
+        frames (Iterator[pd.DataFrame]): Batches of jobs, deduplicated by url
+        embeddings: The embedding model
+        vector_db (FAISS): Index of the previous build, None for a full build
+        jobs (dict): url -> {"hash", "ids"} of the previous build
+
+    Returns:
+        tuple: (FAISS vector database, updated jobs fingerprints)
+    """
+    jobs = jobs if jobs is not None else {}
+    seen_urls = set()
+    counts = {"new": 0, "changed": 0, "unchanged": 0, "chunks": 0}
+
+    for frame in frames:
+        hashes = fingerprint_jobs(frame)
+        seen_urls.update(hashes)
+        added, changed, _ = plan_index_update(jobs, hashes)
+        counts["new"] += len(added)
+        counts["changed"] += len(changed)
+        counts["unchanged"] += len(hashes) - len(added) - len(changed)
+
+        # Remove vectors of changed jobs before re-embedding them
+        stale_ids = [chunk_id for url in changed for chunk_id in jobs[url]["ids"]]
+        if stale_ids:
+            vector_db.delete(stale_ids)
+
+        urls_to_embed = set(added) | set(changed)
+        if not urls_to_embed:
+            continue
+        doc_chunks = chunk_text(iter_documents(frame[frame["url"].astype(str).isin(urls_to_embed)]))
+        ids = assign_chunk_ids(doc_chunks)
+        vector_db = embed_and_store(embeddings, doc_chunks, ids, vector_db)
+        for url, chunk_ids in group_ids_by_job(doc_chunks, ids).items():
+            jobs[url] = {"hash": hashes[url], "ids": chunk_ids}
+        counts["chunks"] += len(doc_chunks)
+        print(f"Embedded {counts['chunks']} document chunks so far")
+
+    # Remove vectors of jobs that disappeared from the scrape
+    removed = [url for url in jobs if url not in seen_urls]
+    stale_ids = [chunk_id for url in removed for chunk_id in jobs[url]["ids"]]
+    if stale_ids:
+        vector_db.delete(stale_ids)
+    for url in removed:
+        del jobs[url]
+
+    print(f"Indexed jobs: {counts['new']} new, {counts['changed']} changed, {len(removed)} removed, "
+          f"{counts['unchanged']} unchanged, {counts['chunks']} chunks embedded")
+    return vector_db, jobs
+
+def save_keyword_index(vector_db: FAISS, db_path: str):
     """
-    Create and save BM25 retriever for future use with hybrid search.
+    Create and save the BM25 keyword index for future use with hybrid search.
+
+    Documents are numbered by their position in the FAISS index.
     
     Args:
-        doc_chunks (list): Document chunks for creating BM25Retriever
-        db_path (str): Base path where to save the BM25 retriever
+        vector_db (FAISS): The FAISS vector database holding every chunk
+        db_path (str): Base path where to save the keyword index
         
     Returns:
-        str: Path to saved BM25 retriever
+        str: Path to saved keyword index
     """
-    print("Creating BM25 retriever...")
-    # Create BM25 retriever for keyword search
-    bm25_retriever = BM25Retriever.from_documents(doc_chunks)
-    bm25_retriever.k = 5
+    print("Creating BM25 keyword index...")
+    texts = [
+        vector_db.docstore.search(vector_db.index_to_docstore_id[position]).page_content
+        for position in range(vector_db.index.ntotal)
+    ]
+    keyword_index = KeywordIndex.build(texts, k1=bm25_k1, b=bm25_b)
     
-    # Save BM25 retriever for future use
+    # Save keyword index for future use
     bm25_path = os.path.join(os.path.dirname(db_path), bm25_file)
     try:
-        with open(bm25_path, "wb") as f:
-            pickle.dump(bm25_retriever, f)
-        print(f"Saved BM25 retriever to {bm25_path}")
+        keyword_index.save(bm25_path)
+        print(f"Saved BM25 keyword index to {bm25_path}")
          
         # Upload to S3
-        bucket_name = bucket_vectordb  # Change to your preferred bucket name
-        s3_client = boto3.client("s3")
-        s3_client.upload_file(bm25_path, bucket_name, s3_key_bm25)  # Fix: use bm25_path instead of db_path
+        get_s3_sync(bucket_vectordb).upload_file(bm25_path, s3_key_bm25)
         
-        print(f"Saved BM25 retriever to S3: s3://{bucket_vectordb}/{s3_key_bm25}")
+        print(f"Saved BM25 keyword index to S3: s3://{bucket_vectordb}/{s3_key_bm25}")
         return bm25_path
     except Exception as e:
-        print(f"Failed to save BM25 retriever: {e}")
+        print(f"Failed to save BM25 keyword index: {e}")
         return None
 
+def publish_manifest(db_path: str, bm25_path: str, model_name: str):
+    """
+    Write and upload the manifest of the index just built.
+
+    The manifest is uploaded last, so the app only sees a new version once
+    every file it lists is in S3.
+
+    Args:
+        db_path (str): Directory of the FAISS vector database
+        bm25_path (str): Path of the keyword index file
+        model_name (str): Embedding model of the index
+
+    Returns:
+        str: Version id of the published index
+    """
+    params = dict(build_params(model_name), faiss_index_type=faiss_index_type)
+    manifest = build_manifest(db_path, bm25_path, params)
+    manifest_path = os.path.join(os.path.dirname(db_path), manifest_file)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    get_s3_sync(bucket_vectordb).upload_file(manifest_path, s3_key_manifest)
+    print(f"Published index version {manifest['version']} to s3://{bucket_vectordb}/{s3_key_manifest}")
+    return manifest["version"]
+
 # Update the check_and_prepare_paths function
 def check_and_prepare_paths(db_path: str):
     """
@@ -225,41 +544,53 @@ def check_and_prepare_paths(db_path: str):
     return (db_path, bm25_path)
 
 
-def main():
+def main(incremental: bool = incremental_build):
     # Initialize configuration
     config = Config().get_config()
     db_path = os.path.abspath(config["vector_db_path"])
+    model_name = config["model_name_vectordb"]
+    embeddings = load_embedding_model(model_name)
 
-    # Connect to database and fetch data
+    vector_db, jobs = None, None
+    if incremental:
+        print("Loading previous FAISS vector database...")
+        vector_db, jobs = load_previous_index(model_name, db_path, embeddings)
+    full_build = vector_db is None
+
+    # Connect to database and stream data
     # Read file from s3 
     s3_client = boto3.client("s3")
     response = s3_client.get_object(Bucket=bucket_job, Key = "processed_data.csv")
-    content = response["Body"].read().decode("utf-8")
-
-    # convert content into Data Frame
-    df = pd.read_csv(StringIO(content))
 
-    # Create documents and chunk them
-    print("Creating document chunks...")
-    documents = load_documents(df)
-    doc_chunks = chunk_text(documents)
-    print(f"Created {len(doc_chunks)} document chunks")
-    
-    # Create and save vector database using FAISS
+    # Create documents, chunk and embed them batch by batch
     print("Creating FAISS vector database...")
-    vector_db = embed_and_store(
-        model_name=config["model_name_vectordb"],
-        doc_chunks=doc_chunks, 
-        db_path=db_path
-    )
+    frames = iter_job_frames(response["Body"])
+    vector_db, jobs = index_jobs(frames, embeddings, vector_db, jobs)
+    # Keep the local and published indexes when the scrape produced nothing to index
+    if vector_db is None or vector_db.index.ntotal == 0:
+        raise RuntimeError("No job documents were indexed (processed_data.csv is empty or has no job details), "
+                           "the existing vector database was left untouched")
+    if full_build:
+        check_and_prepare_paths(db_path)
+    # Fingerprints only describe an index that was fully saved and uploaded, written last
+    discard_fingerprints(db_path)
+    compress_index(vector_db)
+    save_and_upload_vector_db(vector_db, db_path)
+    upload_fingerprints(db_path, jobs, model_name)
     print("Created embeddings and stored in FAISS database")
 
-    # Create BM25 file
-    print("Creating BM25 retriever...")
-    bm25_path = save_bm25_retriever(doc_chunks, db_path)
-    print(f"Created BM25 retriever at {bm25_path}")
+    # Create BM25 file from every chunk in the index
+    bm25_path = save_keyword_index(vector_db, db_path)
+    print(f"Created BM25 keyword index at {bm25_path}")
+
+    # Announce the new version to running apps
+    if bm25_path is not None:
+        publish_manifest(db_path, bm25_path, model_name)
     print("\nRAG system setup complete with FAISS!")
 
 # Run main to build the database and hybrid search
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build the FAISS and BM25 indexes of the job chatbot")
+    parser.add_argument("--full-rebuild", action="store_true", help="Re-embed every job instead of only new/changed ones")
+    args = parser.parse_args()
+    main(incremental=incremental_build and not args.full_rebuild)